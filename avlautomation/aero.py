@@ -1,33 +1,61 @@
 import subprocess as sp
 import numpy as np
-from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import os
-import shutil
+from tqdm import tqdm
 
 from .geometry import Plane
-
-def avl_cmd(cmd_str:str,path:str)->None:
+from .avlfile import AVLFile
+from .pool import AVLPool, Job
+from .scheduler import Scheduler, default_workers
+from .config import read_options, read_loadings
+from .cache import ResultCache
+from .workspace import Workspace
+from .journal import Journal
+from .cluster import coordinator
+from .profiler import PROFILER
+from . import output
+
+def avl_cmd(cmd_str:str,path:str)->str:
     """
     Opens AVL in a subprocess and submits command string.
 
     Arguments:
         cmd_str {string} -- Command string to be submitted to AVL. Essentially key presses.
+
+    Returns:
+        stdout {string} -- AVL stdout.
     """
 
-    avl_subprocess=sp.Popen(
-        [f"{path}/avl.exe"],
-        stdin=sp.PIPE,
-        stdout=sp.PIPE,
-        stderr=sp.PIPE
-    )
+    with PROFILER.phase("start AVL"):
+        avl_subprocess=sp.Popen(
+            [f"{path}/avl.exe"],
+            stdin=sp.PIPE,
+            stdout=sp.PIPE,
+            stderr=sp.PIPE
+        )
+
+    with PROFILER.phase("solve"):
+        stdout,stderr=avl_subprocess.communicate(input=cmd_str.encode())
 
-    avl_subprocess.communicate(input=cmd_str.encode())
+    return stdout.decode(errors="replace")
 
-    return None
+#   Mode columns in AVL's eigenvalue listing.
+DUTCH=0
+ROLL=2
+
+#   Quantities adaptive alpha sweeps watch, as functions that change sign at the event.
+EVENTS={
+    "spiral":lambda case,aero:case.spiral-1,        #   Spirally stable above 1
+    "clb":lambda case,aero:case.Clb,
+    "cl":lambda case,aero:case.Cl-aero.CL_target,
+    "dutch":lambda case,aero:case.dutch.real,       #   Damping sign
+    "roll":lambda case,aero:case.roll.real,
+}
+MODE_EVENTS=("dutch","roll")
 
 class Case():
-    def __init__(self,path,Xcg,Ycg,Zcg,mass,Ixx=None,Iyy=None,Izz=None,velocity=None,density=None,alpha=None,modes=False,polars=False,id=False):
+    def __init__(self,path,Xcg,Ycg,Zcg,mass,Ixx=None,Iyy=None,Izz=None,velocity=None,density=None,alpha=None,modes=False,polars=False,id=False,loading=0):
         """
         Most of these class inits were written when I didn't fully understand what they were for lol
         """
@@ -48,13 +76,18 @@ class Case():
         self.Cd=None
         self.modes_results_file=None
         self.polars_results_file=None
+        self.polars_output=None     #   ST listing lines captured from AVL stdout.
+        self.eigenvalues=None       #   (real, imag) of each mode captured from AVL stdout.
+        self.st=None                #   Parsed ST listing (output.read_st).
         self.modes=modes
         self.polars=polars
         self.id=id
+        self.loading=loading        #   Index into Aero.loadings.
         self.Clb=None
         self.Clp=None
         self.spiral=None
 
+    @PROFILER.timed("write cases")
     def write_aero_case(self):
         """
         Creates aero polar case string in AVL format and writes to file.
@@ -73,7 +106,8 @@ class Case():
         case_str += f"density={self.density} kg-m^3\n"
         case_str += "grav.acc.=0.98 m/s^2\n"
 
-        path=f"{self.path}/cases/{str(self.alpha)}deg.case"
+        prefix=f"{self.id}-" if self.id!=False else ""
+        path=f"{self.path}/cases/{prefix}{str(self.alpha)}deg.case"
 
         with open(path,'w') as f:
             f.write(case_str)
@@ -82,6 +116,7 @@ class Case():
 
         return None
 
+    @PROFILER.timed("write cases")
     def write_stab_case(self)->None:
         """
         Creates stability case string & writes to file
@@ -102,44 +137,81 @@ class Case():
         return None 
 
 class Aero():
-    def __init__(self,config_file:str):
-        #   Cleans temp folders.
+    def __init__(self,config_file:str,resume:bool=False,loadings:list=None):
+        """
+        Arguments:
+            config_file {string} -- Aero config file.
+            resume {bool} -- Skip AVL jobs finished by an interrupted run (see journal.Journal).
+            loadings {list[tuple[float,float]]} -- (Xcg, mass) loadings, the first is the one polars are run at. Defaults to the config file's.
+        """
         self.path = os.path.split(config_file)[0]
 
-        if os.path.isdir(self.path+"/cases")==True:
-            shutil.rmtree(self.path+"/cases")
-        os.mkdir(self.path+"/cases")
-        if os.path.isdir(self.path+"/results")==True:
-            shutil.rmtree(self.path+"/results")
-        os.mkdir(self.path+"/results")
-
         self.read_config(config_file)
+        if loadings is not None:
+            self.loadings=[(float(Xcg),float(mass)) for Xcg,mass in loadings]
+
+        #   Cleans temp folders.
+        self.workspace=Workspace(self.path,("cases","results"),self.workspace_backend,self.keep_files)
+        self.scratch=self.workspace.root
+
+        self.cache=None
+        if self.use_cache==True:
+            self.cache=ResultCache(self.path+"/cache",self.cache_size)
+        if self.journal==True or resume==True:
+            #   Journal sits in front of the cache, jobs are looked up in both.
+            self.cache=Journal(os.path.splitext(config_file)[0]+".journal",resume,self.cache)
+
+        #   Workers on other machines connect to this for jobs (see cluster.Worker).
+        self.coordinator=None
+        if self.cluster is not None:
+            self.coordinator=coordinator(self.cluster,self.cluster_key,self.timeout)
+
+        self.cases=self.make_cases()
+
+        return None
+
+    def make_cases(self,id=False,loading=0,alphas=None):
+        """
+        Creates case objects for range of alphas.
+
+        Arguments:
+            id {string} -- Prefix for the case file names. Planes run together each need their own cases.
+            loading {int} -- Index of the loading (self.loadings) for the CG and mass. Polars don't
+                depend on the loading so only the first runs them, the others are eigenmodes only.
+            alphas {list[float]} -- Angles of attack. Defaults to alpha0 to alpha1 every increment.
 
+        Returns:
+            cases {list[Case]}
+        """
         alpha_range=np.linspace(    #   AoA range.
             self.alpha0,
             self.alpha1,
             int(1+(self.alpha1-self.alpha0)/self.increment)
-        )
+        ) if alphas is None else alphas
 
-        self.cases=[]
+        Xcg,mass=self.loadings[loading]
+
+        cases=[]
         for alpha in alpha_range:
-            self.cases.append(Case( #   Creates case objects for range of alphas
-                path=self.path,
-                Xcg=self.Xcg,
+            cases.append(Case(
+                path=self.scratch,
+                Xcg=Xcg,
                 Ycg=self.Ycg,
                 Zcg=self.Zcg,
                 Ixx=self.Ixx,
                 Iyy=self.Iyy,
                 Izz=self.Izz,
-                mass=self.mass,
+                mass=mass,
                 velocity=self.velocity,
                 density=self.density,
                 alpha=alpha,
                 modes=self.modes,
-                polars=self.polars
+                polars=self.polars if loading==0 else False,
+                id=id,
+                loading=loading
             ))
         
-        return None
+        return cases
 
     def read_config(self,file:str)->None:
         """
@@ -173,13 +245,58 @@ class Aero():
             self.alpha0     = float(lines[9].split()[1])
             self.alpha1     = float(lines[10].split()[1])
             self.increment  = float(lines[11].split()[1])
-            self.threads    = int(lines[12].split()[1])
+            self.threads    = lines[12].split()[1]
             self.polars     = str_to_bool(lines[13].split()[1])
             self.modes      = str_to_bool(lines[14].split()[1])
         except IndexError:
             print("Parameters must have a value assigned.")
             exit()
-        
+
+        #   "auto" uses every available core.
+        self.threads=default_workers() if self.threads=="auto" else int(self.threads)
+
+        options=read_options(lines[15:])
+        self.sweep      = str_to_bool(options.get("sweep","N"))
+        self.use_cache  = str_to_bool(options.get("cache","N"))
+        self.cache_size = float(options.get("cache_size",500))*1e6
+        self.stdout     = str_to_bool(options.get("stdout","N"))
+        self.save_results=str_to_bool(options.get("save_results","N"))
+        self.scheduler  = options.get("scheduler","pool")=="async"
+        self.timeout    = float(options.get("timeout",60))
+        self.workspace_backend=options.get("workspace","local")
+        self.keep_files = options.get("keep_files","N")
+        self.journal    = str_to_bool(options.get("journal","N"))
+        self.cluster    = options.get("cluster")
+        #   CG & mass loadings. Polars and neutral points are run once, SM comes out for each.
+        self.loadings   = [(self.Xcg,self.mass)]
+        if "loadings" in options:
+            self.loadings=read_loadings(options["loadings"],self.mass)
+        self.cluster_key= options.get("cluster_key",os.environ.get("AVL_CLUSTER_KEY"))
+        self.alpha_sampling=options.get("alpha_sampling","linear")
+        self.adaptive_steps=int(options.get("adaptive_steps",5))
+        self.alpha_accuracy=float(options.get("alpha_accuracy",0.05))
+        self.adaptive_rounds=int(options.get("adaptive_rounds",30))
+        self.CL_target  = float(options["cl_target"]) if "cl_target" in options else None
+        self.events     = [event.lower() for event in options.get("events","spiral,clb").split(",") if event!=""]
+
+        if self.alpha_sampling=="adaptive":
+            #   New alphas are rounded to 1e-6 deg, narrower intervals can't be split.
+            if self.alpha_accuracy<1e-5:
+                print("\u001b[31m[Error]\u001b[0m alpha_accuracy must be at least 1e-5 deg.")
+                exit()
+            for event in self.events:
+                if event not in EVENTS:
+                    print(f"\u001b[31m[Error]\u001b[0m Unknown event '{event}' (events: {', '.join(EVENTS)}).")
+                    exit()
+            if "cl" in self.events and self.CL_target is None:
+                print("\u001b[31m[Error]\u001b[0m The cl event needs CL_target.")
+                exit()
+            if self.modes==False and any(event in MODE_EVENTS for event in self.events):
+                print("\u001b[33m[Warning]\u001b[0m Mode events need eigenmodes: Y and will be ignored.")
+                self.events=[event for event in self.events if event not in MODE_EVENTS]
+            if self.polars==False and any(event not in MODE_EVENTS for event in self.events):
+                print("\u001b[33m[Warning]\u001b[0m Polar events need polars: Y and will be ignored.")
+                self.events=[event for event in self.events if event in MODE_EVENTS]
 
         return None
 
@@ -190,45 +307,232 @@ class Aero():
         Arguments:
             plane {geometry.Plane} -- Plane object to run analysis on.
         """
-        #   Write cases to file.
-        with ThreadPoolExecutor(max_workers=self.threads) as pool:
-            pool.map(self.create_cases,self.cases)
+        if self.alpha_sampling=="adaptive":
+            self.run_adaptive([plane])
+            return None
+
+        self.run_planes([plane],[self.cases])
+
+        return None
+
+    def run_planes(self,planes,cases=None):
+        """
+        Writes cases and runs aero analyses for several planes at once. Every
+        (plane, alpha) job goes to the same AVL pool.
+
+        Arguments:
+            planes {list[geometry.Plane]} -- Planes to run analysis on.
+            cases {list[list[Case]]} -- Cases for each plane. Defaults to a new set per plane.
+        """
+        for plane in tqdm(self.stream_planes(planes,cases),total=len(planes),desc="Aero analysis",disable=len(planes)==1):
+            pass
+
+        return None
+
+    def runner(self):
+        """
+        Runs AVL jobs for stream_planes: the cluster coordinator if there is one, otherwise a
+        new Scheduler (scheduler: async) or pool of persistent AVL sessions, closed by the caller.
+        """
+        if self.coordinator is not None:
+            return self.coordinator
+        if self.scheduler==True:
+            return Scheduler(self.path,self.threads,cache=self.cache,timeout=self.timeout)
+
+        return AVLPool(self.path,self.threads,timeout=self.timeout)
+
+    def stream_planes(self,planes,cases=None,runner=None):
+        """
+        Runs aero analyses on planes as they come, yielding each plane as soon as all
+        its jobs are done (polars and modes read). Planes are only pulled from planes as
+        AVL has room for their jobs, so a generator can make them on demand. Always runs
+        the evenly spaced alphas (or the given cases), adaptive sampling is run_adaptive.
+
+        Arguments:
+            planes {iterable[geometry.Plane]} -- Planes to run analysis on.
+            cases {iterable[list[Case]]} -- Cases for each plane. Defaults to a new set per plane.
+            runner {pool.AVLPool or scheduler.Scheduler} -- Open runner (see runner), left open. Defaults to a new one closed at the end.
+
+        Yields:
+            plane {geometry.Plane} -- Analysed plane, in completion order.
+        """
+        cases=iter(cases) if cases is not None else None
+        owners={}   #   id(job) -> [plane, jobs still running]
+
+        def jobs():
+            for plane in planes:
+                plane_cases=next(cases) if cases is not None else self.make_cases(plane.name)
+                plane.cases=plane_cases
+
+                #   Eigenmodes depend on the loading, polars don't: other loadings are modes only.
+                plane.loading_cases=[plane_cases]
+                if self.modes==True:
+                    alphas=[case.alpha for case in plane_cases]
+                    for loading in range(1,len(self.loadings)):
+                        plane.loading_cases.append(self.make_cases(f"{plane.name}-loading{loading}",loading,alphas))
+
+                plane_jobs=[]
+                for loading_cases in plane.loading_cases:
+                    #   Write cases to file. A sweep only needs the first, alpha is set in OPER.
+                    if self.sweep==True:
+                        loading_cases[0].write_aero_case()
+                        for case in loading_cases:
+                            case.case_file=loading_cases[0].case_file
+                    else:
+                        #   A few small files, a thread pool per plane costs more than it saves.
+                        for case in loading_cases:
+                            case.write_aero_case()
+
+                    #   Eigenmode and polar analysis both included.
+                    if self.sweep==True:
+                        plane_jobs.append(self.sweep_job(plane,loading_cases))
+                    else:
+                        plane_jobs+=[self.analysis_job(case,plane) for case in loading_cases]
+
+                owner=[plane,len(plane_jobs)]
+                for job in plane_jobs:
+                    owners[id(job)]=owner
+                yield from plane_jobs
+
+        #   Run aero analysis.
+        own=runner is None
+        if own==True:
+            runner=self.runner()
+        results=runner.results(jobs(),self.cache)
+
+        try:
+            for job,(st,eig) in results:
+                self.capture(job.tag,st,eig)
+
+                owner=owners.pop(id(job))
+                owner[1]-=1
+                if owner[1]>0:
+                    continue
 
-        plane.cases=self.cases
+                plane=owner[0]
+                self.collect(plane)
 
-        #   Run aero analysis. Eigenmode and polar analysis both included.
-        tasks=[(case,plane) for case in self.cases]
-        with ThreadPoolExecutor(max_workers=self.threads) as pool:
-            pool.map(self.analysis,tasks)
+                yield plane
+        finally:
+            results.close()
+            if own==True and runner is not self.coordinator:
+                runner.close()
+
+        return None
+
+    def collect(self,plane):
+        """
+        Reads the results of the plane's cases: alphas, modes, polars and loadings.
 
+        Arguments:
+            plane {geometry.Plane} -- Plane whose jobs have all finished.
+        """
         # Both of these will be true because they're required.
+        plane.alphas=np.array([case.alpha for case in plane.cases])
         if self.modes==True:
-            plane.modes=self.read_modes()
+            plane.modes=self.read_modes(plane.cases)
         if self.polars==True:
-            plane.polars=self.read_aero()
+            plane.polars=self.read_aero(plane.cases)
+        self.read_loadings(plane)
 
         return None
 
-    def create_cases(self,case):
-        """Short function for multithreading sake."""
-        case.write_aero_case()
+    def run_adaptive(self,planes):
+        """
+        Adaptive alpha sweep. Starts with adaptive_steps alphas from alpha0 to alpha1, then
+        only bisects the intervals where a watched quantity (events) changes sign until
+        they're narrower than alpha_accuracy (or adaptive_rounds is reached). Each round's
+        new alphas, for every plane, run as one batch.
+
+        Sets the usual results (plane.alphas, polars, modes... over every alpha run, in
+        order) and plane.events, the alpha of each sign change.
+
+        Arguments:
+            planes {list[geometry.Plane]} -- Planes to run analysis on.
+        """
+        runs={id(plane):None for plane in planes}   #   Loading cases of every alpha run so far
+        alphas={id(plane):np.linspace(self.alpha0,self.alpha1,self.adaptive_steps) for plane in planes}
+
+        #   Every round runs on the same AVL sessions (or parser processes).
+        runner=self.runner()
+
+        rounds=0
+        try:
+            while True:
+                batch=[plane for plane in planes if len(alphas[id(plane)])>0]
+                if len(batch)==0:
+                    break
+                if rounds==self.adaptive_rounds:
+                    print(f"\u001b[33m[Warning]\u001b[0m Adaptive alpha sweep stopped after {rounds} rounds (adaptive_rounds).")
+                    break
+
+                cases=[self.make_cases(f"{plane.name}-{rounds}",alphas=alphas[id(plane)]) for plane in batch]
+                for plane in self.stream_planes(batch,cases,runner):
+                    if runs[id(plane)] is None:
+                        runs[id(plane)]=plane.loading_cases
+                    else:
+                        runs[id(plane)]=[old+new for old,new in zip(runs[id(plane)],plane.loading_cases)]
+
+                for plane in batch:
+                    plane.loading_cases=[sorted(cases,key=lambda case:case.alpha) for cases in runs[id(plane)]]
+                    plane.cases=plane.loading_cases[0]
+                    self.collect(plane)
+
+                    crossings=self.crossings(plane.cases)
+                    alphas[id(plane)]=np.unique([round((lower.alpha+upper.alpha)/2,6) for event,lower,upper,f_lower,f_upper in crossings
+                                                 if upper.alpha-lower.alpha>self.alpha_accuracy])
+                rounds+=1
+        finally:
+            if runner is not self.coordinator:
+                runner.close()
+
+        for plane in planes:
+            events=[]
+            for event,lower,upper,f_lower,f_upper in self.crossings(plane.cases):
+                #   Linear between the last bracketing alphas
+                alpha=lower.alpha-f_lower*(upper.alpha-lower.alpha)/(f_upper-f_lower)
+                events.append((event,alpha,lower.alpha,upper.alpha))
+            plane.events=pd.DataFrame(events,columns=["Event","Alpha (deg)","Lower (deg)","Upper (deg)"])
+
+        print(f"[Info] Adaptive alpha sweep: {rounds} rounds, {sum(len(plane.cases) for plane in planes)} alphas run.")
 
         return None
 
-    def analysis(self,tasks):
+    def crossings(self,cases):
         """
-        Writes command string and submits to AVL for polar and eigenmode analysis.
+        Alpha intervals where a watched quantity (self.events) changes sign.
 
         Arguments:
-            tasks {tuple[Case,Plane]} -- Case and plane to run analysis on.
+            cases {list[Case]} -- Analysed cases, in alpha order.
+
+        Returns:
+            crossings {list[tuple]} -- (event, lower case, upper case, value at lower, value at upper).
         """
-        case,plane=tasks
+        crossings=[]
+        for event in self.events:
+            values=np.array([EVENTS[event](case,self) for case in cases],dtype=float)
+            change=(np.sign(values[:-1])!=np.sign(values[1:]))&np.isfinite(values[:-1])&np.isfinite(values[1:])
+            for i in np.flatnonzero(change):
+                crossings.append((event,cases[i],cases[i+1],values[i],values[i+1]))
+
+        return crossings
+
+    def analysis_job(self,case,plane):
+        """
+        Writes command string for polar and eigenmode analysis of one case.
+
+        Arguments:
+            case {Case} -- Case to run.
+            plane {geometry.Plane} -- Plane to run analysis on.
 
+        Returns:
+            job {pool.Job} -- AVL job, tagged with [case].
+        """
         cmd_str=f"load {plane.geom_file}\n"
         cmd_str+=f"case {case.case_file}\n"
         cmd_str+="oper\no\nv\n\nx\n"
 
-        results_file=f"{self.path}/results/{plane.name}-{str(case.alpha)}deg"
+        results_file=self.results_file(plane,case)
         
         if case.modes==False and case.polars==False:
             raise ValueError("No analysis type defined.")
@@ -236,107 +540,228 @@ class Aero():
         if case.modes==True:
             case.modes_results_file=f"{results_file}.eig"
 
-            cmd_str+="\nmode\nN\nW\n"
-            cmd_str+=f"{case.modes_results_file}\n\n"
+            cmd_str+="\nmode\nN\n"
+            if self.stdout==False:
+                cmd_str+=f"W\n{case.modes_results_file}\n"
+            cmd_str+="\n"
         if case.polars==True:
             case.polars_results_file=f"{results_file}.polars"
 
             cmd_str+="oper\nx\nst\n"
-            cmd_str+=f"{case.polars_results_file}\n"
+            if self.stdout==False:
+                cmd_str+=f"{case.polars_results_file}\n"
+            else:
+                cmd_str+="\n"    #   Blank filename prints to screen.
+
+        return self.job(cmd_str,plane,[case])
+
+    def sweep_job(self,plane,cases):
+        """
+        Writes command string running every alpha in one AVL session. The plane is loaded
+        once and alpha is changed in OPER, so AVL reuses its factorised influence matrix
+        between alphas.
+
+        Arguments:
+            plane {geometry.Plane} -- Plane to run analysis on.
+            cases {list[Case]} -- The plane's cases.
 
-        avl_cmd(cmd_str,self.path)
+        Returns:
+            job {pool.Job} -- AVL job, tagged with the cases in run order.
+        """
+        if self.modes==False and self.polars==False:
+            raise ValueError("No analysis type defined.")
+
+        cmd_str=f"load {plane.geom_file}\n"
+        cmd_str+=f"case {cases[0].case_file}\n"
+        cmd_str+="oper\no\nv\n\n"
+
+        for case in cases:
+            results_file=self.results_file(plane,case)
+
+            cmd_str+=f"a a {case.alpha}\nx\n"
+
+            if case.polars==True:
+                case.polars_results_file=f"{results_file}.polars"
+
+                cmd_str+="st\n"
+                cmd_str+=f"{case.polars_results_file if self.stdout==False else ''}\n"
+            if case.modes==True:
+                case.modes_results_file=f"{results_file}.eig"
+
+                cmd_str+="\nmode\nN\n"
+                if self.stdout==False:
+                    cmd_str+=f"W\n{case.modes_results_file}\n"
+                cmd_str+="\noper\n"
+
+        return self.job(cmd_str,plane,cases,timeout=self.timeout*len(cases))
+
+    def results_file(self,plane,case):
+        """Results file path of a case, without extension."""
+        loading=f"-loading{case.loading}" if case.loading>0 else ""
+
+        return f"{self.scratch}/results/{plane.name}-{str(case.alpha)}deg{loading}"
+
+    def job(self,cmd_str,plane,cases,timeout=None):
+        """Wraps command string with the files it reads and writes."""
+        st_files=[]
+        eig_files=[]
+        if self.stdout==False:
+            st_files=[case.polars_results_file for case in cases if case.polars==True]
+            eig_files=[case.modes_results_file for case in cases if case.modes==True]
+
+        return Job(cmd_str,plane.geom_file,cases[0].case_file,st_files,eig_files,tag=cases,timeout=timeout)
+
+    def capture(self,cases,st,eig):
+        """
+        Hands ST and eigenvalue listings to their cases, in order. When reading stdout,
+        results files are only written if save_results is set.
+
+        Arguments:
+            cases {list[Case]} -- Cases run by the job, in the order they were run.
+            st {list[list[str]]} -- ST listings (see output.split).
+            eig {list[list[tuple]]} -- Eigenvalue listings.
+        """
+        st=list(st)
+        eig=list(eig)
+        save=self.stdout==True and self.save_results==True
+
+        for case in cases:
+            if case.polars==True and len(st)>0:
+                case.polars_output=st.pop(0)
+                if save==True:
+                    output.write_st(case.polars_results_file,case.polars_output)
+            if case.modes==True and len(eig)>0:
+                case.eigenvalues=eig.pop(0)
+                if save==True:
+                    output.write_eig(case.modes_results_file,case.eigenvalues)
 
         return None
 
-    def read_aero(self):
+    @PROFILER.timed("parse")
+    def read_aero(self,cases=None):
         """
         Reads aero polar results files.
 
+        Arguments:
+            cases {list[Case]} -- Cases to read. Defaults to self.cases.
+
         Returns:
             polars_df {pd.DataFrame} -- Dataframe with polar and stab. derivative data for each alpha.
         """
+        if cases is None:
+            cases=self.cases
+
         polars=[]
-        for case in self.cases:
-            with open(case.polars_results_file,'r') as file:
-                lines=file.readlines()
-
-                case.Cl=float(lines[23].split()[2])
-                case.Cd=float(lines[24].split()[2])
-                case.Clb=float(lines[38].split()[8])
-                case.Clp=float(lines[46].split()[5])
-                try:
-                    case.spiral=float(lines[52].split()[6])
-                except IndexError:
-                    Cnb=float(lines[40].split()[8])
-                    Clr=float(lines[46].split()[11])
-                    Cnr=float(lines[48].split()[11])
-
-                    try:
-                        case.spiral=(case.Clb*Cnr)/(Clr*Cnb)
-                    except ZeroDivisionError:
-                        case.spiral=np.NaN
-                
+        for case in cases:
+            lines=case.polars_output
+            if lines is None:
+                with open(case.polars_results_file,'r') as file:
+                    lines=file.readlines()
+
+            case.st=output.read_st(lines)
+            case.Cl=case.st.CLtot
+            case.Cd=case.st.CDtot
+            case.Clb=case.st.Clb
+            case.Clp=case.st.Clp
+            case.spiral=case.st.spiral
+
             polars.append((case.alpha,case.Cl,case.Cd,case.Clb,case.Clp,case.spiral))
 
         polars_df=pd.DataFrame(polars,columns=["Alpha (deg)","Cl","Cd","Clb","Clp","spiral"])
 
         return polars_df
 
-    def read_modes(self):
+    @PROFILER.timed("parse")
+    def read_loadings(self,plane):
+        """
+        Static margin and eigenmodes of an analysed plane at every loading (self.loadings).
+        Neutral points don't depend on the CG or mass, so the SM of every loading comes from
+        the one polar run per alpha. Eigenmodes do, each loading has its own.
+
+        Sets plane.Xnp (alpha), plane.loading_sm (loading, alpha) and plane.loading_modes
+        (loading, alpha, mode), each None if the analysis wasn't run.
+
+        Arguments:
+            plane {geometry.Plane} -- Analysed plane.
         """
-        Reads eigenmode results files.
+        plane.Xnp=None
+        plane.loading_sm=None
+        plane.loading_modes=None
+
+        if self.polars==True:
+            plane.Xnp=np.array([case.st.Xnp for case in plane.cases])
+            mac=plane.mac if plane.mac is not None else AVLFile.read(plane.geom_file).reference()[1]
+            Xcg=np.array([Xcg for Xcg,mass in self.loadings])
+            plane.loading_sm=(plane.Xnp[None,:]-Xcg[:,None])/mac
+
+        if self.modes==True:
+            modes=[plane.modes]+[self.read_modes(cases) for cases in plane.loading_cases[1:]]
+            n_modes=max(loading_modes.shape[1] for loading_modes in modes)
+            plane.loading_modes=np.stack([output.pad_modes(loading_modes,n_modes) for loading_modes in modes])
+
+        return None
+
+    def loading_table(self,plane):
+        """
+        Loadings results of an analysed plane as one row per loading and alpha.
+
+        Arguments:
+            plane {geometry.Plane} -- Plane analysed by this Aero.
 
         Returns:
-            modes_df {pd.DataFrame} -- Dataframe with eigenmode data for each alpha.
+            loadings_df {pd.DataFrame} -- Loading, CG, mass, alpha, neutral point, SM and (with eigenmodes) dutch roll and roll damping.
+        """
+        n_alphas=len(plane.alphas)
+        table={
+            "Loading":np.repeat(np.arange(len(self.loadings)),n_alphas),
+            "Xcg (Lunit)":np.repeat([Xcg for Xcg,mass in self.loadings],n_alphas),
+            "Mass (kg)":np.repeat([mass for Xcg,mass in self.loadings],n_alphas),
+            "Alpha (deg)":np.tile(plane.alphas,len(self.loadings)),
+        }
+        if plane.loading_sm is not None:
+            table["Xnp (Lunit)"]=np.tile(plane.Xnp,len(self.loadings))
+            table["SM"]=plane.loading_sm.ravel()
+        if plane.loading_modes is not None:
+            modes=output.pad_modes(plane.loading_modes.reshape(-1,plane.loading_modes.shape[-1]),max(DUTCH,ROLL)+1)
+            table["Dutch roll"]=modes[:,DUTCH].real
+            table["Roll"]=modes[:,ROLL].real
+
+        return pd.DataFrame(table)
+
+    @PROFILER.timed("parse")
+    def read_modes(self,cases=None):
         """
-        modes=[]
-        for case in self.cases:
-            with open(case.modes_results_file,'r') as file:
-                lines=file.readlines()
+        Reads eigenmode results.
 
-                #   AVL doesn't label which are which in results file and sometimes doesn't
-                #   write them which is very annoying. Dutch roll and roll subsidence are the
-                #   important ones and are consistently in the expected place in the file so
-                #   everything else gets commented out ¯\_(ツ)_/¯
-                try:
-                    case.dutch=tuple(map(float,lines[3].split()[1:]))
-                    #case.ndutch=tuple(map(float,lines[4].split()[1:]))
-                    case.roll=tuple(map(float,lines[5].split()[1:]))
-                    #case.short=tuple(map(float,lines[6].split()[1:]))
-                    #case.nshort=tuple(map(float,lines[7].split()[1:]))
-                    #case.lateral=tuple(map(float,lines[8].split()[1:]))
-                    #case.phugoid=tuple(map(float,lines[9].split()[1:]))
-                    #case.nphugoid=tuple(map(float,lines[10].split()[1:]))
-                except IndexError as e:
-                    print(f"Eigenmode analysis/read failed: Case {case.modes_results_file}")
-                    print(f"\n{e}")
-                    exit()
+        Arguments:
+            cases {list[Case]} -- Cases to read. Defaults to self.cases.
 
-            modes.append((
-                case.alpha,
-                case.dutch,
-                #case.ndutch,
-                case.roll
-                #case.short,
-                #case.nshort,
-                #case.lateral,
-                #case.phugoid,
-                #case.nphugoid
-                ))
-            
-        modes_df=pd.DataFrame(modes,columns=[
-            "alpha",
-            "dutch",
-            #"-dutch",
-            "roll"
-            #"short",
-            #"-short",
-            #"lateral",
-            #"phugoid",
-            #"-phugoid"
-            ])
-
-        return modes_df
+        Returns:
+            modes {np.ndarray} -- Complex eigenvalues shaped (case, mode). Missing modes are NaN.
+        """
+        if cases is None:
+            cases=self.cases
+
+        listings=[]
+        for case in cases:
+            if case.eigenvalues is None:
+                try:
+                    case.eigenvalues=output.read_eig_file(case.modes_results_file)
+                except (OSError,TypeError):
+                    print(f"\u001b[33m[Warning]\u001b[0m Eigenmode analysis/read failed: Case {case.modes_results_file}")
+                    case.eigenvalues=[]
+            listings.append(case.eigenvalues)
+
+        modes=output.eig_array(listings)
+
+        #   AVL doesn't label which are which in results file and sometimes doesn't
+        #   write them which is very annoying. Dutch roll and roll subsidence are the
+        #   important ones and are consistently in the expected place in the file.
+        for case,case_modes in zip(cases,output.pad_modes(modes,max(DUTCH,ROLL)+1)):
+            case.dutch=case_modes[DUTCH]
+            case.roll=case_modes[ROLL]
+
+        return modes
 
 if __name__=="__main__":
     plane=Plane(geom_file='example_plane.avl')
@@ -5,69 +5,102 @@ from .aero import Aero
 from .geometry import Plane
 from .dihedral import Dihedral
 from .tail import AutoTail
+from .profiler import PROFILER
+from .cluster import Worker
 
-parser=argparse.ArgumentParser(description="AVL Automation.")
+#   Guarded so process pools (scheduler: async) can re-import this module on Windows.
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description="AVL Automation.")
 
-parser.add_argument('run_type',choices=['aero','tail','dihedral'],help='Type of analysis to run.')
-parser.add_argument('-p','--plane',action='store',help="Plane .avl file for aero analysis.")
-parser.add_argument('-c','--config',nargs='+',action='store',help="Config file for analysis.")
+    parser.add_argument('run_type',choices=['aero','tail','dihedral','worker'],help='Type of analysis to run.')
+    parser.add_argument('-p','--plane',action='store',help="Plane .avl file for aero analysis.")
+    parser.add_argument('-c','--config',nargs='+',action='store',help="Config file for analysis.")
+    parser.add_argument('-r','--resume',action='store_true',help="Skip AVL jobs an interrupted run already finished.")
+    parser.add_argument('-a','--address',action='store',help="Worker: coordinator address, host:port or unix:/path (the cluster: option of the study).")
+    parser.add_argument('-w','--workers',type=int,default=os.cpu_count(),help="Worker: number of AVL sessions (default every core).")
+    parser.add_argument('--avl',action='store',default='.',help="Worker: folder containing avl.exe (default current folder).")
+    parser.add_argument('--key',action='store',default=os.environ.get("AVL_CLUSTER_KEY"),help="Worker: shared key (cluster_key: option of the study), needed unless the coordinator is local.")
+    parser.add_argument('--profile',nargs='?',const='profile.json',metavar='TRACE',help="Print time spent per phase and write a Chrome trace (default profile.json).")
 
-args=parser.parse_args()
+    args=parser.parse_args()
 
-if args.run_type=='aero':
-    if args.plane is None:
-        parser.error("Aero requires --plane.")
+    if args.profile is not None:
+        PROFILER.enable()
 
-    if args.config is None:
-        parser.error("Aero requires --config.")
+    if args.run_type=='aero':
+        if args.plane is None:
+            parser.error("Aero requires --plane.")
 
-    if len(args.config)>1:
-        parser.error("Aero requires only 1 config file.")
+        if args.config is None:
+            parser.error("Aero requires --config.")
 
-    if os.path.exists(args.config[0])==False:
-        print(f"\u001b[31m[Error]\u001b[0m {args.config[0]} not found.")
-        exit()
+        if len(args.config)>1:
+            parser.error("Aero requires only 1 config file.")
 
-    plane=Plane(geom_file=args.plane)
+        if os.path.exists(args.config[0])==False:
+            print(f"\u001b[31m[Error]\u001b[0m {args.config[0]} not found.")
+            exit()
+
+        plane=Plane(geom_file=args.plane)
 
-    aero=Aero(args.config[0])
-    aero.run(plane)
+        aero=Aero(args.config[0],args.resume)
+        aero.run(plane)
 
-    if aero.polars==True:
-        print('\nPolars:\n',plane.polars)
-    if aero.modes==True:
-        print('\nEigenmodes:\n',plane.modes,'\n')
+        if aero.polars==True:
+            print('\nPolars:\n',plane.polars)
+        if aero.modes==True:
+            print('\nEigenmodes:\n',plane.modes,'\n')
+        if len(aero.loadings)>1:
+            print('\nLoadings:\n',aero.loading_table(plane),'\n')
+        if aero.alpha_sampling=="adaptive":
+            print('\nEvents:\n',plane.events,'\n')
 
-if args.run_type=='tail':
-    if args.config is None:
-        parser.error("Tail requires --config.")
+    if args.run_type=='tail':
+        if args.config is None:
+            parser.error("Tail requires --config.")
         
-    if len(args.config)>1:
-        parser.error("Tail requires only 1 config file.")
+        if len(args.config)>1:
+            parser.error("Tail requires only 1 config file.")
 
-    if os.path.exists(args.config[0])==False:
-        print(f"\u001b[31m[Error]\u001b[0m {args.config[0]} not found.")
-        exit()
+        if os.path.exists(args.config[0])==False:
+            print(f"\u001b[31m[Error]\u001b[0m {args.config[0]} not found.")
+            exit()
     
-    tail=AutoTail(args.config[0])
-    tail.generate_planes()
-    tail.run()
-    tail.results()
-
-if args.run_type=='dihedral':
-    if args.config is None:
-        parser.error("Dihedral requires --config.")
+        tail=AutoTail(args.config[0],args.resume)
+        tail.generate_planes()
+        tail.run()
+        if len(tail.loadings)>1:
+            print('\nLoadings:\n',tail.envelope())
+        if tail.trim_CL is not None:
+            print('\nTrim:\n',tail.trim())
+        tail.results()
+
+    if args.run_type=='dihedral':
+        if args.config is None:
+            parser.error("Dihedral requires --config.")
     
-    if len(args.config)!=2:
-        parser.error("Dihedral requires 2 config files: dihedral, aero.")
+        if len(args.config)!=2:
+            parser.error("Dihedral requires 2 config files: dihedral, aero.")
 
-    for config in args.config:
-        if os.path.exists(config)==False:
-            print(f"\u001b[31m[Error]\u001b[0m {config} not found.")
-            exit()
+        for config in args.config:
+            if os.path.exists(config)==False:
+                print(f"\u001b[31m[Error]\u001b[0m {config} not found.")
+                exit()
 
     
-    dihedral=Dihedral(args.config[0],args.config[1])
-    dihedral.generate_planes()
-    dihedral.run()
-    dihedral.plot()
\ No newline at end of file
+        dihedral=Dihedral(args.config[0],args.config[1],args.resume)
+        dihedral.generate_planes()
+        dihedral.run()
+        dihedral.plot()
+
+    if args.run_type=='worker':
+        if args.address is None:
+            parser.error("Worker requires --address.")
+
+        worker=Worker(args.address,args.avl,args.workers,args.key)
+        worker.run()
+
+    if args.profile is not None:
+        print("\nProfile:\n"+PROFILER.summary())
+        PROFILER.write_trace(args.profile)
+        print(f"[Info] Trace written to {args.profile} (open in chrome://tracing or ui.perfetto.dev).")
@@ -0,0 +1,284 @@
+"""
+AVL geometry (.avl) files as a tree of surfaces, sections, controls and bodies.
+
+Every node keeps the exact lines it was read from, so str(AVLFile.read(file)) is
+the original file byte for byte. Setting a typed value (section.Xle = 400) only
+rewrites that node's data line.
+"""
+
+#   Keywords are recognised by their first four letters, like AVL does.
+HEADER_KEYWORDS={"SURF":"SURFACE","BODY":"BODY"}
+#   Keywords followed by one data line.
+DATA_KEYWORDS={
+    "SECT":"SECTION","CONT":"CONTROL","AFIL":"AFILE","AIRF":"AIRFOIL","NACA":"NACA","BFIL":"BFILE",
+    "YDUP":"YDUPLICATE","SCAL":"SCALE","TRAN":"TRANSLATE","ANGL":"ANGLE","INDE":"INDEX",
+    "COMP":"COMPONENT","CLAF":"CLAF","CDCL":"CDCL","DESI":"DESIGN",
+}
+#   Keywords without data.
+FLAG_KEYWORDS={"NOWA":"NOWAKE","NOAL":"NOALBE","NOLO":"NOLOAD"}
+
+
+def is_comment(line:str)->bool:
+    stripped=line.strip()
+    return stripped=="" or stripped[0] in "#!"
+
+
+def keyword(line:str):
+    """Full keyword name of a keyword line, None for data lines."""
+    words=line.split()
+    if len(words)==0:
+        return None
+    key=words[0][:4].upper()
+    for keywords in (HEADER_KEYWORDS,DATA_KEYWORDS,FLAG_KEYWORDS):
+        if key in keywords:
+            return keywords[key]
+    return None
+
+
+def fields(line:str)->list:
+    """Values on a data line, without the trailing | or ! comment."""
+    for separator in ("|","!"):
+        line=line.split(separator,1)[0]
+    return line.split()
+
+
+class Node():
+    """Lines of one block of the file. Data lines are indexed by the keyword above them."""
+    def __init__(self):
+        self.lines=[]
+        self.data={}    #   keyword -> index in self.lines of its data line
+
+    def value(self,key:str)->list:
+        """Fields of a keyword's data line, None if the keyword isn't there."""
+        if key not in self.data:
+            return None
+        return fields(self.lines[self.data[key]])
+
+    def set_value(self,key:str,values:list)->None:
+        self.lines[self.data[key]]=" ".join(str(value) for value in values)+"\n"
+
+    def __str__(self):
+        return "".join(self.lines)
+
+
+class Control(Node):
+    """CONTROL: name gain Xhinge XYZhvec SgnDup"""
+    @property
+    def name(self)->str:
+        return self.value("CONTROL")[0]
+
+
+class Section(Node):
+    """SECTION: Xle Yle Zle Chord Ainc [Nspan Sspace], with its aerofoil and controls."""
+    FIELDS=("Xle","Yle","Zle","chord","ainc","nspan","sspace")
+
+    def __init__(self):
+        Node.__init__(self)
+        self.controls=[]
+
+    @classmethod
+    def new(cls,Xle,Yle,Zle,chord,ainc=0,nspan=None,sspace=None,aerofoil=None):
+        """Section written the same way as geometry.Section."""
+        section=cls()
+        values=[Xle,Yle,Zle,chord,ainc]+([nspan,sspace] if nspan is not None else [])
+        section.lines=[
+            "SECTION\n",
+            "#Xle Yle Zle Chord Ainc Nspan Sspace\n",
+            " ".join(str(value) for value in values)+"\n",
+        ]
+        section.data["SECTION"]=2
+        if aerofoil is not None:
+            section.lines+=["AFIL 0.0.1.0\n",f"{aerofoil}\n"]
+            section.data["AFILE"]=4
+
+        return section
+
+    @property
+    def fields(self)->list:
+        return self.value("SECTION")
+
+    @property
+    def aerofoil(self)->str:
+        if "AFILE" not in self.data:
+            return None
+        return self.lines[self.data["AFILE"]].strip()
+
+    def __str__(self):
+        return "".join(self.lines)+"".join(str(control) for control in self.controls)
+
+
+def _section_field(i:int)->property:
+    def get(self):
+        values=self.fields
+        return float(values[i]) if len(values)>i else None
+    def set(self,value):
+        values=self.fields
+        values[i]=value
+        self.set_value("SECTION",values)
+    return property(get,set)
+
+for _i,_field in enumerate(Section.FIELDS):
+    setattr(Section,_field,_section_field(_i))
+
+
+class Surface(Node):
+    """SURFACE block: name, Nchord Cspace line and keywords, then its sections."""
+    def __init__(self):
+        Node.__init__(self)
+        self.sections=[]
+        self.slot=False     #   Sections replaced by a template slot (see AVLFile.lines)
+
+    @property
+    def name(self)->str:
+        return self.lines[self.data["SURFACE"]].strip()
+
+    def __str__(self):
+        return "".join(self.lines)+"".join(str(section) for section in self.sections)
+
+
+class Body(Node):
+    """BODY block: name, Nbody Bspace line and keywords."""
+    @property
+    def name(self)->str:
+        return self.lines[self.data["BODY"]].strip()
+
+
+class AVLFile():
+    """
+    Parsed AVL geometry file.
+
+    header holds the lines before the first surface or body (title, Mach, symmetry,
+    reference dimensions...), items the surfaces and bodies in file order.
+    """
+    def __init__(self):
+        self.header=Node()
+        self.items=[]
+
+    @classmethod
+    def read(cls,file:str):
+        with open(file,'r') as f:
+            return cls.parse(f.readlines())
+
+    @classmethod
+    def parse(cls,lines):
+        """
+        Builds the tree in one pass over the lines.
+
+        Arguments:
+            lines {string or list[string]} -- File text or lines.
+        """
+        if isinstance(lines,str):
+            lines=lines.splitlines(True)
+
+        avl=cls()
+        header_data=0
+        node=avl.header     #   Node new lines are added to
+        pending=None        #   Keyword waiting for its data line
+        surface=None
+        section=None
+
+        for line in lines:
+            if is_comment(line)==True:
+                node.lines.append(line)
+                continue
+
+            if pending is not None or (node is avl.header and header_data==0):
+                key=None    #   Data lines (and the title) are never keywords.
+            else:
+                key=keyword(line)
+            if key=="SURFACE" or key=="BODY":
+                node=Surface() if key=="SURFACE" else Body()
+                avl.items.append(node)
+                surface=node if key=="SURFACE" else None
+                section=None
+                pending=key
+            elif key=="SECTION" and surface is not None:
+                section=Section()
+                surface.sections.append(section)
+                node=section
+                pending=key
+            elif key=="CONTROL" and section is not None:
+                node=Control()
+                section.controls.append(node)
+                pending=key
+            elif key in DATA_KEYWORDS.values():
+                pending=key
+            elif key is None and pending is not None:
+                node.data.setdefault(pending,len(node.lines))
+                pending=None
+            elif key is None and node is avl.header:
+                node.data.setdefault(header_data,len(node.lines))
+                header_data+=1
+
+            node.lines.append(line)
+
+        return avl
+
+    @property
+    def surfaces(self)->list:
+        return [item for item in self.items if isinstance(item,Surface)]
+
+    @property
+    def bodies(self)->list:
+        return [item for item in self.items if isinstance(item,Body)]
+
+    def surface(self,name:str)->Surface:
+        """Surface by name (case and spacing insensitive). Raises KeyError if missing."""
+        key=" ".join(name.split()).lower()
+        for surface in self.surfaces:
+            if " ".join(surface.name.split()).lower()==key:
+                return surface
+        raise KeyError(f"Surface '{name}' not found.")
+
+    def remove(self,name:str)->None:
+        """
+        Removes a surface by name. If none has that name, every surface whose first word
+        it is goes instead ("Fin" removes "Fin Left" and "Fin Right"). Raises KeyError if
+        nothing matches.
+        """
+        try:
+            self.items.remove(self.surface(name))
+            return None
+        except KeyError:
+            pass
+
+        key=name.strip().lower()
+        matches=[surface for surface in self.surfaces if surface.name.lower().split()[:1]==[key]]
+        if len(matches)==0:
+            raise KeyError(f"Surface '{name}' not found.")
+        for surface in matches:
+            self.items.remove(surface)
+
+        return None
+
+    def reference(self)->list:
+        """Sref, Cref, Bref."""
+        return [float(value) for value in self.header.value(3)[:3]]
+
+    def lines(self,marker:str="MARKER\n")->list:
+        """
+        File lines. Surfaces with slot set have their sections replaced by marker
+        (the slot geometry.Template fills).
+        """
+        lines=list(self.header.lines)
+        for item in self.items:
+            lines+=item.lines
+            if isinstance(item,Surface):
+                if item.slot==True:
+                    lines.append(marker)
+                    continue
+                for section in item.sections:
+                    lines+=section.lines
+                    for control in section.controls:
+                        lines+=control.lines
+
+        return lines
+
+    def __str__(self):
+        return "".join(self.lines())
+
+    def write(self,file:str)->None:
+        with open(file,'w') as f:
+            f.write(str(self))
+
+        return None
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import threading
+
+from .profiler import PROFILER
+from . import output
+
+#   Bump when the cached entry layout or the command strings change meaning.
+CACHE_VERSION="1"
+
+
+class ResultCache():
+    """
+    Persistent on-disk cache of AVL runs.
+
+    Entries are keyed by a hash of everything AVL reads for a job: geometry text,
+    aerofoil files referenced by the geometry, case file text and the command string
+    (with file paths swapped for placeholders so reruns with new names still hit).
+    Each entry holds AVL's stdout and the text of every results file the job wrote.
+    Least recently used entries are evicted once the cache grows past max_size.
+    """
+    def __init__(self,directory:str,max_size:float=500e6):
+        """
+        Arguments:
+            directory {string} -- Cache folder. Created if missing, never wiped.
+            max_size {float} -- Cache size limit (bytes).
+        """
+        self.directory=directory
+        self.max_size=max_size
+        self.hits=0
+        self.misses=0
+        self.lock=threading.Lock()
+
+        os.makedirs(self.directory,exist_ok=True)
+        self.size=sum(os.path.getsize(file) for file in self.entries())
+
+        return None
+
+    def entries(self)->list:
+        """Paths of every cache entry."""
+        files=[]
+        for root,dirs,names in os.walk(self.directory):
+            files+=[os.path.join(root,name) for name in names if name.endswith(".json")]
+
+        return files
+
+    @staticmethod
+    def _read_bytes(file:str,relative_to:str=None)->bytes:
+        """File contents, or its name if it can't be found (AVL will complain about it anyway)."""
+        candidates=[file]
+        if relative_to is not None:
+            candidates.append(os.path.join(relative_to,file))
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                with open(candidate,'rb') as f:
+                    return f.read()
+
+        return file.encode()
+
+    @PROFILER.timed("cache")
+    def key(self,cmd_str:str,geom_file:str,case_file:str=None,outputs:list=())->str:
+        """
+        Hashes an AVL job.
+
+        Arguments:
+            cmd_str {string} -- Command string submitted to AVL.
+            geom_file {string} -- Plane geometry file loaded by cmd_str.
+            case_file {string} -- Run case file loaded by cmd_str (optional).
+            outputs {list[string]} -- Results files written by cmd_str.
+
+        Returns:
+            key {string} -- Hex digest.
+        """
+        digest=hashlib.sha256(CACHE_VERSION.encode())
+
+        with open(geom_file,'rb') as f:
+            geom=f.read()
+        digest.update(geom)
+
+        #   Aerofoil file names are on the line after AFIL/AFILE.
+        lines=geom.decode(errors="replace").splitlines()
+        geom_dir=os.path.dirname(geom_file)
+        for i,line in enumerate(lines[:-1]):
+            words=line.split()
+            if len(words)>0 and words[0].upper() in ("AFIL","AFILE"):
+                digest.update(self._read_bytes(lines[i+1].strip(),geom_dir))
+
+        if case_file is not None:
+            digest.update(self._read_bytes(case_file))
+            cmd_str=cmd_str.replace(case_file,"<case>")
+
+        cmd_str=cmd_str.replace(geom_file,"<geometry>")
+        for i,output in enumerate(outputs):
+            cmd_str=cmd_str.replace(output,f"<output{i}>")
+        digest.update(cmd_str.encode())
+
+        return digest.hexdigest()
+
+    def _path(self,key:str)->str:
+        return os.path.join(self.directory,key[:2],f"{key}.json")
+
+    def get(self,key:str):
+        """
+        Looks up an entry and marks it as recently used.
+
+        Returns:
+            entry {dict} -- {"stdout": str, "outputs": list[str]} or None on a miss.
+        """
+        path=self._path(key)
+        try:
+            with open(path,'r') as f:
+                entry=json.load(f)
+            os.utime(path)
+        except (OSError,ValueError):
+            return None
+
+        return entry
+
+    def put(self,key:str,entry:dict)->None:
+        """Writes an entry, then evicts old entries if over the size limit."""
+        path=self._path(key)
+        os.makedirs(os.path.dirname(path),exist_ok=True)
+
+        temp=f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp,'w') as f:
+            json.dump(entry,f)
+        size=os.path.getsize(temp)
+        os.replace(temp,path)
+
+        with self.lock:
+            self.size+=size
+            if self.size>self.max_size:
+                self.evict()
+
+        return None
+
+    def evict(self)->None:
+        """Deletes least recently used entries until the cache is at 80% of max_size."""
+        files=[]
+        for file in self.entries():
+            try:
+                stat=os.stat(file)
+            except OSError:
+                continue
+            files.append((stat.st_mtime,stat.st_size,file))
+        files.sort()
+
+        self.size=sum(size for _,size,_ in files)
+        for _,size,file in files:
+            if self.size<=0.8*self.max_size:
+                break
+            try:
+                os.remove(file)
+            except OSError:
+                continue
+            self.size-=size
+
+        return None
+
+    @PROFILER.timed("cache")
+    def fetch(self,key:str,outputs:list=()):
+        """
+        Looks up a job. Hits write the cached results files to the requested paths.
+
+        Returns:
+            stdout {string} -- Cached AVL stdout, None on a miss.
+        """
+        entry=self.get(key)
+        if entry is None or len(entry["outputs"])!=len(outputs):
+            return None
+
+        for output,text in zip(outputs,entry["outputs"]):
+            with open(output,'w') as f:
+                f.write(text)
+        self.hits+=1
+
+        return entry["stdout"]
+
+    @PROFILER.timed("cache")
+    def store(self,key:str,stdout:str,outputs:list=())->None:
+        """
+        Caches a finished job. Failed runs aren't cached: jobs missing any of their results
+        files, or printing to stdout without a single listing (AVL rejected the input).
+        """
+        self.misses+=1
+        if len(outputs)==0 and output.has_listing(stdout)==False:
+            return None
+
+        texts=[]
+        for file in outputs:
+            if os.path.isfile(file)==False:
+                return None
+            with open(file,'r') as f:
+                texts.append(f.read())
+
+        self.put(key,{"stdout":stdout,"outputs":texts})
+
+        return None
+
+    def run(self,avl,cmd_str:str,geom_file:str,case_file:str=None,outputs:list=(),**kwargs)->str:
+        """
+        Runs an AVL job unless an identical one is cached. Cache hits write the
+        cached results files to the requested paths without starting AVL.
+
+        Arguments:
+            avl {callable} -- Runs cmd_str and returns AVL stdout (e.g. AVLPool.run). kwargs are passed on.
+            cmd_str {string} -- Command string to be submitted to AVL.
+            geom_file {string} -- Plane geometry file loaded by cmd_str.
+            case_file {string} -- Run case file loaded by cmd_str.
+            outputs {list[string]} -- Results files written by cmd_str.
+
+        Returns:
+            stdout {string} -- AVL stdout (cached or fresh).
+        """
+        key=self.key(cmd_str,geom_file,case_file,outputs)
+
+        stdout=self.fetch(key,outputs)
+        if stdout is not None:
+            return stdout
+
+        stdout=avl(cmd_str,**kwargs)
+        self.store(key,stdout,outputs)
+
+        return stdout
@@ -0,0 +1,488 @@
+import atexit
+import json
+import os
+import queue
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Listener, Client
+
+from .pool import AVLPool, AVLError
+from .profiler import PROFILER
+from . import output
+
+#   Shared secret workers prove they know before they're sent jobs (HMAC challenge).
+#   Only used for coordinators other machines can't reach.
+DEFAULT_KEY="avlautomation"
+
+
+def parse_address(address:str):
+    """
+    "host:port" -> (host, port) for TCP, "unix:/path" or a path -> Unix socket path.
+    The host defaults to 127.0.0.1, "0.0.0.0:port" listens on every interface.
+    """
+    if isinstance(address,tuple):
+        return address
+    if address.startswith("unix:"):
+        return address[5:]
+    if "/" in address or ":" not in address:
+        return address
+    host,_,port=address.rpartition(":")
+    return (host or "127.0.0.1",int(port))
+
+
+def is_local(address)->bool:
+    """Whether only this machine can connect to a parsed address."""
+    if isinstance(address,str):
+        return True     #   Unix socket.
+    return address[0]=="localhost" or address[0]=="::1" or address[0].startswith("127.")
+
+
+def _read_text(file:str,relative_to:str=None):
+    """File text, None if it can't be found."""
+    for candidate in (file,os.path.join(relative_to or "",file)):
+        if os.path.isfile(candidate):
+            with open(candidate,'r') as f:
+                return f.read()
+    return None
+
+
+def pack(job)->dict:
+    """
+    Job as a message another machine can run: file contents instead of paths.
+
+    Paths in the command string and geometry are swapped for placeholders (<geometry>,
+    <case>, <aerofoil0>..., <output0>...) the worker replaces with its own files, the
+    same way ResultCache keys jobs.
+
+    Arguments:
+        job {pool.Job} -- Job to send.
+
+    Returns:
+        message {dict} -- JSON serialisable job.
+    """
+    with open(job.geom_file,'r') as f:
+        lines=f.read().splitlines(True)
+
+    files={}
+    geom_dir=os.path.dirname(job.geom_file)
+    #   Aerofoil file names are on the line after AFIL/AFILE.
+    for i,line in enumerate(lines[:-1]):
+        words=line.split()
+        if len(words)>0 and words[0].upper() in ("AFIL","AFILE"):
+            text=_read_text(lines[i+1].strip(),geom_dir)
+            if text is None:
+                continue    #   Left as is, AVL will complain about it anyway.
+            name=f"<aerofoil{len(files)}>"
+            files[name]=text
+            lines[i+1]=name+"\n"
+    files["<geometry>"]="".join(lines)
+
+    cmd_str=job.cmd_str
+    if job.case_file is not None:
+        text=_read_text(job.case_file)
+        if text is not None:
+            files["<case>"]=text
+        cmd_str=cmd_str.replace(job.case_file,"<case>")
+    cmd_str=cmd_str.replace(job.geom_file,"<geometry>")
+    for i,file in enumerate(job.outputs):
+        cmd_str=cmd_str.replace(file,f"<output{i}>")
+
+    return {"type":"job","cmd_str":cmd_str,"files":files,"outputs":len(job.outputs),"timeout":job.timeout}
+
+
+def _send(connection,message:dict)->None:
+    connection.send_bytes(json.dumps(message).encode())
+
+def _recv(connection)->dict:
+    return json.loads(connection.recv_bytes().decode())
+
+
+class _Ticket():
+    """A job waiting for, or out on, a worker."""
+    __slots__=("job","message","cache","key","done","attempts")
+
+    def __init__(self,job,message,cache,key,done):
+        self.job=job
+        self.message=message
+        self.cache=cache
+        self.key=key
+        self.done=done
+        self.attempts=0
+
+
+class Coordinator():
+    """
+    Serves AVL jobs to workers on other machines (or other processes on this one).
+
+    Workers (see Worker) connect over TCP or a Unix socket, one connection per AVL
+    session, and are handed one job at a time with the files it reads. They send back
+    AVL's stdout and the results files, which are written to the job's own paths and
+    parsed here. A job out on a worker that disconnects, hangs or fails is put back in
+    the queue for another worker, up to retries times.
+
+    Workers can join or leave at any point. The coordinator keeps listening between
+    results() calls, so one study can run several batches on the same workers.
+    """
+    def __init__(self,address:str,key:str=None,timeout:float=60,retries:int=3,window:int=64):
+        """
+        Arguments:
+            address {string} -- host:port (host defaults to 127.0.0.1) or unix:/path.
+            key {string} -- Shared key workers must know. Required if other machines can connect,
+                            DEFAULT_KEY otherwise.
+            timeout {float} -- Seconds a worker gets per job (unless the job sets its own) before it's given up on.
+            retries {int} -- Times a job is resent after its worker fails.
+            window {int} -- Jobs pulled from the input iterable ahead of the results handed back.
+        """
+        self.address=parse_address(address)
+        if key is None:
+            if is_local(self.address)==False:
+                raise ValueError(f"Coordinator on {address} is reachable from other machines, set a cluster_key (or AVL_CLUSTER_KEY).")
+            key=DEFAULT_KEY
+        self.timeout=timeout
+        self.retries=retries
+        self.window=window
+        self.pending=queue.Queue()
+        self.workers=0
+        self.closed=False
+        self.lock=threading.Lock()
+
+        if isinstance(self.address,str) and os.path.exists(self.address):
+            os.remove(self.address)     #   Stale socket from an earlier run.
+        self.listener=Listener(self.address,authkey=key.encode())
+
+        thread=threading.Thread(target=self._accept,daemon=True)
+        thread.start()
+        atexit.register(self.close)
+
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def _accept(self)->None:
+        """Listener thread. Starts a thread per worker connection."""
+        while self.closed==False:
+            try:
+                connection=self.listener.accept()
+            except Exception:   #   Failed handshakes (wrong key) and closing the listener.
+                if self.closed==True:
+                    break
+                continue
+            threading.Thread(target=self._serve,args=(connection,),daemon=True).start()
+
+        return None
+
+    def _serve(self,connection)->None:
+        """Feeds one worker connection (one AVL session) a job at a time."""
+        try:
+            hello=_recv(connection)
+        except (EOFError,OSError,ValueError):
+            connection.close()
+            return None
+
+        with self.lock:
+            self.workers+=1
+        print(f"[Info] Worker connected: {hello.get('host','?')} ({self.workers} AVL sessions).")
+
+        ticket=None
+        try:
+            while True:
+                ticket=self.pending.get()
+                if ticket is None:
+                    break   #   Closing, the worker will look for the next coordinator.
+
+                _send(connection,ticket.message)
+                timeout=ticket.job.timeout or self.timeout
+                if connection.poll(timeout)==False:
+                    raise TimeoutError(f"worker took over {timeout}s")
+                reply=_recv(connection)
+
+                if reply["type"]=="error":
+                    self._retry(ticket,reply["message"])
+                elif isinstance(reply.get("outputs"),list)==False or len(reply["outputs"])!=len(ticket.job.outputs) \
+                        or None in reply["outputs"]:
+                    self._retry(ticket,"worker's AVL didn't write every results file")
+                else:
+                    self._finish(ticket,reply)
+                ticket=None
+        except (EOFError,OSError,ValueError,TimeoutError) as e:
+            if ticket is not None:
+                self._retry(ticket,f"worker lost ({str(e) or type(e).__name__})")
+        finally:
+            connection.close()
+            with self.lock:
+                self.workers-=1
+
+        return None
+
+    def _retry(self,ticket,reason:str)->None:
+        ticket.attempts+=1
+        if ticket.attempts>self.retries:
+            ticket.done.put(AVLError(f"AVL job failed on {ticket.attempts} workers: {reason}"))
+            return None
+
+        print(f"\u001b[33m[Warning]\u001b[0m AVL job re-queued: {reason}.")
+        self.pending.put(ticket)
+
+        return None
+
+    def _finish(self,ticket,reply:dict)->None:
+        """Writes the returned results files to the job's paths and parses them."""
+        job=ticket.job
+        try:
+            for file,text in zip(job.outputs,reply["outputs"]):
+                if text is not None:
+                    with open(file,'w') as f:
+                        f.write(text)
+            if ticket.key is not None:
+                ticket.cache.store(ticket.key,reply["stdout"],job.outputs)
+            parsed=output.parse(reply["stdout"],job.st_files,job.eig_files)
+        except Exception as e:
+            ticket.done.put(e)
+            return None
+
+        ticket.done.put((job,parsed))
+
+        return None
+
+    def results(self,jobs,cache=None):
+        """
+        Runs jobs on the connected workers, yielding each as soon as it's back and
+        parsed (same as Scheduler.results and AVLPool.results). Waits for workers if
+        none are connected.
+
+        Arguments:
+            jobs {iterable[pool.Job]} -- Jobs to run. Consumed lazily.
+            cache {cache.ResultCache} -- Optional result cache, checked here before a job is sent.
+
+        Yields:
+            (job, (st, eig)) {tuple} -- Job and its parsed listings (see output.parse).
+        """
+        done=queue.Queue()
+        jobs=iter(jobs)
+        waiting=0
+        exhausted=False
+
+        while True:
+            while exhausted==False and waiting<self.window:
+                try:
+                    job=next(jobs)
+                except StopIteration:
+                    exhausted=True
+                    break
+
+                key=None
+                if cache is not None:
+                    key=cache.key(job.cmd_str,job.geom_file,job.case_file,job.outputs)
+                    stdout=cache.fetch(key,job.outputs)
+                    if stdout is not None:
+                        done.put((job,output.parse(stdout,job.st_files,job.eig_files)))
+                        waiting+=1
+                        continue
+
+                with PROFILER.phase("pack"):
+                    message=pack(job)
+                self.pending.put(_Ticket(job,message,cache,key,done))
+                waiting+=1
+
+            if waiting==0:
+                break
+
+            try:
+                item=done.get(timeout=30)
+            except queue.Empty:
+                if self.workers==0:
+                    print(f"[Info] Waiting for workers on {self.address} ({waiting} jobs queued).")
+                continue
+            waiting-=1
+            if isinstance(item,BaseException):
+                raise item
+            yield item
+
+        return None
+
+    def close(self)->None:
+        """Stops listening and lets go of the workers (they wait for the next coordinator)."""
+        if self.closed==True:
+            return None
+        self.closed=True
+
+        with self.lock:
+            workers=self.workers
+        for _ in range(workers):
+            self.pending.put(None)
+        self.listener.close()
+        _coordinators.pop(self.address,None)
+        if isinstance(self.address,str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+        return None
+
+
+#   Open coordinators by address, so studies in one process share a listening socket.
+_coordinators={}
+
+def coordinator(address:str,key:str=None,timeout:float=60)->Coordinator:
+    """
+    Coordinator listening on address, started on first use and shared by every study
+    run in this process (workers stay connected between them).
+    """
+    address=parse_address(address)
+    if address not in _coordinators:
+        _coordinators[address]=Coordinator(address,key,timeout)
+    _coordinators[address].timeout=timeout
+
+    return _coordinators[address]
+
+
+class Worker():
+    """
+    Runs jobs from a Coordinator on this machine's AVL, one connection per AVL session.
+
+        py -m avlautomation.avlautomation worker -a coordinator-host:5000 -w 8
+
+    Keeps reconnecting (for up to wait seconds at a time) so it can be started before
+    the coordinator and serve one study after another. It stops once no coordinator
+    has been reachable for wait seconds.
+    """
+    def __init__(self,address:str,path:str,workers:int,key:str=None,wait:float=60):
+        """
+        Arguments:
+            address {string} -- Coordinator host:port or unix:/path.
+            path {string} -- Directory containing avl.exe.
+            workers {int} -- AVL sessions (connections to the coordinator).
+            key {string} -- Shared key. Required for coordinators on other machines, DEFAULT_KEY otherwise.
+            wait {float} -- Seconds to keep trying to reach the coordinator before giving up.
+        """
+        self.address=parse_address(address)
+        if key is None:
+            if is_local(self.address)==False:
+                raise ValueError(f"Coordinator {address} is on another machine, set its cluster_key (--key or AVL_CLUSTER_KEY).")
+            key=DEFAULT_KEY
+        self.path=os.path.abspath(path)
+        self.workers=max(1,int(workers))
+        self.key=key.encode()
+        self.wait=wait
+        self.jobs=0
+
+        if os.path.exists(f"{self.path}/avl.exe")==False:
+            print("\u001b[31m[Error]\u001b[0m avl.exe not found.")
+            exit()
+
+        return None
+
+    def run(self)->None:
+        """Serves jobs until every connection has given up on the coordinator."""
+        with AVLPool(self.path,self.workers) as self.avl_pool:
+            threads=[threading.Thread(target=self._connection,daemon=True) for _ in range(self.workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        print(f"[Info] Worker finished: {self.jobs} AVL jobs run.")
+
+        return None
+
+    def _connect(self):
+        deadline=time.monotonic()+self.wait
+        while True:
+            try:
+                return Client(self.address,authkey=self.key)
+            except (OSError,EOFError):
+                if time.monotonic()>deadline:
+                    return None
+                time.sleep(0.5)
+
+    def _connection(self)->None:
+        while True:
+            connection=self._connect()
+            if connection is None:
+                return None
+
+            try:
+                _send(connection,{"type":"hello","host":socket.gethostname()})
+                while True:
+                    _send(connection,self.execute(_recv(connection)))
+            except (EOFError,OSError):
+                pass    #   Coordinator gone: try again, it may be starting the next batch.
+            except Exception as e:
+                print(f"\u001b[33m[Warning]\u001b[0m Dropped coordinator connection: {type(e).__name__}: {e}")
+            finally:
+                connection.close()
+
+    @staticmethod
+    def _check(message)->None:
+        """Raises ValueError unless message is a job as made by pack."""
+        if isinstance(message,dict)==False or message.get("type")!="job":
+            raise ValueError("not a job")
+        files=message.get("files")
+        if isinstance(files,dict)==False or "<geometry>" not in files:
+            raise ValueError("no geometry file")
+        for name,text in files.items():
+            if name not in ("<geometry>","<case>") and re.fullmatch(r"<aerofoil\d+>",name) is None:
+                raise ValueError(f"unexpected file {name}")
+            if isinstance(text,str)==False:
+                raise ValueError(f"{name} isn't text")
+        if isinstance(message.get("cmd_str"),str)==False:
+            raise ValueError("no command string")
+        if isinstance(message.get("outputs"),int)==False or message["outputs"]<0:
+            raise ValueError("bad results file count")
+        if message.get("timeout") is not None and isinstance(message["timeout"],(int,float))==False:
+            raise ValueError("bad timeout")
+
+        return None
+
+    def execute(self,message:dict)->dict:
+        """
+        Runs a packed job (see pack) in a scratch folder. Malformed jobs and AVL or
+        file errors are sent back as {"type": "error"} replies.
+
+        Returns:
+            reply {dict} -- AVL stdout and the text of each results file (None if not written).
+        """
+        try:
+            self._check(message)
+        except ValueError as e:
+            return {"type":"error","message":f"bad job message ({e})"}
+
+        directory=tempfile.mkdtemp(prefix="avlworker-")
+        try:
+            paths={"<geometry>":f"{directory}/geometry.avl","<case>":f"{directory}/case.case"}
+            for name in message["files"]:
+                if name.startswith("<aerofoil"):
+                    paths[name]=f"{directory}/{name[1:-1]}.dat"
+            outputs=[f"{directory}/output{i}" for i in range(message["outputs"])]
+
+            geometry=message["files"]["<geometry>"]
+            for name,path in paths.items():
+                if name.startswith("<aerofoil"):
+                    geometry=geometry.replace(name,path)
+            for name,text in message["files"].items():
+                with open(paths[name],'w') as f:
+                    f.write(geometry if name=="<geometry>" else text)
+
+            cmd_str=message["cmd_str"]
+            for i,path in enumerate(outputs):
+                cmd_str=cmd_str.replace(f"<output{i}>",path)
+            cmd_str=cmd_str.replace("<geometry>",paths["<geometry>"]).replace("<case>",paths["<case>"])
+
+            stdout=self.avl_pool.run(cmd_str,message.get("timeout"))
+            self.jobs+=1
+
+            texts=[]
+            for path in outputs:
+                texts.append(_read_text(path))
+
+            return {"type":"result","stdout":stdout,"outputs":texts}
+        except (AVLError,OSError) as e:
+            return {"type":"error","message":str(e) or type(e).__name__}
+        finally:
+            shutil.rmtree(directory,ignore_errors=True)
@@ -0,0 +1,44 @@
+def read_options(lines:list)->dict:
+    """
+    Reads optional settings that follow the fixed config parameters.
+
+    Optional settings are looked up by name rather than position so they can be
+    left out or given in any order.
+
+    Arguments:
+        lines {list[string]} -- Config file lines after the fixed parameters (comments and blanks already removed).
+
+    Returns:
+        options {dict} -- Lower case setting name: first word of its value.
+    """
+    options={}
+    for line in lines:
+        key,_,value=line.partition(":")
+        value=value.split()
+        if len(value)==0:
+            continue
+        options[key.strip().lower()]=value[0]
+
+    return options
+
+
+def read_loadings(value:str,mass:float)->list:
+    """
+    Reads a loadings setting: comma separated Xcg/mass pairs, e.g. "400/9.5,430/10,460/11".
+    The mass can be left out ("400,430/11") to use the config file's.
+
+    Arguments:
+        value {string} -- Setting value.
+        mass {float} -- Mass of loadings that don't give one.
+
+    Returns:
+        loadings {list[tuple[float,float]]} -- (Xcg, mass) of each loading.
+    """
+    loadings=[]
+    for loading in value.split(","):
+        if loading.strip()=="":
+            continue
+        Xcg,_,loading_mass=loading.partition("/")
+        loadings.append((float(Xcg),float(loading_mass) if loading_mass!="" else mass))
+
+    return loadings
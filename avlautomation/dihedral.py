@@ -1,40 +1,33 @@
 from matplotlib import pyplot as plt
 import numpy as np
 import os
-import shutil
-from tqdm import tqdm
-import copy
 
-from .aero import Aero
+from .aero import Aero, DUTCH, ROLL
 from .geometry import Plane, Section
+from .config import read_options
+from .workspace import Workspace
+from .profiler import PROFILER
+from .sweep import Sweep, Parameter
+from .scheduler import default_workers
 
 
 class Dihedral():
-    def __init__(self, dihedral_config_file: str, aero_config_file: str):
+    def __init__(self, dihedral_config_file: str, aero_config_file: str, resume: bool = False):
 
-        #   Clean temp folders.
         self.path = os.path.split(dihedral_config_file)[0]
 
-        try:
-            if os.path.isdir(self.path+"/results") == True:
-                shutil.rmtree(self.path+"/results")
-            if os.path.isdir(self.path+"/generated planes") == True:
-                shutil.rmtree(self.path+"/generated planes")
-            if os.path.isdir(self.path+"/cases") == True:
-                shutil.rmtree(self.path+"/cases")
-        except PermissionError:
-            raise PermissionError("Close all results, geometry, case files")
-
-        os.mkdir(self.path+"/generated planes")
-        os.mkdir(self.path+"/results")
-        os.mkdir(self.path+"/cases")
-
         if os.path.exists(f"{self.path}/avl.exe") == False:
             print("\u001b[31m[Error]\u001b[0m avl.exe not found.")
             exit()
 
         self.read_config(dihedral_config_file)
+
+        #   Clean temp folders. Cases and results belong to Aero's workspace.
+        self.workspace = Workspace(self.path, ("generated planes",),
+                                   self.workspace_backend, self.keep_files)
+        self.scratch = self.workspace.root
         self.aero_config_file = aero_config_file
+        self.resume = resume
 
         return None
 
@@ -67,17 +60,26 @@ class Dihedral():
         self.angle_max = float(lines[5].split()[1])
         self.increment = int(lines[6].split()[1])
         self.span_loc = float(lines[7].split()[1])
-        self.threads = float(lines[8].split()[1])
+        self.threads = lines[8].split()[1]
         self.show_geom_plt = str_to_bool(lines[9].split(": ")[1][0])
 
+        #   "auto" uses every available core.
+        self.threads = default_workers() if self.threads == "auto" else int(self.threads)
+
+        options = read_options(lines[10:])
+        self.workspace_backend = options.get("workspace", "local")
+        self.keep_files = options.get("keep_files", "N")
+
         return None
 
+    @PROFILER.timed("generate planes")
     def generate_planes(self):
         """
-        Generates tail configurations, saves as AVL readable plane files.
+        Sets up the dihedral sweep. Plane files are written by make_planes while
+        AVL runs (see run).
 
         Returns:
-            planes {list[Plane]} -- List of plane objects with modified geometry.
+            sweep {sweep.Sweep} -- Dihedral angle x split location sweep.
         """
         #   Generate reference plane goemetry. Strips wing section to be modified and removes fin.
         self.ref_plane = Plane(name="REF")
@@ -85,6 +87,31 @@ class Dihedral():
         self.ref_plane.strip_section("Main Wing")
         self.ref_plane.strip_surface("Fin")
 
+        # Compiled once, each plane is then one write
+        self.template = self.ref_plane.template()
+
+        theta_range = np.linspace(  # Dihedral angle range.
+            self.angle_min,
+            self.angle_max,
+            int(1+(self.angle_max-self.angle_min)/self.increment)
+        )
+        self.count = 0
+        self.sweep = Sweep([Parameter("dihedral_angle", theta_range),
+                            Parameter("span_loc", [self.span_loc])], self.make_planes)
+
+        return self.sweep
+
+    def make_planes(self, dihedral_angle, span_loc):
+        """
+        Sweep mutator. Writes a plane file per dihedral angle & split location.
+
+        Arguments:
+            dihedral_angle {np.ndarray} -- Dihedral angles (deg).
+            span_loc {np.ndarray} -- Dihedral split locations (% of semi span).
+
+        Returns:
+            planes {list[Plane]} -- Generated planes.
+        """
         planes = []
 
         mac = self.ref_plane.mac
@@ -92,27 +119,18 @@ class Dihedral():
         # Half span (AVL wings are defined from centreline to outboard.)
         hspan = span/2
 
-        count = 0
-        theta_range = np.linspace(  # Dihedral angle range.
-            self.angle_min,
-            self.angle_max,
-            int(1+(self.angle_max-self.angle_min)/self.increment)
-        )
-        for theta in theta_range:
-            name = str(count)
+        for theta, loc in zip(dihedral_angle, span_loc):
+            name = str(self.count)
 
             plane = Plane(name=name)
             plane.dihedral_angle = theta
-            plane.dihedral_split = self.span_loc
+            plane.dihedral_split = loc
 
             # Location to split wing for dihedral start.
-            split_loc = hspan*self.span_loc/100
+            split_loc = hspan*loc/100
             plane.dihedral_splitY = split_loc
             plane.span = span
 
-            # Copy required because reasons.
-            mod_geom = copy.copy(self.ref_plane.file_str)
-
             # Calculates tip Z due to dihedral angle
             Zle = round((hspan-split_loc)*np.sin(np.radians(theta)), 3)
             plane.tipZ = Zle
@@ -134,39 +152,56 @@ class Dihedral():
             mod_str += str(split)
             mod_str += str(tip)
 
-            for index, line in enumerate(mod_geom):
-                if line == "MARKER\n":  # Finds marker
-                    mod_geom.pop(index)  # Removes marker
-                    # Inserts modified sections
-                    mod_geom.insert(index, mod_str)
-
             #   Writes plane file.
-            file_name = name = f"{plane.name}-{theta}deg-{self.span_loc}%"
-            plane.geom_file = f"{self.path}/generated planes/{file_name}.avl"
-            with open(plane.geom_file, 'w') as file:
-                file.write("".join(mod_geom))
-            count += 1
+            file_name = f"{plane.name}-{theta}deg-{loc}%"
+            plane.geom_file = f"{self.scratch}/generated planes/{file_name}.avl"
+            self.template.write(plane.geom_file, mod_str)
+            self.count += 1
 
             planes.append(plane)
 
-        self.planes = planes
-
         return planes
 
     def run(self):
         """
         Runs aero analysis.
         """
-        aero = Aero(self.aero_config_file)  # initialises aero analysis, reads config file.
+        aero = Aero(self.aero_config_file, self.resume)  # initialises aero analysis, reads config file.
         if aero.polars == False:
             raise ValueError("Polars must be enabled for dihedral analysis.")
+        if aero.alpha_sampling == "adaptive":
+            print("\u001b[33m[Warning]\u001b[0m alpha_sampling: adaptive only applies to aero runs, dihedral planes use alpha0 to alpha1 every increment.")
+        #   threads: in the dihedral config sizes the pool the planes share.
+        aero.threads = self.threads
 
-        #   Can't do multithreaded analysis without some thinking and extra code :(
-        for plane in tqdm(self.planes, desc="Aero analysis"):
-            aero.run(plane)
+        #   Planes are made as the pool has room for them. Each plane gets its own cases
+        #   so every (plane, alpha) job shares one pool.
+        self.results = self.sweep.stream(aero.stream_planes, self.measure)
 
         return None
 
+    def measure(self, plane):
+        """
+        Results of an analysed plane kept in the sweep results: polars and mode
+        damping (one value per alpha) and the wing tip position for the geometry plot.
+
+        Arguments:
+            plane {Plane} -- Analysed plane.
+
+        Returns:
+            values {dict} -- Name: value or array over alpha.
+        """
+        values = {name: plane.polars[name].to_numpy() for name in ("Cl", "Cd", "Clb", "Clp", "spiral")}
+        values["alpha"] = plane.polars["Alpha (deg)"].to_numpy()
+        if plane.modes is not None:
+            values["roll"] = plane.modes[:, ROLL].real
+            values["dutch"] = plane.modes[:, DUTCH].real
+        values["splitY"] = plane.dihedral_splitY
+        values["tipY"] = plane.tipY
+        values["tipZ"] = plane.tipZ
+
+        return values
+
     def plot(self):
         """
         Main plot function. Handles polar and eigenmode plots in subplots.
@@ -196,27 +231,26 @@ class Dihedral():
         Returns:
             plt {matplotlib.pyplot}
         """
-        dihedral_angles = [plane.dihedral_angle for plane in self.planes]
+        dihedral_angles = self.results.coords["dihedral_angle"]
+        results = self.results.sel(span_loc=self.span_loc)
 
         #   Aero polar plot
-        Cl_0 = self.planes[0].polars['Cl'].iloc[-1]
-        Cd_0 = self.planes[0].polars['Cd'].iloc[-1]
-        Cl_delta = [100*(plane.polars['Cl'].iloc[-1]-Cl_0) /
-                    Cl_0 for plane in self.planes]
-        Cd_delta = [100*(plane.polars['Cd'].iloc[-1]-Cd_0) /
-                    Cd_0 for plane in self.planes]
+        Cl = results["Cl"][:, -1]
+        Cd = results["Cd"][:, -1]
+        Cl_delta = 100*(Cl-Cl[0])/Cl[0]
+        Cd_delta = 100*(Cd-Cd[0])/Cd[0]
 
         ax1.plot(dihedral_angles, Cl_delta, label="Lift ($C_{L}$)")
         ax1.plot(dihedral_angles, Cd_delta, label="Lift ($C_{D}$)")
 
         ax1.set_ylabel(
-            f"\u0394 (%) @ {self.planes[0].polars['Alpha (deg)'].iloc[-1]}\u00B0 AoA")
+            f"\u0394 (%) @ {results['alpha'][0, -1]}\u00B0 AoA")
         ax1.legend(loc='upper left')
         ax1.set_title("Aero Coeffients")
 
         #   Stability derivative plot.
-        Clb = [plane.polars['Clb'].iloc[0] for plane in self.planes]
-        Clp = [plane.polars['Clp'].iloc[0] for plane in self.planes]
+        Clb = results["Clb"][:, 0]
+        Clp = results["Clp"][:, 0]
 
         ax2.plot(dihedral_angles, Clb, label="Dihedral ($Cl_{b}$)")
         ax2.plot(dihedral_angles, Clp, label="Roll Rate ($Cl_{p}$)")
@@ -225,14 +259,14 @@ class Dihedral():
         ax2.set_title("Stability Derivatives")
         ax2.set_ylabel("Dervative [NA]")
         ax2.set_xlabel(
-            f"Dihedral Angle (\u00B0) - Split Location={self.planes[0].dihedral_split}% of Span")
+            f"Dihedral Angle (\u00B0) - Split Location={self.span_loc}% of Span")
 
         #   Spiral stability plot
-        spiral = [plane.polars['spiral'].iloc[1] for plane in self.planes]
+        spiral = results["spiral"][:, 1]
 
         ax3.plot(dihedral_angles, spiral)
         ax3.set_title("Spiral Stability (>1 = stable)")
-        # ax3.set_xlabel(f"Dihedral Angle (\u00B0) - Split Location={self.planes[0].dihedral_split}% of Span")
+        # ax3.set_xlabel(f"Dihedral Angle (\u00B0) - Split Location={self.span_loc}% of Span")
         ax3.set_ylabel("Clb.Cnr / Clr.Cnb [NA]")
 
         return plt
@@ -247,17 +281,16 @@ class Dihedral():
         Returns:
             plt {matplotlib.pyplot}
         """
-        dihedral_angles = [plane.dihedral_angle for plane in self.planes]
+        dihedral_angles = self.results.coords["dihedral_angle"]
+        results = self.results.sel(span_loc=self.span_loc)
 
-        roll_0 = self.planes[0].modes["roll"][0][0]
-        dutch_0 = self.planes[0].modes["dutch"][0][0]
-        roll_delta = [100*(plane.modes["roll"][0][0]-roll_0) /
-                      roll_0 for plane in self.planes]
-        dutch_delta = [100*(plane.modes["dutch"][0][0] -
-                            dutch_0)/dutch_0 for plane in self.planes]
+        roll = results["roll"][:, 0]
+        dutch = results["dutch"][:, 0]
+        roll_delta = 100*(roll-roll[0])/roll[0]
+        dutch_delta = 100*(dutch-dutch[0])/dutch[0]
 
         ax4.set_xlabel(
-            f"Dihedral Angle (\u00B0) - Split Location={self.planes[0].dihedral_split}% of Span")
+            f"Dihedral Angle (\u00B0) - Split Location={self.span_loc}% of Span")
         ax4.set_ylabel("\u0394 Damping (%)")
         ax4.set_title("Eigenmode Damping")
 
@@ -279,12 +312,13 @@ class Dihedral():
 
         plt.xlabel("Y (mm)")
         plt.ylabel("Z (mm)")
-        plt.xlim(0, max([plane.tipY for plane in self.planes]))
-        plt.ylim(0, max([plane.tipY for plane in self.planes]))
+        results = self.results.sel(span_loc=self.span_loc)
+        plt.xlim(0, max(results["tipY"]))
+        plt.ylim(0, max(results["tipY"]))
 
-        for plane in self.planes:
-            plt.plot([0, plane.dihedral_splitY, plane.tipY],
-                     [0, 0, plane.tipZ])
+        for splitY, tipY, tipZ in zip(results["splitY"], results["tipY"], results["tipZ"]):
+            plt.plot([0, splitY, tipY],
+                     [0, 0, tipZ])
 
         return plt
 
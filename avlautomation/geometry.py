@@ -1,3 +1,11 @@
+import threading
+import numpy as np
+
+from . import output
+from . import avlfile
+from .avlfile import AVLFile
+
+
 class KeyErrorMessage(str):
     def __repr__(self): return str(self)
 
@@ -8,6 +16,8 @@ class Plane():
         self.name=name
         self.geom_file=geom_file
         self.results_file=None
+        self.results=None   #   ST listing lines captured from AVL stdout.
+        self.st=None        #   Parsed ST listing (output.read_st).
         self.Xcg=None
         self.np=None
         self.sm=None
@@ -30,6 +40,11 @@ class Plane():
         self.cases=None
         self.polars=None
         self.modes=None
+        self.Xnp=None           #   Neutral point at each alpha (aero)
+        self.loading_cases=None #   Cases of each loading (aero)
+        self.loading_sm=None    #   SM at each loading and alpha (aero)
+        self.loading_modes=None #   Eigenmodes at each loading and alpha (aero)
+        self.events=None        #   Alpha of each event found by an adaptive alpha sweep (aero)
         self.tail_config=None
         self.b_w=None
         self.b_th=None
@@ -38,6 +53,8 @@ class Plane():
         self.theta=None
         self.Xw_root=None
         self.Cw_root=None
+        self.geometry=None
+        self.sweep_values=None  #   Parameter values if made by a sweep.GeometryMutator
 
         if self.name==None:
             self.name="plane"
@@ -57,57 +74,34 @@ class Plane():
 
         Returns:
         -------
-        file_str: list; A list of lines in the plane file.
+        None - geometry is parsed into self.geometry (avlfile.AVLFile).
         """
-        file_str=list()
-        with open(file,'r') as f:
-            lines=f.readlines()
-
-        wing=False
-
-        for i,line in enumerate(lines):
-            if line=="\n" or line[0]=="#":  #   Ignores blank lines & comments
-                continue
-            else:
-                file_str.append(line)
+        self.geometry=AVLFile.read(file)
 
-            if line.strip()=="Main Wing":
-                wing=True
-            if line.split()[0]=="SECTION" and wing==True:
-                Xle=lines[i+1].split()[0]
-                wing=False
-
-        self.Xle=Xle
-
-        ref_dims=[n for n in file_str][3]
-        self.Sw=float(ref_dims.split()[0])
-        self.mac=float(ref_dims.split()[1])
-        self.b_w=float(ref_dims.split()[2])
+        self.Sw,self.mac,self.b_w=self.geometry.reference()
         self.ARw=self.b_w/self.mac
 
-        self.file_str=file_str
-
         ### Get wing LE x location
-        surface=False
-        section=False
-        found=False
-        for i,line in enumerate(self.file_str):
-            if line.strip()=="Main Wing":
-                found=True
-                surface=True
-            if line.split()[0]=="SECTION" and surface==True:
-                section=True
-                self.Xw_root=float(self.file_str[i+1].strip().split()[0])
-                self.Cw_root=float(self.file_str[i+1].strip().split()[3])
-
-                break
-
-        if found!=True:
+        try:
+            wing=self.geometry.surface("Main Wing")
+        except KeyError:
             msg=KeyErrorMessage("Wing surface not found. Wing should be defined by:\n\tSURFACE\n\tMain Wing\n\t...")
             raise KeyError(msg)
 
+        root=wing.sections[0]
+        self.Xle=root.fields[0]
+        self.Xw_root=root.Xle
+        self.Cw_root=root.chord
+
         return None
 
+    @property
+    def file_str(self)->list:
+        """Lines of the plane file without blank lines or comments. Stripped sections are MARKER lines."""
+        if self.geometry is None:
+            return None
+        return [line for line in self.geometry.lines() if line!="\n" and line[0]!="#"]
+
     def strip_section(self,section_name):   
         """
         Removes section by name.
@@ -120,29 +114,11 @@ class Plane():
         --------
         None - section is stripped inplace.
         """
-        stripped_str=[]
-
-        surface=False
-        section=False
-        found=False
-        for line in self.file_str:
-            if line.strip()==section_name:
-                found=True
-                surface=True
-            if line.split()[0]=="SECTION" and surface==True:
-                section=True
-            if section!=True:   #   Adds everything that isn't section 
-                stripped_str.append(line)
-            if line.split()[0]=="SURFACE" and surface==True:    #   Finds next surface
-                stripped_str.append("MARKER\n")    #   Adds marker for adding new sections
-                section=False
-                surface=False
-                stripped_str.append(line)  #   Adds the rest of the file
-        
-        self.file_str=stripped_str
-
-        if found==False:
-            stripped_str.append(f"""\nSURFACE
+        try:
+            surface=self.geometry.surface(section_name)
+        except KeyError:
+            surface=avlfile.Surface()
+            surface.lines=f"""SURFACE
 {section_name}
 13 1.0
 INDEX
@@ -152,10 +128,15 @@ YDUPLICATE
 SCALE
 1.0 1.0 1.0
 TRANSLATE
-0.0 0.0 0.0\n""")
-            stripped_str.append("MARKER\n")
+0.0 0.0 0.0\n""".splitlines(True)
+            surface.data["SURFACE"]=1
+            surface.slot=True
+            self.geometry.items.append(surface)
             raise KeyError(f"Section '{section_name}' not found.")
 
+        surface.sections=[]
+        surface.slot=True   #   Marker for adding new sections
+
         return None
 
     def strip_surface(self,surface_name):   
@@ -170,60 +151,277 @@ TRANSLATE
         --------
         None - surface is stripped inplace.
         """
-        stripped_str=[]
+        try:
+            self.geometry.remove(surface_name)
+        except KeyError:
+            raise KeyError(f"Surface '{surface_name}' not found.")
 
-        surface=False
-        found=False
-        for i,line in enumerate(self.file_str):
-            if line.split()[0]=="SURFACE":
-                if self.file_str[i+1].split()[0]==surface_name:
-                    found=True
-                    surface=True
-                if self.file_str[i+1].split()[0]!=surface_name:
-                    surface=False
+        return None
 
-            if surface==False:
-                stripped_str.append(line)
+    def template(self):
+        """
+        Compiles the (stripped) plane file into a Template.
 
-        self.file_str=stripped_str
+        Returns:
+        --------
+        template: Template; Plane file with a slot at each MARKER.
+        """
+        return Template(self.file_str)
 
-        if found==False:
-            raise KeyError(f"Surface '{surface_name}' not found.")
+    def read_results(self):
+        """
+        Stability analysis results. Uses the listing captured from AVL stdout
+        if there is one, otherwise reads results file.
 
-        return None
+        Returns:
+        lines: list; Lines of the ST listing.
+        """
+        if self.results is not None:
+            return self.results
+
+        with open(self.results_file,'r') as text:
+            return text.readlines()
     
     def calc_SM(self):
         """
-        Reads stability analysis results file and calculates SM based
+        Reads stability analysis results and calculates SM based
         on MAC, neutral point, and Xcg.
 
         Returns:
         sm: float; Static margin.
         """
-        with open(self.results_file,'r') as text:
-            lines=text.readlines()[50]
-
-        self.np=float(lines.split()[-1])
+        self.st=output.read_st(self.read_results())
+        self.np=float(self.st.Xnp)
         self.sm=(self.np-self.Xcg)/self.mac
 
         return self.sm
 
     def calc_Xcg_ideal(self):
         """
-        Reads stability analysis results file and calculates ideal Xcg
+        Reads stability analysis results and calculates ideal Xcg
         based on MAC, neutral point, and ideal SM.
 
         Returns:
         Xcg: float; Ideal CG location in X.
         """
-        with open(self.results_file,'r') as text:
-            lines=text.readlines()[50]
-
-        self.np=float(lines.split()[-1])
+        self.st=output.read_st(self.read_results())
+        self.np=float(self.st.Xnp)
         self.Xcg=self.np-(self.mac*self.sm_ideal)
 
         return self.Xcg
 
+def _column(name:str)->property:
+    """PlaneView attribute stored in a PlaneTable column."""
+    def get(self):
+        return self.table.columns[name][self.index]
+    def set(self,value):
+        #   Locked so a write can't land in a column append() is replacing.
+        with self.table.lock:
+            self.table.columns[name][self.index]=value
+    return property(get,set)
+
+def _constant(name:str)->property:
+    """PlaneView attribute shared by every plane in a PlaneTable."""
+    return property(lambda self:getattr(self.table,name))
+
+class PlaneTable():
+    """
+    Struct of arrays for large tail studies. Each generated configuration is a row,
+    each varying quantity a NumPy column (table.Lt, table.sm...), and quantities
+    every plane shares are stored once. Rows are accessed as PlaneView objects.
+    """
+    COLUMNS=("Xt","Lt","St_h","St_v","b_th","c_t","theta","Xcg","np","sm")
+    CONSTANTS=("Sw","mac","b_w","ARh","Ct_v","Xw_root","Cw_root","sm_ideal","tail_config")
+
+    def __init__(self,capacity:int=64,**constants):
+        """
+        Parameters:
+        ----------
+        capacity: int; Initial rows allocated (grows as needed).
+        constants: Values of CONSTANTS.
+        """
+        self.size=0
+        self.lock=threading.Lock()
+        self.columns={name:np.full(capacity,np.nan) for name in self.COLUMNS}
+        self.geom_files=[]
+
+        for name in self.CONSTANTS:
+            setattr(self,name,constants.get(name))
+
+        return None
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self,index:int):
+        if index<0:
+            index+=self.size
+        if index<0 or index>=self.size:
+            raise IndexError("PlaneTable index out of range.")
+        return PlaneView(self,index)
+
+    def __iter__(self):
+        return (PlaneView(self,i) for i in range(self.size))
+
+    def __getattr__(self,name:str)->np.ndarray:
+        #   Only called for names that aren't normal attributes, i.e. columns.
+        if name in PlaneTable.COLUMNS:
+            return self.__dict__["columns"][name][:self.size]
+        raise AttributeError(name)
+
+    def append(self,rows:int=1,geom_files:list=None,**columns)->list:
+        """
+        Adds rows.
+
+        Parameters:
+        ----------
+        rows: int; Number of rows.
+        geom_files: list; Plane file of each row.
+        columns: Column values (scalars or arrays of length rows). Others are NaN.
+
+        Returns:
+        --------
+        planes: list; PlaneView of each new row.
+        """
+        with self.lock:
+            start=self.size
+            if start+rows>len(self.columns["Xt"]):
+                capacity=max(2*len(self.columns["Xt"]),start+rows)
+                for name,column in self.columns.items():
+                    grown=np.full(capacity,np.nan)
+                    grown[:start]=column[:start]
+                    self.columns[name]=grown
+
+            for name,values in columns.items():
+                self.columns[name][start:start+rows]=values
+            self.geom_files+=list(geom_files) if geom_files is not None else [None]*rows
+            self.size+=rows
+
+        return [PlaneView(self,i) for i in range(start,start+rows)]
+
+    def static_margins(self,Xcg)->np.ndarray:
+        """
+        Static margin of every row at each CG location. Neutral points don't depend on
+        the CG, so any number of loadings come from the one AVL run per plane.
+
+        Parameters:
+        ----------
+        Xcg: np.ndarray; CG locations.
+
+        Returns:
+        --------
+        sm: np.ndarray; (len(Xcg), rows).
+        """
+        return (self.np[None,:]-np.asarray(Xcg,dtype=float)[:,None])/self.mac
+
+    def cg_limits(self,sm)->np.ndarray:
+        """
+        CG location giving each static margin for every row (e.g. aft and forward limits
+        for the smallest and largest acceptable SM).
+
+        Parameters:
+        ----------
+        sm: np.ndarray; Static margins.
+
+        Returns:
+        --------
+        Xcg: np.ndarray; (len(sm), rows).
+        """
+        return self.np[None,:]-np.asarray(sm,dtype=float)[:,None]*self.mac
+
+class PlaneView():
+    """
+    One row of a PlaneTable with the Plane attributes a tail study uses. Values are
+    read from and written to the table, so views are cheap and can be thrown away.
+    """
+    __slots__=("table","index","results_file","results","st")
+
+    Xt=_column("Xt")
+    Lt=_column("Lt")
+    St_h=_column("St_h")
+    St_v=_column("St_v")
+    b_th=_column("b_th")
+    c_t=_column("c_t")
+    theta=_column("theta")
+    Xcg=_column("Xcg")
+    np=_column("np")
+    sm=_column("sm")
+
+    Sw=_constant("Sw")
+    mac=_constant("mac")
+    b_w=_constant("b_w")
+    ARh=_constant("ARh")
+    Ct_v=_constant("Ct_v")
+    Xw_root=_constant("Xw_root")
+    Cw_root=_constant("Cw_root")
+    sm_ideal=_constant("sm_ideal")
+    tail_config=_constant("tail_config")
+
+    def __init__(self,table:PlaneTable,index:int):
+        self.table=table
+        self.index=index
+        self.results_file=None
+        self.results=None
+        self.st=None
+
+    @property
+    def name(self)->str:
+        return str(self.index)
+
+    @property
+    def geom_file(self)->str:
+        return self.table.geom_files[self.index]
+
+    @geom_file.setter
+    def geom_file(self,file:str):
+        self.table.geom_files[self.index]=file
+
+    #   Same calculations as Plane, they only use the attributes above.
+    read_results=Plane.read_results
+    calc_SM=Plane.calc_SM
+    calc_Xcg_ideal=Plane.calc_Xcg_ideal
+
+class Template():
+    """
+    Plane file compiled once for generating many variants. The lines between
+    markers are pre-joined so filling the slots is a single str.join.
+    """
+    def __init__(self,file_str:list,marker:str="MARKER\n"):
+        """
+        Parameters:
+        ----------
+        file_str: list; Lines of the plane file, with marker lines where sections go.
+        marker: str; Slot line.
+        """
+        chunks=[[]]
+        for line in file_str:
+            if line==marker:
+                chunks.append([])
+            else:
+                chunks[-1].append(line)
+
+        self.chunks=["".join(chunk) for chunk in chunks]
+        self.slots=len(self.chunks)-1
+
+        return None
+
+    def render(self,section_str:str)->str:
+        """
+        Fills every slot with the same section text (as the marker loop did).
+
+        Returns:
+        --------
+        geom: str; Plane file text.
+        """
+        return section_str.join(self.chunks)
+
+    def write(self,file:str,section_str:str)->None:
+        """Writes a variant plane file in one write."""
+        with open(file,'w') as f:
+            f.write(section_str.join(self.chunks))
+
+        return None
+
 class Surface():
     #Creates surface (eg wing type)
     def __init__(self,name,nchord,cspace,component,aerofoil,y_duplicate=None,angle=None):
@@ -252,7 +450,7 @@ class Surface():
         return surf_str
 
 class Section():
-    def __init__(self,Xle,Yle,Zle,chord,nspan,sspace,aerofoil):
+    def __init__(self,Xle,Yle,Zle,chord,nspan,sspace,aerofoil,control=None):
         self.Xle=Xle
         self.Yle=Yle
         self.Zle=Zle
@@ -260,13 +458,31 @@ class Section():
         self.nspan=nspan
         self.sspace=sspace
         self.aerofoil=aerofoil
+        self.control=control
 
     def __str__(self):
         section_str="SECTION\n#Xle Yle Zle Chord Ainc Nspan Sspace\n"
         section_str+=f"{self.Xle} {self.Yle} {self.Zle} {self.chord} {0} {self.nspan} {self.sspace}\n"
         section_str+=f"AFIL 0.0.1.0\n{self.aerofoil}\n"
+        if self.control is not None:
+            section_str+=str(self.control)
 
         return section_str
 
+class Control():
+    #Creates control surface on a section (eg elevator). Xhinge=0 deflects the whole section, i.e. incidence.
+    def __init__(self,name,gain=1.0,Xhinge=0.0,hinge_vector=(0,0,0),sgn_dup=1.0):
+        self.name=name
+        self.gain=gain
+        self.Xhinge=Xhinge
+        self.hinge_vector=hinge_vector
+        self.sgn_dup=sgn_dup
+
+    def __str__(self):
+        control_str="CONTROL\n#Cname Cgain Xhinge HingeVec SgnDup\n"
+        control_str+=f"{self.name} {self.gain} {self.Xhinge} {' '.join(str(x) for x in self.hinge_vector)} {self.sgn_dup}\n"
+
+        return control_str
+
 if __name__=="__main__":
     plane=Plane('aria3','Aria3.avl')
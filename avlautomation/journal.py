@@ -0,0 +1,101 @@
+import atexit
+import json
+import os
+
+from .cache import ResultCache
+
+
+class Journal(ResultCache):
+    """
+    Append-only record of the AVL jobs finished in a run, one JSON line per job.
+
+    Jobs are keyed the same way as ResultCache, so a journal can stand in for (or in
+    front of) the cache anywhere jobs are run. Each line is flushed as soon as the job
+    finishes; if the run is interrupted, resuming skips every journalled job and
+    replays its results instead. A half written last line (killed mid-write) is ignored.
+    """
+    def __init__(self,file:str,resume:bool=False,cache:ResultCache=None):
+        """
+        Arguments:
+            file {string} -- Journal file. Truncated unless resuming.
+            resume {bool} -- Load the jobs already in the journal.
+            cache {cache.ResultCache} -- Cache checked for jobs that aren't journalled (optional).
+        """
+        self.file=file
+        self.cache=cache
+        #   Only where each job's line starts is kept in memory, entries are read back on a hit.
+        self.offsets={}
+
+        offset=0
+        if resume==True and os.path.isfile(file)==True:
+            with open(file,'rb') as f:
+                for line in f:
+                    if line.endswith(b"\n")==False:
+                        break
+                    try:
+                        self.offsets[json.loads(line)["key"]]=offset
+                    except (ValueError,KeyError):
+                        pass
+                    offset+=len(line)
+            print(f"[Info] Resuming: {len(self.offsets)} finished AVL jobs in {file}.")
+
+        super().__init__(os.path.dirname(os.path.abspath(file)),float("inf"))
+
+        #   Anything after the last whole line was cut off mid-write, appends start from there.
+        self.stream=open(file,'r+b' if resume==True and os.path.isfile(file)==True else 'wb')
+        self.stream.truncate(offset)
+        self.stream.seek(offset)
+        atexit.register(self.close)
+
+        return None
+
+    def entries(self)->list:
+        """The journal is the only entry file (sizes it, nothing is ever evicted)."""
+        return [self.file] if os.path.isfile(self.file)==True else []
+
+    def get(self,key:str):
+        offset=self.offsets.get(key)
+        if offset is None:
+            return None
+
+        with open(self.file,'rb') as f:
+            f.seek(offset)
+            entry=json.loads(f.readline())
+        entry.pop("key")
+
+        return entry
+
+    def put(self,key:str,entry:dict)->None:
+        """Appends a finished job."""
+        line=(json.dumps({"key":key,**entry})+"\n").encode()
+        with self.lock:
+            self.offsets[key]=self.stream.tell()
+            self.stream.write(line)
+            self.stream.flush()
+
+        return None
+
+    def fetch(self,key:str,outputs:list=()):
+        """Journalled job, else cached job (which is then journalled), else None."""
+        stdout=ResultCache.fetch(self,key,outputs)
+        if stdout is None and self.cache is not None:
+            stdout=self.cache.fetch(key,outputs)
+            if stdout is not None:
+                ResultCache.store(self,key,stdout,outputs)
+                self.misses-=1  #   Not run, just copied from the cache.
+
+        return stdout
+
+    def store(self,key:str,stdout:str,outputs:list=())->None:
+        ResultCache.store(self,key,stdout,outputs)
+        if self.cache is not None:
+            self.cache.store(key,stdout,outputs)
+
+        return None
+
+    def close(self)->None:
+        """Closes the journal file. Also run at exit."""
+        self.stream.close()
+        atexit.unregister(self.close)
+
+        return None
@@ -0,0 +1,294 @@
+import re
+import numpy as np
+
+from .profiler import PROFILER
+
+#   First line of AVL's total forces listing. X prints it alone, ST follows it with the derivatives.
+ST_HEADER="Vortex Lattice Output -- Total Forces"
+ST_DERIVATIVES="Stability-axis derivatives"
+ST_END="Clb Cnr / Clr Cnb"
+
+#   Eigenvalue listing printed by MODE > N, e.g. "  mode 1:  -0.35123   2.80012"
+MODE_LINE=re.compile(r"mode\s+\d+\s*:\s*\(?\s*([-+0-9.EeDd]+)\s*,?\s*([-+0-9.EeDd]+)")
+
+#   Fields of a parsed ST listing. Labels AVL prints differently are renamed below.
+ST_FIELDS=(
+    "alpha","beta","mach",
+    "CXtot","CYtot","CZtot","Cltot","Cmtot","Cntot",
+    "CLtot","CDtot","CDvis","CDind","CLff","CDff","CYff","e",
+    "CLa","CLb","CYa","CYb","Cla","Clb","Cma","Cmb","Cna","Cnb",
+    "CLp","CLq","CLr","CYp","CYq","CYr","Clp","Clq","Clr","Cmp","Cmq","Cmr","Cnp","Cnq","Cnr",
+    "Xnp","spiral"
+)
+ST_DTYPE=np.dtype([(field,np.float64) for field in ST_FIELDS])
+ST_LABELS={"Alpha":"alpha","Beta":"beta","Mach":"mach"}
+_ST_INDEX={field:i for i,field in enumerate(ST_FIELDS)}
+for _label,_field in ST_LABELS.items():
+    _ST_INDEX[_label]=_ST_INDEX[_field]
+
+
+def scan(stream):
+    """
+    Splits AVL stdout into result blocks in a single pass.
+
+    Lines are consumed one at a time so this works on a live stream as well as a
+    captured string. Stability blocks are returned line for line as they'd appear in
+    an ST results file (the first line is the dashed rule above the header).
+
+    Arguments:
+        stream {string or iterable[string]} -- AVL stdout.
+
+    Yields:
+        ("st", lines) {tuple[str,list[str]]} -- Stability derivative listing.
+        ("eig", eigenvalues) {tuple[str,list[tuple[float,float]]]} -- (real, imag) of each mode.
+    """
+    if isinstance(stream,str):
+        stream=stream.splitlines(True)
+
+    block=None      #   Current listing, only kept if it turns out to have derivatives.
+    previous=""
+    eigenvalues=[]
+
+    for line in stream:
+        match=MODE_LINE.search(line)
+        if match is not None:
+            eigenvalues.append(tuple(float(x.upper().replace("D","E")) for x in match.groups()))
+            continue
+        if len(eigenvalues)>0:
+            yield "eig",eigenvalues
+            eigenvalues=[]
+
+        if ST_HEADER in line:
+            #   AVL versions without the spiral line end at the next listing.
+            if block is not None and _is_st(block):
+                yield "st",block
+            block=[" "+previous.rsplit(">",1)[-1].strip()+"\n",line]
+        elif block is not None:
+            block.append(line)
+            if ST_END in line:
+                if _is_st(block):
+                    yield "st",block
+                block=None
+        previous=line
+
+    if len(eigenvalues)>0:
+        yield "eig",eigenvalues
+    if block is not None and _is_st(block):
+        yield "st",block
+
+
+def _is_st(block:list)->bool:
+    return any(ST_DERIVATIVES in line for line in block)
+
+
+def has_listing(stdout:str)->bool:
+    """Whether AVL printed at least one stability or eigenvalue listing."""
+    return next(scan(stdout),None) is not None
+
+
+@PROFILER.timed("parse")
+def split(stream):
+    """
+    Collects every block from scan.
+
+    Returns:
+        st {list[list[str]]} -- Stability listings in output order.
+        eig {list[list[tuple[float,float]]]} -- Eigenvalue listings in output order.
+    """
+    blocks={"st":[],"eig":[]}
+    for kind,block in scan(stream):
+        blocks[kind].append(block)
+
+    return blocks["st"],blocks["eig"]
+
+
+@PROFILER.timed("parse")
+def parse(stdout:str,st_files=(),eig_files=()):
+    """
+    Job parser (top level so it can run in a process pool). Reads listings from the
+    results files if the job wrote any, otherwise from stdout.
+
+    Returns:
+        st {list[list[str]]} -- Stability listings in run order.
+        eig {list[list[tuple[float,float]]]} -- Eigenvalue listings in run order.
+    """
+    if len(st_files)==0 and len(eig_files)==0:
+        return split(stdout)
+
+    st=[]
+    for file in st_files:
+        with open(file,'r') as f:
+            st.append(f.readlines())
+    eig=[read_eig_file(file) for file in eig_files]
+
+    return st,eig
+
+
+def read_st(listing)->np.record:
+    """
+    Parses an ST listing by label in one pass over the text.
+
+    Values are found by their "name = value" label rather than by line number, so extra
+    control surface columns or a different AVL version don't shift them. Anything not
+    in the listing is NaN. If AVL didn't print the spiral parameter it's calculated
+    from Clb.Cnr/Clr.Cnb.
+
+    Arguments:
+        listing {string or list[string]} -- ST results file text or lines (e.g. from scan).
+
+    Returns:
+        record {np.record} -- Fields in ST_FIELDS.
+    """
+    if not isinstance(listing,str):
+        listing="".join(listing)
+
+    values=[np.nan]*len(ST_FIELDS)
+    found=[False]*len(ST_FIELDS)
+    spiral=_ST_INDEX["spiral"]
+
+    #   Each "=" joins the last word before it (label) to the first word after it (value).
+    parts=listing.split("=")
+    for left,right in zip(parts,parts[1:]):
+        left=left.rstrip()
+        label=left.rsplit(None,1)[-1] if left else ""
+        i=spiral if left.endswith(ST_END) else _ST_INDEX.get(label)
+        if i is None or found[i]==True:     #   First occurrence wins.
+            continue
+        value=right.split(None,1)
+        try:
+            values[i]=float(value[0].upper().replace("D","E"))
+        except (ValueError,IndexError):     #   AVL prints *** for overflowing values.
+            continue
+        found[i]=True
+
+    if found[spiral]==False:
+        Clb,Cnr,Clr,Cnb=(values[_ST_INDEX[x]] for x in ("Clb","Cnr","Clr","Cnb"))
+        denominator=Clr*Cnb
+        values[spiral]=(Clb*Cnr)/denominator if denominator!=0 else np.nan
+
+    return np.rec.array([tuple(values)],dtype=ST_DTYPE)[0]
+
+
+def read_control(listing,name:str)->float:
+    """
+    Deflection of a control surface from an ST listing (AVL prints "name = value"
+    under the run case's forces, e.g. after a trim constraint set it).
+
+    Arguments:
+        listing {string or list[string]} -- ST results file text or lines.
+        name {string} -- Control name as in the plane file.
+
+    Returns:
+        deflection {float} -- Degrees, NaN if the control isn't in the listing.
+    """
+    if not isinstance(listing,str):
+        listing="".join(listing)
+
+    match=re.search(rf"^\s*{re.escape(name)}\s*=\s*([-+0-9.EeDd]+)",listing,re.MULTILINE|re.IGNORECASE)
+    if match is None:
+        return np.nan
+
+    return float(match.group(1).upper().replace("D","E"))
+
+
+def read_st_files(files:list)->np.recarray:
+    """
+    Parses many ST results files.
+
+    Returns:
+        records {np.recarray} -- One row per file, fields in ST_FIELDS.
+    """
+    records=np.recarray(len(files),dtype=ST_DTYPE)
+    for i,file in enumerate(files):
+        with open(file,'r') as f:
+            records[i]=read_st(f.read())
+
+    return records
+
+
+def read_eig_file(file:str)->list:
+    """
+    Reads an eigenvalue file written by MODE > W.
+
+    Returns:
+        eigenvalues {list[tuple[float,float]]} -- (real, imag) of each mode, in file order.
+    """
+    eigenvalues=[]
+    with open(file,'r') as f:
+        for line in f:
+            if line.strip()=="" or line.lstrip()[0]=="#":
+                continue
+            eigenvalues.append(tuple(map(float,line.split()[1:3])))
+
+    return eigenvalues
+
+
+def eig_array(listings:list)->np.ndarray:
+    """
+    Stacks eigenvalue listings into one complex array.
+
+    Arguments:
+        listings {list[list[tuple[float,float]]]} -- (real, imag) of each mode for each case.
+
+    Returns:
+        modes {np.ndarray} -- Complex array shaped (case, mode), NaN padded where a case has fewer modes.
+    """
+    lengths=np.array([len(listing) for listing in listings],dtype=int)
+    n_modes=lengths.max() if len(lengths)>0 else 0
+
+    modes=np.full((len(listings),n_modes),complex(np.nan,np.nan))
+    if lengths.sum()==0:
+        return modes
+
+    values=np.array([value for listing in listings for value in listing],dtype=float).reshape(-1,2)
+    rows=np.repeat(np.arange(len(listings)),lengths)
+    columns=np.arange(len(values))-np.repeat(np.cumsum(lengths)-lengths,lengths)
+    modes[rows,columns]=values[:,0]+1j*values[:,1]
+
+    return modes
+
+
+def pad_modes(modes:np.ndarray,n_modes:int)->np.ndarray:
+    """Pads (case, mode) array with NaN up to at least n_modes columns."""
+    if modes.shape[1]>=n_modes:
+        return modes
+
+    padding=np.full((modes.shape[0],n_modes-modes.shape[1]),complex(np.nan,np.nan))
+
+    return np.hstack((modes,padding))
+
+
+def read_eig_files(files:list)->np.ndarray:
+    """
+    Reads many eigenvalue files. Missing or empty files give a row of NaN.
+
+    Returns:
+        modes {np.ndarray} -- Complex array shaped (file, mode).
+    """
+    listings=[]
+    for file in files:
+        try:
+            listings.append(read_eig_file(file))
+        except OSError:
+            listings.append([])
+
+    return eig_array(listings)
+
+
+def write_st(file:str,lines:list)->None:
+    with open(file,'w') as f:
+        f.write("".join(lines))
+
+    return None
+
+
+def write_eig(file:str,eigenvalues:list)->None:
+    """Writes eigenvalues in the same layout as MODE > W."""
+    eig_str="# AVL eigenvalues\n#\n#   run case   Re   Im\n"
+    for re_,im in eigenvalues:
+        eig_str+=f"   1   {re_:13.6E}  {im:13.6E}\n"
+
+    with open(file,'w') as f:
+        f.write(eig_str)
+
+    return None
@@ -0,0 +1,319 @@
+import subprocess as sp
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import itertools
+import threading
+import queue
+import time
+import os
+import re
+
+from .profiler import PROFILER
+from . import output
+
+
+#   Top level menu prompt, printed after the end of job marker.
+TOP_PROMPT=re.compile(r"AVL +c> *")
+
+
+class AVLError(RuntimeError):
+    """Raised when an AVL session dies, hangs or can't be synced."""
+    pass
+
+
+class Job():
+    """
+    One AVL run: the command string plus the files it reads and writes, so it
+    can be cached, parsed or run somewhere else.
+    """
+    def __init__(self,cmd_str:str,geom_file:str,case_file:str=None,st_files=(),eig_files=(),tag=None,timeout:float=None):
+        """
+        Arguments:
+            cmd_str {string} -- Command string to be submitted to AVL.
+            geom_file {string} -- Plane geometry file loaded by cmd_str.
+            case_file {string} -- Run case file loaded by cmd_str.
+            st_files {list[string]} -- ST results files written by cmd_str (empty if printed to stdout).
+            eig_files {list[string]} -- Eigenvalue files written by cmd_str (empty if printed to stdout).
+            tag {object} -- Whatever the caller needs to match the result back up (plane, cases...).
+            timeout {float} -- Job timeout override.
+        """
+        self.cmd_str=cmd_str
+        self.geom_file=geom_file
+        self.case_file=case_file
+        self.st_files=list(st_files)
+        self.eig_files=list(eig_files)
+        self.tag=tag
+        self.timeout=timeout
+
+    @property
+    def outputs(self)->list:
+        return self.st_files+self.eig_files
+
+
+class AVLSession():
+    """
+    Long-lived AVL process fed one command script after another over stdin/stdout.
+
+    After every job the session backs out to the top level menu and sends a short
+    unknown command. AVL answers with "<token> command not recognized", which marks
+    the end of the job's output and means AVL is ready for the next one.
+    """
+    _tokens=itertools.count()
+
+    def __init__(self,path:str,timeout:float=60):
+        """
+        Arguments:
+            path {string} -- Directory containing avl.exe.
+            timeout {float} -- Seconds to wait for a job to finish before giving up on the session.
+        """
+        self.path=path
+        self.timeout=timeout
+        self.jobs=0
+        self.process=None
+        self.output=queue.Queue()
+
+        self.start()
+
+        return None
+
+    @PROFILER.timed("start AVL")
+    def start(self)->None:
+        """Starts AVL and the thread that drains its stdout."""
+        self.process=sp.Popen(
+            [f"{self.path}/avl.exe"],
+            stdin=sp.PIPE,
+            stdout=sp.PIPE,
+            stderr=sp.STDOUT
+        )
+        self.output=queue.Queue()
+        self.buffer=""
+        self.jobs=0
+
+        reader=threading.Thread(target=self._read,args=(self.process.stdout,self.output),daemon=True)
+        reader.start()
+
+        return None
+
+    @staticmethod
+    def _read(stream,output:queue.Queue)->None:
+        """Reader thread. Pushes raw stdout chunks, then None on EOF."""
+        fd=stream.fileno()
+        while True:
+            try:
+                chunk=os.read(fd,65536)
+            except OSError:
+                chunk=b""
+            if not chunk:
+                output.put(None)
+                return
+            output.put(chunk.decode(errors="replace"))
+
+    def alive(self)->bool:
+        return self.process is not None and self.process.poll() is None
+
+    @PROFILER.timed("solve")
+    def run(self,cmd_str:str,timeout:float=None)->str:
+        """
+        Submits a command string and blocks until AVL is back at its top level prompt.
+
+        Arguments:
+            cmd_str {string} -- Command string to be submitted to AVL. Essentially key presses.
+            timeout {float} -- Overrides the session timeout for this job.
+
+        Returns:
+            output {string} -- Everything AVL printed while running the job.
+        """
+        if self.alive()==False:
+            raise AVLError("AVL session is not running.")
+
+        token=f"Z{next(AVLSession._tokens)%1000:03d}"
+        marker=f"{token} command not recognized"
+
+        #   Blank lines back out of any OPER/MODE sub-menu the job finished in.
+        script=cmd_str+"\n\n\n"+token+"\n"
+        try:
+            self.process.stdin.write(script.encode())
+            self.process.stdin.flush()
+        except (BrokenPipeError,OSError) as e:
+            raise AVLError(f"AVL session closed its input ({e}).")
+
+        if timeout is None:
+            timeout=self.timeout
+
+        deadline=time.monotonic()+timeout
+        match=self._read_until(re.compile(re.escape(marker)),deadline,timeout)
+        output=self.buffer[:match.start()]
+        self.buffer=self.buffer[match.end():]
+
+        #   Drop the rest of the error and the prompt after it, so the next job starts clean.
+        match=self._read_until(TOP_PROMPT,deadline,timeout)
+        self.buffer=self.buffer[match.end():]
+        self.jobs+=1
+
+        return output
+
+    def _read_until(self,pattern,deadline:float,timeout:float):
+        """Reads stdout into self.buffer until pattern turns up in it, returns the match."""
+        while True:
+            match=pattern.search(self.buffer)
+            if match is not None:
+                return match
+            remaining=deadline-time.monotonic()
+            if remaining<=0:
+                raise AVLError(f"AVL job timed out after {timeout}s.")
+            try:
+                chunk=self.output.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if chunk is None:
+                #   The reader thread is gone, leave the EOF for the next job in case AVL isn't reaped yet.
+                self.output.put(None)
+                raise AVLError("AVL exited during job.")
+            self.buffer+=chunk
+
+    def close(self)->None:
+        """Quits AVL, killing it if it doesn't exit."""
+        if self.process is None:
+            return None
+
+        if self.alive()==True:
+            try:
+                self.process.stdin.write(b"\n\n\nquit\n")
+                self.process.stdin.flush()
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError,sp.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self.process.stdout.close()
+        self.process=None
+
+        return None
+
+
+class AVLPool():
+    """
+    Fixed number of persistent AVL sessions shared between threads.
+
+    Sessions are started on first use, recycled after max_jobs jobs and
+    replaced whenever a job fails.
+    """
+    def __init__(self,path:str,workers:int,max_jobs:int=100,timeout:float=60,retries:int=1):
+        """
+        Arguments:
+            path {string} -- Directory containing avl.exe.
+            workers {int} -- Number of AVL sessions (threads: config key).
+            max_jobs {int} -- Jobs run by a session before it's restarted.
+            timeout {float} -- Seconds allowed per job.
+            retries {int} -- Times a job is resubmitted on a fresh session after an error.
+        """
+        self.path=path
+        self.workers=max(1,int(workers))
+        self.max_jobs=max_jobs
+        self.timeout=timeout
+        self.retries=retries
+
+        #   None slots are started lazily so a pool of 8 costs nothing for 1 job.
+        self.idle=queue.LifoQueue()
+        for _ in range(self.workers):
+            self.idle.put(None)
+
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def run(self,cmd_str:str,timeout:float=None)->str:
+        """
+        Runs command string on the next free session. Thread safe, blocks while all sessions are busy.
+
+        Arguments:
+            cmd_str {string} -- Command string to be submitted to AVL.
+            timeout {float} -- Overrides the pool timeout for this job (e.g. long sweeps).
+
+        Returns:
+            output {string} -- AVL stdout for the job.
+        """
+        session=self.idle.get()
+        try:
+            for attempt in range(self.retries+1):
+                if session is None:
+                    session=AVLSession(self.path,self.timeout)
+                try:
+                    output=session.run(cmd_str,timeout)
+                    break
+                except AVLError:
+                    session.close()
+                    session=None
+                    if attempt==self.retries:
+                        raise
+
+            if session.jobs>=self.max_jobs:
+                session.close()
+                session=None
+
+            return output
+        finally:
+            self.idle.put(session)
+
+    def results(self,jobs,cache=None,window:int=None):
+        """
+        Runs jobs, yielding each as soon as it has been run and parsed (same as
+        Scheduler.results). Jobs are pulled from the input iterable only as sessions
+        free up, so a generator making them on demand keeps running ahead of AVL by at
+        most window jobs.
+
+        Arguments:
+            jobs {iterable[Job]} -- Jobs to run. Consumed lazily.
+            cache {cache.ResultCache} -- Optional result cache.
+            window {int} -- Jobs submitted but not yet handed back. Defaults to 2*workers.
+
+        Yields:
+            (job, (st, eig)) {tuple} -- Job and its parsed listings (see output.parse).
+        """
+        def run(job):
+            if cache is None:
+                stdout=self.run(job.cmd_str,job.timeout)
+            else:
+                stdout=cache.run(self.run,job.cmd_str,job.geom_file,job.case_file,job.outputs,timeout=job.timeout)
+            return job,output.parse(stdout,job.st_files,job.eig_files)
+
+        window=window or 2*self.workers
+        jobs=iter(jobs)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            running=set()
+            for job in jobs:
+                if len(running)>=window:
+                    done,running=wait(running,return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                running.add(executor.submit(run,job))
+
+            while len(running)>0:
+                done,running=wait(running,return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        return None
+
+    def map(self,cmd_strs)->list:
+        """Runs every command string across the pool, results in submission order."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self.run,cmd_strs))
+
+    def close(self)->None:
+        """Shuts down every idle session."""
+        sessions=[]
+        while True:
+            try:
+                sessions.append(self.idle.get_nowait())
+            except queue.Empty:
+                break
+        for session in sessions:
+            if session is not None:
+                session.close()
+            self.idle.put(None)
+
+        return None
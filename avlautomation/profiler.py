@@ -0,0 +1,181 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+
+class _Disabled():
+    """Context manager handed out while profiling is off."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        return False
+
+_DISABLED=_Disabled()
+
+
+class Phase():
+    """
+    One timed span. Spans nested inside a span of the same name on the same thread
+    (e.g. make_planes inside generate_planes) are not recorded again, so phase totals
+    don't double count. Concurrent spans (coroutines sharing a thread) skip that check.
+    """
+    __slots__=("profiler","name","args","concurrent","start","nested")
+
+    def __init__(self,profiler,name:str,args:dict=None,concurrent:bool=False):
+        self.profiler=profiler
+        self.name=name
+        self.args=args
+        self.concurrent=concurrent
+        self.nested=False
+
+    def __enter__(self):
+        if self.concurrent==False:
+            stack=self.profiler.stack()
+            self.nested=self.name in stack
+            stack.append(self.name)
+        self.start=time.perf_counter()
+        return self
+
+    def __exit__(self,*args):
+        end=time.perf_counter()
+        if self.concurrent==False:
+            self.profiler.stack().pop()
+        if self.nested==False:
+            self.profiler.add(self.name,self.start,end,self.args,self.concurrent)
+        return False
+
+
+class Profiler():
+    """
+    Wall clock time spent in each phase of a run (writing cases, generating planes,
+    starting AVL, solving, parsing, curve fitting...).
+
+    Functions are tagged with @PROFILER.timed("phase") and blocks with
+    `with PROFILER.phase("phase"):`. While disabled (the default) a tagged call costs
+    one attribute check. Once enabled, spans are kept in memory and can be printed as
+    a summary table or written as a Chrome trace (chrome://tracing, ui.perfetto.dev).
+    Work done in the async scheduler's parser processes is timed from the main process.
+    """
+    def __init__(self):
+        self.enabled=False
+        self.events=[]
+        self.origin=time.perf_counter()
+        self.local=threading.local()
+
+        return None
+
+    def enable(self)->None:
+        """Starts recording, dropping anything recorded before."""
+        self.events=[]
+        self.origin=time.perf_counter()
+        self.enabled=True
+
+        return None
+
+    def disable(self)->None:
+        self.enabled=False
+
+        return None
+
+    def stack(self)->list:
+        """Names of the spans open on this thread."""
+        try:
+            return self.local.stack
+        except AttributeError:
+            self.local.stack=[]
+            return self.local.stack
+
+    def add(self,name:str,start:float,end:float,args:dict=None,concurrent:bool=False)->None:
+        """Records a span (perf_counter times). list.append is atomic, so no lock."""
+        thread=threading.current_thread()
+        self.events.append((name,start,end,thread.ident,thread.name,args,concurrent))
+
+        return None
+
+    def phase(self,name:str,concurrent:bool=False,**args):
+        """
+        Times a block.
+
+        Arguments:
+            name {string} -- Phase name.
+            concurrent {bool} -- Span may overlap others on the same thread (asyncio).
+            args -- Extra values shown on the span in the trace.
+        """
+        if self.enabled==False:
+            return _DISABLED
+        return Phase(self,name,args or None,concurrent)
+
+    def timed(self,name:str):
+        """Decorator timing every call of a function or coroutine function as phase name."""
+        def decorator(function):
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def wrapper(*args,**kwargs):
+                    if self.enabled==False:
+                        return await function(*args,**kwargs)
+                    with Phase(self,name,None,True):
+                        return await function(*args,**kwargs)
+            else:
+                @functools.wraps(function)
+                def wrapper(*args,**kwargs):
+                    if self.enabled==False:
+                        return function(*args,**kwargs)
+                    with Phase(self,name):
+                        return function(*args,**kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self)->str:
+        """
+        Table of calls, total, mean and max time per phase, slowest first. % wall is
+        total time over the wall time since enable(), so phases run on several threads
+        at once can go over 100%.
+        """
+        wall=time.perf_counter()-self.origin
+        phases={}
+        for name,start,end,*_ in self.events:
+            phases.setdefault(name,[]).append(end-start)
+
+        lines=[f"{'phase':<18}{'calls':>8}{'total s':>11}{'mean ms':>11}{'max ms':>11}{'% wall':>9}"]
+        for name,times in sorted(phases.items(),key=lambda item:-sum(item[1])):
+            total=sum(times)
+            lines.append(f"{name:<18}{len(times):>8}{total:>11.3f}{total/len(times)*1e3:>11.2f}"
+                         f"{max(times)*1e3:>11.2f}{100*total/wall if wall>0 else 0:>9.1f}")
+        lines.append(f"{'wall':<18}{'':>8}{wall:>11.3f}")
+
+        return "\n".join(lines)
+
+    def trace(self)->dict:
+        """Recorded spans in Chrome trace event format."""
+        pid=os.getpid()
+        events=[{"name":"process_name","ph":"M","pid":pid,"tid":0,"args":{"name":"avlautomation"}}]
+        threads={}
+        for i,(name,start,end,tid,thread_name,args,concurrent) in enumerate(self.events):
+            if tid not in threads:
+                threads[tid]=thread_name
+                events.append({"name":"thread_name","ph":"M","pid":pid,"tid":tid,"args":{"name":thread_name}})
+
+            ts=(start-self.origin)*1e6
+            event={"name":name,"cat":name,"pid":pid,"tid":tid,"ts":ts,"args":args or {}}
+            if concurrent==True:
+                #   Async spans overlap on one thread, which complete ("X") events can't show.
+                events.append({**event,"ph":"b","id":i})
+                events.append({**event,"ph":"e","id":i,"ts":(end-self.origin)*1e6})
+            else:
+                events.append({**event,"ph":"X","dur":(end-start)*1e6})
+
+        return {"traceEvents":events,"displayTimeUnit":"ms"}
+
+    def write_trace(self,file:str)->None:
+        with open(file,'w') as f:
+            json.dump(self.trace(),f)
+
+        return None
+
+
+#   Shared by every module, enabled by --profile.
+PROFILER=Profiler()
@@ -0,0 +1,209 @@
+import asyncio
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .pool import AVLError
+from .profiler import PROFILER
+from . import output
+
+
+def default_workers()->int:
+    """Number of cores this process is allowed to run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  #   Windows/macOS
+        return os.cpu_count() or 1
+
+
+class Scheduler():
+    """
+    asyncio AVL job scheduler.
+
+    Each job is its own AVL process started with asyncio.create_subprocess_exec, with at
+    most `workers` running at once. Results are parsed in a process pool (off the GIL)
+    and handed back in completion order, so callers can post-process one plane while
+    the rest are still running. Jobs are pulled from the input iterable only as slots
+    free up and at most 2*workers finished results are buffered for a slow consumer.
+    """
+    _done=object()
+
+    def __init__(self,path:str,workers:int=None,parse_workers:int=None,cache=None,timeout:float=60,retries:int=1):
+        """
+        Arguments:
+            path {string} -- Directory containing avl.exe.
+            workers {int} -- Concurrent AVL processes. Defaults to the available core count.
+            parse_workers {int} -- Parser processes. Defaults to the available core count.
+            cache {cache.ResultCache} -- Optional result cache.
+            timeout {float} -- Seconds allowed per job (unless the job sets its own).
+            retries {int} -- Times a job is rerun in a fresh AVL process after an error.
+        """
+        self.path=path
+        self.workers=workers or default_workers()
+        self.parse_workers=parse_workers or default_workers()
+        self.cache=cache
+        self.timeout=timeout
+        self.retries=retries
+        #   Started on first use and kept for every results() call until close().
+        self.parse_pool=None
+
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def close(self)->None:
+        """Shuts down the parser processes."""
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown()
+            self.parse_pool=None
+
+        return None
+
+    def results(self,jobs,cache=None):
+        """
+        Runs jobs, yielding each as soon as it has been run and parsed. Closing the
+        generator early (break, exception) kills the AVL processes still running.
+
+        Arguments:
+            jobs {iterable[pool.Job]} -- Jobs to run. Consumed lazily.
+            cache {cache.ResultCache} -- Result cache for these jobs. Defaults to self.cache.
+
+        Yields:
+            (job, (st, eig)) {tuple} -- Job and its parsed listings (see output.parse).
+        """
+        if self.parse_pool is None:
+            self.parse_pool=ProcessPoolExecutor(max_workers=self.parse_workers)
+        cache=cache if cache is not None else self.cache
+        finished=queue.Queue(maxsize=2*self.workers)
+
+        loop=asyncio.new_event_loop()
+        task=loop.create_task(self._produce(jobs,finished,cache))
+
+        def run():
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                loop.run_until_complete(loop.shutdown_default_executor())
+                loop.close()
+
+        thread=threading.Thread(target=run,daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                item=finished.get()
+                if item is Scheduler._done:
+                    break
+                if isinstance(item,BaseException):
+                    raise item
+                yield item
+        finally:
+            if thread.is_alive():
+                #   Consumer stopped early: cancel the producer and unblock its puts.
+                loop.call_soon_threadsafe(task.cancel)
+                while thread.is_alive():
+                    try:
+                        finished.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+            thread.join()
+
+        return None
+
+    async def _produce(self,jobs,finished:queue.Queue,cache)->None:
+        loop=asyncio.get_running_loop()
+        #   put() blocks when the consumer falls behind, so run it off the event loop.
+        put=lambda item:loop.run_in_executor(None,finished.put,item)
+
+        running=set()
+        try:
+            for job in jobs:
+                if len(running)>=self.workers:
+                    done,running=await asyncio.wait(running,return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        await put(task.result())
+                running.add(asyncio.create_task(self._run(job,cache)))
+
+            while len(running)>0:
+                done,running=await asyncio.wait(running,return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    await put(task.result())
+        except asyncio.CancelledError:
+            raise   #   Nobody left to report to.
+        except BaseException as e:
+            await put(e)
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running,return_exceptions=True)
+            await put(Scheduler._done)
+
+        return None
+
+    async def _run(self,job,cache)->tuple:
+        """Runs and parses one job."""
+        loop=asyncio.get_running_loop()
+
+        stdout=None
+        if cache is not None:
+            key=cache.key(job.cmd_str,job.geom_file,job.case_file,job.outputs)
+            stdout=cache.fetch(key,job.outputs)
+
+        if stdout is None:
+            for attempt in range(self.retries+1):
+                try:
+                    stdout=await self.avl(job.cmd_str,job.timeout or self.timeout)
+                    missing=[file for file in job.outputs if not os.path.exists(file)]
+                    if len(missing)>0:
+                        raise AVLError(f"AVL didn't write {', '.join(missing)}.")
+                    break
+                except AVLError:
+                    if attempt==self.retries:
+                        raise
+            if cache is not None:
+                cache.store(key,stdout,job.outputs)
+
+        #   Timed here: the parser processes don't report back to the profiler.
+        with PROFILER.phase("parse",concurrent=True):
+            parsed=await loop.run_in_executor(self.parse_pool,output.parse,stdout,job.st_files,job.eig_files)
+
+        return job,parsed
+
+    async def avl(self,cmd_str:str,timeout:float)->str:
+        """
+        Runs a command string in a new AVL process.
+
+        Returns:
+            stdout {string} -- AVL stdout.
+        """
+        with PROFILER.phase("start AVL",concurrent=True):
+            process=await asyncio.create_subprocess_exec(
+                f"{self.path}/avl.exe",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT
+            )
+        #   AVL hangs at its prompt on EOF on some builds, so always finish with quit.
+        try:
+            with PROFILER.phase("solve",concurrent=True):
+                stdout,_=await asyncio.wait_for(process.communicate((cmd_str+"\n\n\nquit\n").encode()),timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise AVLError(f"AVL job timed out after {timeout}s.")
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+
+        if process.returncode!=0:
+            raise AVLError(f"AVL exited with code {process.returncode}.")
+
+        return stdout.decode(errors="replace")
@@ -0,0 +1,279 @@
+import os
+import numpy as np
+import pandas as pd
+
+from .geometry import Plane
+from .avlfile import AVLFile
+
+
+class Parameter():
+    """One swept quantity: a list of values, or lower/upper/steps for evenly spaced ones."""
+    def __init__(self,name:str,values=None,lower:float=None,upper:float=None,steps:int=None):
+        """
+        Arguments:
+            name {string} -- Keyword the mutator receives the values as.
+            values {list} -- Values to sample (optional).
+            lower {float} -- First value, with upper and steps if values isn't given.
+            upper {float} -- Last value.
+            steps {int} -- Number of values.
+        """
+        if values is None:
+            if lower is None or upper is None or steps is None:
+                raise ValueError(f"Parameter '{name}' needs values or lower, upper and steps.")
+            values=np.linspace(lower,upper,int(steps))
+
+        self.name=name
+        self.values=np.atleast_1d(np.asarray(values))
+
+        return None
+
+    def __len__(self):
+        return len(self.values)
+
+
+class Sweep():
+    """
+    N dimensional design sweep.
+
+    Configurations are every combination of the parameter values, the first parameter
+    varying slowest (like np.meshgrid(indexing="ij")). They are made in batches as
+    they're needed rather than all at once: the mutator is called with one array per
+    parameter and returns a plane (geometry file written) per configuration, the
+    evaluate function runs AVL on a batch of planes and measure reads each plane's
+    results into labelled N dimensional arrays (SweepResults).
+
+    AutoTail (grid sampling) and Dihedral are sweeps with their own mutators; any other
+    geometry change can be swept with GeometryMutator.
+    """
+    def __init__(self,parameters:list,mutator,batch:int=None):
+        """
+        Arguments:
+            parameters {list[Parameter]} -- Swept quantities, slowest varying first.
+            mutator {callable} -- mutator(**{name: values}) -> list of planes, one per configuration.
+            batch {int} -- Configurations made per mutator call. Defaults to all of them.
+        """
+        names=[parameter.name for parameter in parameters]
+        if len(set(names))!=len(names):
+            raise ValueError("Sweep parameter names must be unique.")
+
+        self.parameters=parameters
+        self.mutator=mutator
+        self.batch=batch
+
+        return None
+
+    @property
+    def names(self)->list:
+        return [parameter.name for parameter in self.parameters]
+
+    @property
+    def shape(self)->tuple:
+        return tuple(len(parameter) for parameter in self.parameters)
+
+    @property
+    def size(self)->int:
+        return int(np.prod(self.shape))
+
+    def configurations(self,start:int=0,stop:int=None)->dict:
+        """
+        Parameter values of configurations start to stop (flat, C order).
+
+        Returns:
+            columns {dict} -- name: array of values.
+        """
+        stop=self.size if stop is None else min(stop,self.size)
+        indices=np.unravel_index(np.arange(start,stop),self.shape)
+
+        return {parameter.name:parameter.values[index] for parameter,index in zip(self.parameters,indices)}
+
+    def generate(self,batch:int=None):
+        """
+        Makes the planes, batch by batch, in configuration order. Nothing is made until
+        the generator is advanced.
+
+        Arguments:
+            batch {int} -- Configurations per batch. Defaults to self.batch.
+
+        Yields:
+            planes {list} -- Planes of the next batch.
+        """
+        batch=batch or self.batch or self.size
+        for start in range(0,self.size,batch):
+            planes=self.mutator(**self.configurations(start,start+batch))
+            if len(planes)!=min(batch,self.size-start):
+                raise ValueError("Sweep mutator must return one plane per configuration.")
+            yield planes
+
+        return None
+
+    def evaluate(self,batches,evaluate,measure=None):
+        """
+        Runs AVL on batches of planes and collects their results.
+
+        Arguments:
+            batches {iterable[list]} -- Plane batches in configuration order (e.g. self.generate()).
+            evaluate {callable} -- evaluate(planes) runs AVL on a batch (e.g. AutoTail.evaluate, Aero.run_planes).
+            measure {callable} -- measure(plane) -> {name: value} for the result arrays (optional).
+
+        Returns:
+            results {SweepResults} -- Measured values per configuration.
+        """
+        results=SweepResults(self.parameters)
+        index=0
+        for planes in batches:
+            evaluate(planes)
+            if measure is not None:
+                for plane in planes:
+                    results.set(index,measure(plane))
+                    index+=1
+
+        return results
+
+    def run(self,evaluate,measure=None,batch:int=None):
+        """Generates and evaluates every configuration, one batch at a time."""
+        return self.evaluate(self.generate(batch),evaluate,measure)
+
+    def stream(self,run,measure=None,batch:int=None):
+        """
+        Generates configurations while AVL runs. Planes are made a batch at a time as
+        run pulls them and measured as soon as run hands them back, so the first results
+        come in straight away and only the planes in flight are held in memory.
+
+        Arguments:
+            run {callable} -- run(planes) takes an iterable of planes and yields each one
+                once analysed, in any order (e.g. AutoTail.stream, Aero.stream_planes).
+                It should only pull planes as it has room to run them.
+            measure {callable} -- measure(plane) -> {name: value} for the result arrays (optional).
+            batch {int} -- Configurations made per mutator call. Defaults to self.batch or 1.
+
+        Returns:
+            results {SweepResults} -- Measured values per configuration.
+        """
+        results=SweepResults(self.parameters)
+        indices={}  #   id(plane) -> configuration, for planes in flight
+
+        def planes():
+            index=0
+            for generated in self.generate(batch or self.batch or 1):
+                for plane in generated:
+                    indices[id(plane)]=index
+                    index+=1
+                    yield plane
+
+        for plane in run(planes()):
+            index=indices.pop(id(plane))
+            if measure is not None:
+                results.set(index,measure(plane))
+
+        return results
+
+
+class SweepResults():
+    """
+    Results of a sweep as N dimensional arrays, one axis per parameter (plus the
+    value's own axes for array results, e.g. one per alpha).
+    """
+    def __init__(self,parameters:list):
+        self.coords={parameter.name:parameter.values for parameter in parameters}
+        self.dims=tuple(self.coords)
+        self.shape=tuple(len(values) for values in self.coords.values())
+        self.data={}
+
+        return None
+
+    def set(self,index:int,values:dict)->None:
+        """Stores the measured values of configuration index (flat, C order)."""
+        position=np.unravel_index(index,self.shape)
+        for name,value in values.items():
+            value=np.asarray(value)
+            if name not in self.data:
+                dtype=complex if np.iscomplexobj(value) else float
+                self.data[name]=np.full(self.shape+value.shape,np.nan,dtype=dtype)
+            self.data[name][position]=value
+
+        return None
+
+    def __getitem__(self,name:str)->np.ndarray:
+        return self.data[name]
+
+    def __contains__(self,name:str)->bool:
+        return name in self.data
+
+    def sel(self,**coords)->dict:
+        """
+        Results at given parameter values, e.g. results.sel(St_h=2e5).
+
+        Returns:
+            data {dict} -- name: array with the selected axes removed.
+        """
+        index=[]
+        for dim in self.dims:
+            if dim not in coords:
+                index.append(slice(None))
+                continue
+            values=self.coords[dim]
+            if values.dtype.kind in "fc":
+                matches=np.flatnonzero(np.isclose(values,coords[dim]))
+            else:
+                matches=np.flatnonzero(values==coords[dim])
+            if len(matches)==0:
+                raise KeyError(f"{coords[dim]} is not a value of {dim}.")
+            index.append(matches[0])
+
+        return {name:array[tuple(index)] for name,array in self.data.items()}
+
+    def to_dataframe(self)->pd.DataFrame:
+        """One row per configuration: parameter values then scalar results."""
+        grids=np.meshgrid(*self.coords.values(),indexing="ij")
+        frame={dim:grid.ravel() for dim,grid in zip(self.dims,grids)}
+        for name,array in self.data.items():
+            if array.ndim==len(self.dims):
+                frame[name]=array.ravel()
+
+        return pd.DataFrame(frame)
+
+
+class GeometryMutator():
+    """
+    Sweep mutator for any change to a plane file. The file is parsed once and edit
+    changes the parsed tree (avlfile.AVLFile) for each configuration, e.g.
+
+        def edit(geometry, ainc, chord):
+            tail = geometry.surface("Elevator")
+            for section in tail.sections:
+                section.ainc = ainc
+                section.chord = chord
+
+    edit should set every value it changes for every configuration, as the tree is
+    reused between them.
+    """
+    def __init__(self,plane_file:str,directory:str,edit):
+        """
+        Arguments:
+            plane_file {string} -- Reference plane .avl file.
+            directory {string} -- Folder the generated plane files are written to.
+            edit {callable} -- edit(geometry, **values) changes the parsed plane for one configuration.
+        """
+        self.geometry=AVLFile.read(plane_file)
+        self.directory=directory
+        self.edit=edit
+        self.count=0
+
+        return None
+
+    def __call__(self,**columns)->list:
+        names=list(columns)
+        planes=[]
+        for values in zip(*columns.values()):
+            values=dict(zip(names,values))
+            self.edit(self.geometry,**values)
+
+            plane=Plane(name=str(self.count))
+            plane.sweep_values=values
+            plane.geom_file=os.path.join(self.directory,f"{plane.name}.avl")
+            self.geometry.write(plane.geom_file)
+            self.count+=1
+
+            planes.append(plane)
+
+        return planes
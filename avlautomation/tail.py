@@ -1,27 +1,42 @@
 import os
-import shutil
 import numpy as np
 from matplotlib import cm
 from matplotlib import pyplot as plt
-from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
-import copy
 import pandas as pd
 from scipy import optimize
 
-from .geometry import Plane, Section
-from .aero import Case, avl_cmd
+from .geometry import Plane, PlaneTable, Section, Control
+from .aero import Case
+from .pool import AVLPool, Job
+from .scheduler import Scheduler, default_workers
+from .cache import ResultCache
+from .config import read_options, read_loadings
+from .workspace import Workspace
+from .journal import Journal
+from .profiler import PROFILER
+from .sweep import Sweep, Parameter
+from .cluster import coordinator
+from . import output
 
 
 class CurveFit():
-    def __init__(self, planes: list[Plane], sm_ideal: float):
+    def __init__(self, planes: PlaneTable, sm_ideal: float, p0: np.ndarray = None):
+        """
+        Args:
+            planes (PlaneTable): Analysed tail configurations.
+            sm_ideal (float): Static margin slices targets default to.
+            p0 (np.ndarray, optional): Starting parameters (e.g. a previous fit's parameters). Defaults to ones.
+        """
         self.planes = planes
         self.sm_ideal = sm_ideal
+        self.p0 = p0
+        self._parameters = None
 
-        self.Lts = np.array([plane.Lt for plane in self.planes])
-        self.Xts = np.array([plane.Xt for plane in self.planes])
-        self.SMs = np.array([plane.sm for plane in self.planes])
-        self.St_hs = np.array([plane.St_h for plane in self.planes])
+        self.Lts = planes.Lt
+        self.Xts = planes.Xt
+        self.SMs = planes.sm
+        self.St_hs = planes.St_h
 
         if self.SMs.min() > sm_ideal or self.SMs.max() < sm_ideal:
             print(
@@ -31,6 +46,13 @@ class CurveFit():
         else:
             self.unstable = False
 
+    @property
+    def parameters(self) -> np.ndarray:
+        """Surface control parameters of SM = func((St_h, Lt)). Fitted on first use."""
+        if self._parameters is None:
+            self._parameters = self.curve_fit(self.St_hs, self.Lts, self.SMs)
+        return self._parameters
+
     def func(self, data: np.ndarray, a: float, b: float, c: float, d: float) -> np.ndarray:
         """Equation for 3D surface (applicable to Lt, Sh, SM datapoints)
 
@@ -49,6 +71,20 @@ class CurveFit():
         z = a*(x**b)*(y**c)+d
         return z
 
+    def jacobian(self, data: np.ndarray, a: float, b: float, c: float, d: float) -> np.ndarray:
+        """Analytic derivatives of func with respect to a, b, c and d.
+
+        Args:
+            data (np.ndarray): x,y data.
+
+        Returns:
+            np.ndarray: (points, 4) Jacobian.
+        """
+        x = np.asarray(data[0], dtype=float)
+        y = np.asarray(data[1], dtype=float)
+        xy = (x**b)*(y**c)
+        return np.column_stack((xy, a*xy*np.log(x), a*xy*np.log(y), np.ones_like(xy)))
+
     def func_inv_const_z(self, x: np.ndarray, z: float, a: float, b: float, c: float, d: float) -> np.ndarray:
         """Solve 'func' for y given x and z.
 
@@ -72,6 +108,7 @@ class CurveFit():
     def Xt_to_Lt(self, x):
         return np.interp(x, self.Xts, self.Lts)
 
+    @PROFILER.timed("curve fit")
     def curve_fit(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
         """Scipy curve fit for func.
 
@@ -84,10 +121,57 @@ class CurveFit():
             np.ndarray: Surface control parameters.
         """
 
-        parameters, covariance = optimize.curve_fit(self.func, [x, y], z)
+        p0 = self.p0 if self.p0 is not None else self._parameters  # Warm start from the last fit
+        parameters, covariance = optimize.curve_fit(
+            self.func, [x, y], z, p0=p0, jac=self.jacobian)
 
         return parameters
 
+    def refit(self) -> np.ndarray:
+        """Fits again (e.g. after more planes were analysed), starting from the current parameters.
+
+        Returns:
+            np.ndarray: Surface control parameters.
+        """
+        self.Lts = self.planes.Lt
+        self.Xts = self.planes.Xt
+        self.SMs = self.planes.sm
+        self.St_hs = self.planes.St_h
+
+        self._parameters = self.curve_fit(self.St_hs, self.Lts, self.SMs)
+
+        return self._parameters
+
+    def slices(self, sm: np.ndarray = None, n: int = 20) -> list[np.ndarray]:
+        """Slices the fitted surface at one or more static margins in one call.
+
+        Args:
+            sm (np.ndarray, optional): Static margin(s). Defaults to sm_ideal.
+            n (int, optional): Tail areas per slice. Defaults to 20.
+
+        Returns:
+            Lt (np.ndarray): Tail moment arm, (len(sm), n) or (n,) for a single SM.
+            St_h (np.ndarray): Horizontal tail area, (n,).
+            St_v (np.ndarray): Vertical tail area, same shape as Lt.
+        """
+        if sm is None:
+            sm = self.sm_ideal
+        sms = np.atleast_1d(np.asarray(sm, dtype=float))
+
+        outside = (sms < self.SMs.min()) | (sms > self.SMs.max())
+        if outside.any():
+            print(
+                f"\u001b[33m[Warning]\u001b[0m SM {sms[outside]} out of range of analysis datapoints, slices are extrapolated.")
+
+        St_h = np.linspace(self.St_hs.min(), self.St_hs.max(), n)
+        Lt = self.func_inv_const_z(St_h[None, :], sms[:, None], *self.parameters)
+        St_v = self.planes.Ct_v*self.planes.Sw*self.planes.b_w/Lt
+
+        if np.ndim(sm) == 0:
+            return Lt[0], St_h, St_v[0]
+
+        return Lt, St_h, St_v
+
     def curve_fit_slice(self) -> list[plt.figure, plt.axes]:
         """
         Slices surface fit to AVL datapoints.
@@ -103,17 +187,7 @@ class CurveFit():
             print("\u001b[31m[Error]\u001b[0m SM ideal is out of range of analysis datapoints. Stable configurations are required to slice at SM ideal.")
             exit()
 
-        Lts = self.Lts
-        SMs = self.SMs
-        St_hs = self.St_hs
-
-        parameters = self.curve_fit(St_hs, Lts, SMs)
-
-        St_h = np.linspace(St_hs.min(), St_hs.max(), 20)
-        Lt = self.func_inv_const_z(St_h, self.sm_ideal, *parameters)
-        St_v = self.planes[0].Ct_v*self.planes[0].Sw*self.planes[0].b_w/Lt
-
-        return Lt, St_h, St_v
+        return self.slices(self.sm_ideal)
 
     def curve_fit_surface(self) -> list[np.ndarray]:
         """Fits surface to Lt, St_h, SM datapoints.
@@ -122,17 +196,12 @@ class CurveFit():
             list[np.ndarray]: x,y,z data (Lt, St_h, SM)
         """
 
-        St_hs = [plane.St_h for plane in self.planes]
-        Lts = self.Lts
-        Sms = [plane.sm for plane in self.planes]
-
-        parameters = self.curve_fit(self.Lts, self.St_hs, self.SMs)
-
         St_h_range = np.linspace(min(self.St_hs), max(self.St_hs), 20)
         Lt_range = np.linspace(min(self.Lts), max(self.Lts), 20)
 
         x2, y2 = np.meshgrid(Lt_range, St_h_range)
-        z2 = self.func(np.array((x2, y2)), *parameters)
+        # Same fit as the slices, so (St_h, Lt) order
+        z2 = self.func(np.array((y2, x2)), *self.parameters)
 
         return x2, y2, z2
 
@@ -176,8 +245,8 @@ class CurveFit():
         ax.plot_surface(x, y, z, cmap=cm.viridis)
         ax.scatter(self.Lts, self.St_hs, self.SMs, color='k', depthshade=False)
 
-        ax.set_xlabel("${St_h}$ (${Lunit^2}$)")
-        ax.set_ylabel("${Lt}$ (${Lunit}$)")
+        ax.set_xlabel("${Lt}$ (${Lunit}$)")
+        ax.set_ylabel("${St_h}$ (${Lunit^2}$)")
         ax.set_zlabel("SM")
 
         fig.tight_layout()
@@ -191,38 +260,121 @@ class CurveFit():
         cs = ax.contour(x, y, z, 10, colors='k')
         ax.clabel(cs, cs.levels, inline=True, colors='k')
 
-        ax.set_xlabel("${St_h}$ (${Lunit^2}$)")
-        ax.set_ylabel("${Lt}$ (${Lunit}$)")
+        ax.set_xlabel("${Lt}$ (${Lunit}$)")
+        ax.set_ylabel("${St_h}$ (${Lunit^2}$)")
 
         fig.tight_layout()
 
         return plt
 
 
+class Surrogate():
+    """Gaussian process surrogate of static margin over (St_h, Xt).
+
+    Inputs are scaled to the unit square and SM is standardised, so a single
+    squared exponential length scale (picked by marginal likelihood) fits any tail limits.
+    """
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray, noise: float = 1e-6):
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.noise = noise
+        self.length = None
+
+    def scale(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=float)-self.lower)/(self.upper-self.lower)
+
+    def kernel(self, A: np.ndarray, B: np.ndarray, length: float) -> np.ndarray:
+        d2 = ((A[:, None, :]-B[None, :, :])**2).sum(axis=2)
+        return np.exp(-0.5*d2/length**2)
+
+    @PROFILER.timed("curve fit")
+    def fit(self, X: np.ndarray, y: np.ndarray, length: float = None):
+        """Conditions the GP on evaluated points.
+
+        Args:
+            X (np.ndarray): (n, 2) St_h, Xt of evaluated planes.
+            y (np.ndarray): Static margins.
+            length (float, optional): Keep this length scale instead of refitting it.
+        """
+        self.X = self.scale(X)
+        y = np.asarray(y, dtype=float)
+        self.y_mean = y.mean()
+        self.y_std = y.std() if y.std() > 0 else 1.0
+        self.y = (y-self.y_mean)/self.y_std
+
+        if length is None:
+            lengths = np.logspace(-1.5, 0.5, 25)
+            length = lengths[np.argmax([self.log_likelihood(l) for l in lengths])]
+        self.length = length
+
+        K = self.kernel(self.X, self.X, length)+self.noise*np.eye(len(self.X))
+        self.L = np.linalg.cholesky(K)
+        self.alpha = np.linalg.solve(self.L.T, np.linalg.solve(self.L, self.y))
+
+        return self
+
+    def log_likelihood(self, length: float) -> float:
+        K = self.kernel(self.X, self.X, length)+self.noise*np.eye(len(self.X))
+        try:
+            L = np.linalg.cholesky(K)
+        except np.linalg.LinAlgError:
+            return -np.inf
+        alpha = np.linalg.solve(L.T, np.linalg.solve(L, self.y))
+
+        return -0.5*self.y@alpha-np.log(np.diag(L)).sum()
+
+    def predict(self, X: np.ndarray) -> list[np.ndarray]:
+        """Predicted SM and its standard deviation.
+
+        Args:
+            X (np.ndarray): (n, 2) St_h, Xt.
+
+        Returns:
+            list[np.ndarray]: mean, std.
+        """
+        Ks = self.kernel(self.scale(X), self.X, self.length)
+        mean = Ks@self.alpha
+        v = np.linalg.solve(self.L, Ks.T)
+        var = np.clip(1.0-(v**2).sum(axis=0), 0, None)
+
+        return mean*self.y_std+self.y_mean, np.sqrt(var)*self.y_std
+
+
 class AutoTail():
-    def __init__(self, config_file: str):
-        
+    def __init__(self, config_file: str, resume: bool = False, loadings: list = None):
+        """
+        Args:
+            config_file (str): tail.config file path.
+            resume (bool, optional): Skip AVL jobs finished by an interrupted run (see journal.Journal). Defaults to False.
+            loadings (List[tuple], optional): (Xcg, mass) loadings for envelope(). Defaults to the config file's.
+        """
         self.path = os.path.split(config_file)[0]
-        
-        try:
-            if os.path.isdir(self.path+"/results") == True:
-                shutil.rmtree(self.path+"/results")
-            if os.path.isdir(self.path+"/generated planes") == True:
-                shutil.rmtree(self.path+"/generated planes")
-            if os.path.isdir(self.path+"/cases") == True:
-                shutil.rmtree(self.path+"/cases")
-        except PermissionError:
-            raise PermissionError("Close all results, geometry, case files")
-
-        os.mkdir(self.path+"/generated planes")
-        os.mkdir(self.path+"/results")
-        os.mkdir(self.path+"/cases")
-        
+
         if os.path.exists(f"{self.path}/avl.exe")==False:
             print("\u001b[31m[Error]\u001b[0m avl.exe not found.")
             exit()
 
         self.read_config(config_file)
+        if loadings is not None and self.calc_cg == False:
+            self.loadings = [(float(Xcg), float(mass)) for Xcg, mass in loadings]
+
+        # Cleans temp folders
+        self.workspace = Workspace(self.path, ("generated planes", "results", "cases"),
+                                   self.workspace_backend, self.keep_files)
+        self.scratch = self.workspace.root
+
+        self.cache = None
+        if self.use_cache == True:
+            self.cache = ResultCache(self.path+"/cache", self.cache_size)
+        if self.journal == True or resume == True:
+            # Journal sits in front of the cache, jobs are looked up in both
+            self.cache = Journal(os.path.splitext(config_file)[0]+".journal", resume, self.cache)
+
+        # Workers on other machines connect to this for jobs (see cluster.Worker)
+        self.coordinator = None
+        if self.cluster is not None:
+            self.coordinator = coordinator(self.cluster, self.cluster_key, self.timeout)
 
         return None
 
@@ -269,7 +421,32 @@ class AutoTail():
         self.config = float(lines[15].split()[1])
         self.b_th = lines[16].split()[1]
 
-        self.threads = int(lines[17].split()[1])
+        self.threads = lines[17].split()[1]
+        # "auto" uses every available core
+        self.threads = default_workers() if self.threads == "auto" else int(self.threads)
+
+        options = read_options(lines[18:])
+        self.use_cache = options.get("cache", "N") == "Y"
+        self.cache_size = float(options.get("cache_size", 500))*1e6
+        self.stdout = options.get("stdout", "N") == "Y"
+        self.save_results = options.get("save_results", "N") == "Y"
+        self.scheduler = options.get("scheduler", "pool") == "async"
+        self.timeout = float(options.get("timeout", 60))
+        self.workspace_backend = options.get("workspace", "local")
+        self.keep_files = options.get("keep_files", "N")
+        self.journal = options.get("journal", "N") == "Y"
+        self.sampling = options.get("sampling", "grid")
+        self.adaptive_steps = int(options.get("adaptive_steps", 3))
+        self.adaptive_depth = int(options.get("adaptive_depth", 3))
+        self.adaptive_accuracy = float(options.get("adaptive_accuracy", self.tolerance))
+        self.surrogate_batch = int(options.get("surrogate_batch", self.threads))
+        self.surrogate_runs = int(options.get("surrogate_runs", self.steps**2))
+        self.root_accuracy = float(options.get("root_accuracy", self.tolerance/10))
+        self.root_iterations = int(options.get("root_iterations", 10))
+        self.cluster = options.get("cluster")
+        self.trim_CL = float(options["trim_cl"]) if "trim_cl" in options else None
+        self.trim_hinge = float(options.get("trim_hinge", 0))
+        self.cluster_key = options.get("cluster_key", os.environ.get("AVL_CLUSTER_KEY"))
 
         if self.b_th != "NA":
             self.b_th = float(self.b_th)
@@ -287,6 +464,11 @@ class AutoTail():
 
         if self.Xcg == "NA" and self.Ycg == "NA" and self.Zcg == "NA":
             self.calc_cg = True
+
+            if self.sampling != "grid":
+                print(
+                    "\u001b[33m[Warning]\u001b[0m Adaptive sampling needs a CG to refine around SM_ideal. Using grid.")
+                self.sampling = "grid"
         else:
             self.calc_cg = False
 
@@ -294,6 +476,16 @@ class AutoTail():
             self.Ycg = float(self.Ycg)
             self.Zcg = float(self.Zcg)
 
+        # CG & mass loadings, SM at each comes from the same AVL runs (see envelope)
+        self.loadings = []
+        if self.calc_cg == False:
+            self.loadings = [(self.Xcg, self.mass)]
+            if "loadings" in options:
+                self.loadings = read_loadings(options["loadings"], self.mass)
+        elif "loadings" in options:
+            print(
+                "\u001b[33m[Warning]\u001b[0m Loadings need a CG location and will be ignored.")
+
         if self.config != 0 and self.config != 1:
             print(
                 "\u001b[31m[Error]\u001b[0m Invalid tail configuration selected.")
@@ -303,11 +495,13 @@ class AutoTail():
             self.St_h_lower, self.St_h_upper, self.steps)
         self.Xt_range = np.linspace(self.Xt_lower, self.Xt_upper, self.steps)
 
+    @PROFILER.timed("generate planes")
     def generate_planes(self):
         """Generates planes according to user tail limits. Generates and writes AVL geometry file.
+        Grid and root sampling only set up the sweep here, their planes are made while AVL runs.
 
         Returns:
-            List[Plane]: List of Plane generated plane objects.
+            List[Plane]: List of Plane generated plane objects (empty for grid and root sampling).
         """
         self.ref_plane = Plane(name="REF")
         self.ref_plane.read(self.plane_file)
@@ -322,139 +516,616 @@ class AutoTail():
             print(
                 "\u001b[33m[Warning]\u001b[0m No surface 'Fin' found. Check if geometry of generated planes looks correct.")
 
-        planes = []
-
         self.Sw = self.ref_plane.Sw
         self.mac = self.ref_plane.mac
         self.b_w = self.ref_plane.b_w
         ARw = self.ref_plane.ARw
-        ARh = ARw*2/3
-        Xw_root = self.ref_plane.Xw_root
-        Cw_root = self.ref_plane.Cw_root
-
-        count = 0
-        for St_h in self.St_h_range:
-            for Xt in self.Xt_range:
-                St_h = float(St_h)
-                Xt = Xt
-
-                name = str(count)  # Creates plane name
-                plane = Plane(name=name)  # Initializes new plane
-
-                plane.Xt = Xt
-                plane.Sw = self.Sw
-                plane.Xw_root = Xw_root
-                plane.Cw_root = Cw_root
-                plane.St_h = St_h
-                plane.ARh = ARh
-                plane.mac = self.mac
-                plane.b_w = self.b_w
-                plane.sm_ideal = self.sm_ideal
-                plane.tail_config = self.config
-                plane.Ct_v = self.Ct_v
-
-                if self.calc_cg == False:
-                    plane.Xcg = self.Xcg
-
-                mod_geom = copy.copy(self.ref_plane.file_str)
-
-                if self.b_th != "NA" and self.config == 1:  # if span constraint used:
-                    chord = St_h/self.b_th  # Calculate chord based off span & area, not area & AR
-                    span = self.b_th
-                else:
-                    # Calculates h chord based on area & AR
-                    chord = np.sqrt(St_h/plane.ARh)
-                    # Calculates HTP span (Lunit)
-                    span = np.sqrt(St_h*plane.ARh)
-
-                plane.b_th = span
-                plane.c_t = chord
-
-                plane.Lt = (plane.Xt+plane.c_t*0.25) - \
-                    (plane.Xw_root+0.25*plane.Cw_root)
-                if plane.Lt <= 0:
-                    print(
-                        "\u001b[31m[Error]\u001b[0m Tail moment arm <=0. Increase Xt lower bound.")
-                    exit()
-
-                plane.St_v = plane.Ct_v*plane.Sw*plane.b_w/plane.Lt  # Vertical tail sizing
-
-                # Calculates tip height (inverted v tail) (Lunit)
-                Zle = (plane.St_v)/(2*chord)
-                plane.theta = np.rad2deg(np.arctan(Zle/(span/2)))
-
-                if self.config == 0:
-                    # Defines root section (object)
-                    root = Section(Xt, 0, 0, chord, 10, -1,
-                                   self.elevator_aerofoil)
-                elif self.config == 1:
-                    root = Section(Xt, 0, Zle, chord, 10, -
-                                   1, self.elevator_aerofoil)
-
-                # Defines tip section (object)
-                tip = Section(Xt, span/2, 0, chord, 10, -
-                              2, self.elevator_aerofoil)
-                # Combines 2 sections to insert into reference plane
-                mod_str = str(root)+str(tip)
-
-                for index, line in enumerate(mod_geom):
-                    if line == "MARKER\n":
-                        mod_geom.pop(index)  # Removes marker
-                        # Inserts modified sections
-                        mod_geom.insert(index, mod_str)
-
-                file_name = f"{plane.name}-{str(round(St_h,2))}Sh-{str(round(plane.Lt,2))}Lt"
-                plane.geom_file = f"{self.path}/generated planes/{file_name}.avl"
-
-                with open(plane.geom_file, 'w') as file:
-                    file.write("".join(mod_geom))
-                count += 1
-
-                planes.append(plane)
+        self.ARh = ARw*2/3
+        self.Xw_root = self.ref_plane.Xw_root
+        self.Cw_root = self.ref_plane.Cw_root
+        # Compiled once, each plane is then one write
+        self.template = self.ref_plane.template()
+
+        self.table = PlaneTable(
+            capacity=self.steps**2,
+            Sw=self.Sw,
+            mac=self.mac,
+            b_w=self.b_w,
+            ARh=self.ARh,
+            Ct_v=self.Ct_v,
+            Xw_root=self.Xw_root,
+            Cw_root=self.Cw_root,
+            sm_ideal=self.sm_ideal,
+            tail_config=self.config
+        )
+
+        if self.sampling in ("adaptive", "surrogate"):
+            # Coarse grid only, run() refines it around SM_ideal
+            self.lattice = self.adaptive_lattice()
+            self.points = {}
+            points = [(i, j) for i in range(0, len(self.lattice[0]), self.lattice[2])
+                      for j in range(0, len(self.lattice[1]), self.lattice[2])]
+            planes = self.make_lattice_planes(points)
+        else:
+            # Xt limits bracket the root for each St_h, run() closes them in
+            Xt = self.Xt_range if self.sampling == "grid" else (self.Xt_lower, self.Xt_upper)
+            self.sweep = Sweep([Parameter("St_h", self.St_h_range), Parameter("Xt", Xt)],
+                               lambda St_h, Xt: self.make_planes(St_h, Xt), batch=self.threads)
+            self.planes = []
+            return self.planes
 
         print("[Info] Planes generated.")
         self.planes = planes
 
         return planes
 
+    def tail_size(self, St_hs):
+        """Horizontal tail chord and span for each tail area.
+
+        Args:
+            St_hs (np.ndarray): Horizontal tail areas.
+
+        Returns:
+            np.ndarray: Chords.
+            np.ndarray: Spans.
+        """
+        if self.b_th != "NA" and self.config == 1:  # if span constraint used:
+            chords = St_hs/self.b_th  # Calculate chord based off span & area, not area & AR
+            spans = np.full(len(St_hs), self.b_th)
+        else:
+            # Calculates h chord based on area & AR
+            chords = np.sqrt(St_hs/self.ARh)
+            # Calculates HTP span (Lunit)
+            spans = np.sqrt(St_hs*self.ARh)
+
+        return chords, spans
+
+    @PROFILER.timed("generate planes")
+    def make_planes(self, St_hs, Xts, table=None, control=None):
+        """Generates tail configurations as new rows of self.table and writes their AVL geometry files.
+
+        Args:
+            St_hs (np.ndarray): Horizontal tail areas.
+            Xts (np.ndarray): Tail leading edge x locations.
+            table (PlaneTable, optional): Table to add the planes to. Defaults to self.table.
+            control (Control, optional): Control surface on the tail sections (trim). Defaults to None.
+
+        Returns:
+            List[PlaneView]: Generated planes.
+        """
+        St_hs = np.asarray(St_hs, dtype=float)
+        Xts = np.asarray(Xts, dtype=float)
+        table = self.table if table is None else table
+
+        chords, spans = self.tail_size(St_hs)
+
+        Lts = (Xts+chords*0.25) - (self.Xw_root+0.25*self.Cw_root)
+        if np.any(Lts <= 0):
+            print(
+                "\u001b[31m[Error]\u001b[0m Tail moment arm <=0. Increase Xt lower bound.")
+            exit()
+
+        St_vs = self.Ct_v*self.Sw*self.b_w/Lts  # Vertical tail sizing
+
+        # Calculates tip height (inverted v tail) (Lunit)
+        Zles = St_vs/(2*chords)
+        thetas = np.rad2deg(np.arctan(Zles/(spans/2)))
+
+        planes = table.append(
+            rows=len(St_hs),
+            Xt=Xts,
+            Lt=Lts,
+            St_h=St_hs,
+            St_v=St_vs,
+            b_th=spans,
+            c_t=chords,
+            theta=thetas,
+            Xcg=self.Xcg if self.calc_cg == False else np.nan
+        )
+
+        for plane, St_h, Xt, chord, span, Zle, Lt in zip(planes, St_hs, Xts, chords, spans, Zles, Lts):
+            if self.config == 0:
+                # Defines root section (object)
+                root = Section(Xt, 0, 0, chord, 10, -1,
+                               self.elevator_aerofoil, control)
+            elif self.config == 1:
+                root = Section(Xt, 0, Zle, chord, 10, -
+                               1, self.elevator_aerofoil, control)
+
+            # Defines tip section (object)
+            tip = Section(Xt, span/2, 0, chord, 10, -
+                          2, self.elevator_aerofoil, control)
+            # Combines 2 sections to insert into reference plane
+            mod_str = str(root)+str(tip)
+
+            file_name = f"{plane.name}-{str(round(St_h,2))}Sh-{str(round(Lt,2))}Lt"
+            if control is not None:
+                file_name = f"{control.name}-{file_name}"
+            plane.geom_file = f"{self.scratch}/generated planes/{file_name}.avl"
+
+            self.template.write(plane.geom_file, mod_str)
+
+        return planes
+
+    def make_lattice_planes(self, points):
+        """Generates planes at (St_h, Xt) lattice indices, remembering them in self.points.
+
+        Args:
+            points (List[tuple]): (i, j) indices into self.lattice.
+
+        Returns:
+            List[PlaneView]: Generated planes.
+        """
+        St_h_lattice, Xt_lattice, spacing = self.lattice
+        planes = self.make_planes([St_h_lattice[i] for i, j in points],
+                                  [Xt_lattice[j] for i, j in points])
+        for point, plane in zip(points, planes):
+            self.points[point] = plane
+
+        return planes
+
     def run(self):
         """Runs AVL stability analysis. Multithreaded due to high io throughput.
         """
-        self.case = Case(self.path,self.Xcg, self.Ycg, self.Zcg, self.mass)
+        self.case = Case(self.scratch,self.Xcg, self.Ycg, self.Zcg, self.mass)
         self.case.write_stab_case()
 
-        tasks = [(self.case, plane) for plane in self.planes]
-        # Starts analysis on multiple threads
-        with ThreadPoolExecutor(max_workers=self.threads) as pool:
-            list(tqdm(pool.map(self.stab_analysis, tasks),
-                 total=len(tasks), desc="Stability analysis"))
+        # Every round of refine, active_learning & solve_Xt runs on the same AVL sessions
+        runner = self.runner()
+        try:
+            if self.sampling in ("grid", "root"):
+                # Planes are made as AVL has room for them, St_h x Xt arrays of the measured quantities
+                self.grid = self.sweep.stream(lambda planes: self.stream(planes, self.sweep.size, runner=runner),
+                                              self.measure)
+                self.planes = list(self.table)
+            else:
+                self.evaluate(self.planes, runner)
+
+            if self.sampling == "adaptive":
+                self.refine(runner)
+            elif self.sampling == "surrogate":
+                self.active_learning(runner)
+            elif self.sampling == "root":
+                self.solve_Xt(runner)
+        finally:
+            if runner is not self.coordinator:
+                runner.close()
+
+    def runner(self):
+        """AVL job runner for stream: the cluster coordinator if there is one, otherwise a new
+        Scheduler (scheduler: async) or pool of persistent AVL sessions, closed by the caller.
 
-        tasks = [plane for plane in self.planes]
-        # Starts post processing on multiple threads
-        with ThreadPoolExecutor(max_workers=self.threads) as pool:
-            pool.map(self.calc_SM, tasks)
+        Returns:
+            Coordinator, Scheduler or AVLPool: Anything with results(jobs, cache).
+        """
+        if self.coordinator is not None:
+            return self.coordinator
+        if self.scheduler == True:
+            return Scheduler(self.path, self.threads, cache=self.cache, timeout=self.timeout)
+
+        return AVLPool(self.path, self.threads, timeout=self.timeout)
+
+    def evaluate(self, planes, runner=None):
+        """Runs AVL stability analysis and calculates SM for a batch of planes.
+
+        Args:
+            planes (List[Plane]): Planes to analyse.
+            runner (optional): Open runner (see runner), left open. Defaults to a new one.
+        """
+        for plane in self.stream(planes, len(planes), runner=runner):
+            pass
+
+    def stream(self, planes, total=None, make_job=None, runner=None):
+        """Runs AVL stability analysis on planes as they come and calculates each SM as soon
+        as its plane finishes, overlapping with the AVL runs still going.
+
+        Args:
+            planes (Iterable[Plane]): Planes to analyse. Only pulled as AVL has room for them,
+                so a generator can make them on demand.
+            total (int, optional): Number of planes, for the progress bar.
+            make_job (Callable, optional): make_job(plane) -> Job. Defaults to the stability job.
+            runner (optional): Open runner (see runner), left open. Defaults to a new one closed at the end.
+
+        Yields:
+            Plane: Each plane once analysed, in completion order.
+        """
+        if make_job is None:
+            make_job = lambda plane: self.stab_job(self.case, plane)
+        jobs = (make_job(plane) for plane in planes)
+        own = runner is None
+        if own == True:
+            runner = self.runner()
+        results = runner.results(jobs, self.cache)
 
-    def stab_analysis(self, tasks):
-        """Creates AVL input string and executes AVL analysis.
+        try:
+            for job, (st, eig) in tqdm(results, total=total, desc="Stability analysis"):
+                self.capture(job.tag, st)
+                self.calc_SM(job.tag)
+                yield job.tag
+        finally:
+            results.close()
+            if own == True and runner is not self.coordinator:
+                runner.close()
+
+    def measure(self, plane):
+        """Quantities of an analysed plane kept in the sweep results.
 
         Args:
-            tasks (List): Case and Plane to run [Case, Plane].
+            plane (PlaneView): Analysed plane.
+
+        Returns:
+            dict: Column name: value.
+        """
+        return {name: getattr(plane, name) for name in ("Lt", "St_v", "b_th", "c_t", "theta", "Xcg", "np", "sm")}
+
+    def adaptive_lattice(self):
+        """Finest grid adaptive sampling can reach.
 
         Returns:
-            None
+            tuple: St_h values, Xt values, index spacing of the coarse grid.
+        """
+        spacing = 2**self.adaptive_depth
+        n = (self.adaptive_steps-1)*spacing+1
+
+        St_h_lattice = np.linspace(self.St_h_lower, self.St_h_upper, n)
+        Xt_lattice = np.linspace(self.Xt_lower, self.Xt_upper, n)
+
+        return St_h_lattice, Xt_lattice, spacing
+
+    def refine(self, runner=None):
+        """Adaptive sampling. Splits grid cells whose corner static margins bracket
+        SM_ideal±tolerance into 4 and analyses the new corners, until every such cell
+        spans less than adaptive_accuracy in SM or reaches the finest lattice.
+
+        Args:
+            runner (optional): Open runner (see runner), left open. Defaults to a new one per round.
         """
-        case, plane = tasks
+        St_h_lattice, Xt_lattice, spacing = self.lattice
+        n = len(St_h_lattice)
+
+        cells = [(i, i+spacing, j, j+spacing)
+                 for i in range(0, n-1, spacing) for j in range(0, n-1, spacing)]
+
+        while len(cells) > 0:
+            split = []
+            for i0, i1, j0, j1 in cells:
+                sms = [self.points[corner].sm for corner in
+                       ((i0, j0), (i0, j1), (i1, j0), (i1, j1))]
+                if min(sms) > self.sm_ideal+self.tolerance or max(sms) < self.sm_ideal-self.tolerance:
+                    continue  # Contour doesn't pass through this cell
+                if max(sms)-min(sms) <= self.adaptive_accuracy or i1-i0 == 1:
+                    continue  # Resolved
+
+                im, jm = (i0+i1)//2, (j0+j1)//2
+                split += [(i0, im, j0, jm), (i0, im, jm, j1),
+                          (im, i1, j0, jm), (im, i1, jm, j1)]
+
+            new = sorted({corner for i0, i1, j0, j1 in split
+                          for corner in ((i0, j0), (i0, j1), (i1, j0), (i1, j1))
+                          if corner not in self.points})
+            if len(new) == 0:
+                break
+
+            planes = self.make_lattice_planes(new)
+            self.evaluate(planes, runner)
+            self.planes += planes
+
+            cells = split
+
+        print(f"[Info] Adaptive sampling: {len(self.planes)} AVL runs "
+              f"({n**2} for the equivalent uniform grid).")
+
+    def active_learning(self, runner=None):
+        """Surrogate sampling. Fits a GP to static margin and sends the lattice points
+        where SM_ideal is least certain to AVL in batches of surrogate_batch, until the
+        surrogate is within adaptive_accuracy wherever SM_ideal could be or surrogate_runs
+        AVL runs have been used.
 
+        Args:
+            runner (optional): Open runner (see runner), left open. Defaults to a new one per round.
+        """
+        St_h_lattice, Xt_lattice, spacing = self.lattice
+        candidates = [(i, j) for i in range(len(St_h_lattice)) for j in range(len(Xt_lattice))]
+        surrogate = Surrogate((self.St_h_lower, self.Xt_lower),
+                              (self.St_h_upper, self.Xt_upper))
+
+        def coordinates(points):
+            return np.array([(St_h_lattice[i], Xt_lattice[j]) for i, j in points])
+
+        while len(self.planes) < self.surrogate_runs:
+            X = np.column_stack((self.table.St_h, self.table.Xt))
+            y = self.table.sm.copy()
+            surrogate.fit(X, y)
+            length = surrogate.length
+
+            remaining = [point for point in candidates if point not in self.points]
+            if len(remaining) == 0:
+                break
+
+            # Keep going until at least one AVL run confirms a configuration
+            found = np.isclose(self.table.sm, self.sm_ideal, atol=self.tolerance).any()
+
+            batch = []
+            for _ in range(min(self.surrogate_batch, self.surrogate_runs-len(self.planes), len(remaining))):
+                mean, std = surrogate.predict(coordinates(remaining))
+                # Straddle: uncertain points that could be on the SM_ideal contour
+                score = 1.96*std-np.abs(mean-self.sm_ideal)
+                best = int(np.argmax(score))
+                if len(batch) == 0 and found == True:
+                    near = np.abs(mean-self.sm_ideal) <= self.tolerance+1.96*std
+                    if near.any() == False or std[near].max() <= self.adaptive_accuracy:
+                        break  # Converged
+                batch.append(remaining.pop(best))
+
+                # Pretend the surrogate was right so the rest of the batch spreads out
+                X = np.vstack((X, coordinates([batch[-1]])))
+                y = np.append(y, mean[best])
+                surrogate.fit(X, y, length)
+
+            if len(batch) == 0:
+                break
+
+            planes = self.make_lattice_planes(batch)
+            self.evaluate(planes, runner)
+            self.planes += planes
+
+        print(f"[Info] Surrogate sampling: {len(self.planes)} AVL runs.")
+
+    def solve_Xt(self, runner=None):
+        """Root finding. Solves SM(Xt) = SM_ideal for every St_h with a bracketed
+        secant (Illinois) search between the Xt limits. Every St_h takes one step
+        per round and each round is one batch of AVL runs, so all areas are solved
+        concurrently. Converged planes are kept in self.roots.
+
+        Args:
+            runner (optional): Open runner (see runner), left open. Defaults to a new one per round.
+        """
+        brackets = []
+        self.roots = []
+        for lower, upper in zip(self.planes[0::2], self.planes[1::2]):
+            f_lower = lower.sm-self.sm_ideal
+            f_upper = upper.sm-self.sm_ideal
+            if abs(f_lower) <= self.root_accuracy:
+                self.roots.append(lower)
+            elif abs(f_upper) <= self.root_accuracy:
+                self.roots.append(upper)
+            elif f_lower*f_upper > 0:
+                print(
+                    f"\u001b[33m[Warning]\u001b[0m No Xt within limits gives SM_ideal for St_h={round(lower.St_h,2)}.")
+            else:
+                # St_h, [Xt, SM-SM_ideal] at each end, end moved last
+                brackets.append([lower.St_h, lower.Xt, f_lower, upper.Xt, f_upper, 0])
+
+        for _ in range(self.root_iterations):
+            if len(brackets) == 0:
+                break
+
+            brackets = np.array(brackets)
+            St_h, a, f_a, b, f_b = brackets[:, :5].T
+            planes = self.make_planes(St_h, (a*f_b-b*f_a)/(f_b-f_a))
+            self.evaluate(planes, runner)
+            self.planes += planes
+
+            unsolved = []
+            for bracket, plane in zip(brackets, planes):
+                St_h, a, f_a, b, f_b, side = bracket
+                f = plane.sm-self.sm_ideal
+                if abs(f) <= self.root_accuracy:
+                    self.roots.append(plane)
+                    continue
+
+                # Halving the stale end stops regula falsi stalling on one side
+                if f*f_b > 0:
+                    b, f_b = plane.Xt, f
+                    if side == -1:
+                        f_a /= 2
+                    side = -1
+                else:
+                    a, f_a = plane.Xt, f
+                    if side == 1:
+                        f_b /= 2
+                    side = 1
+                unsolved.append([St_h, a, f_a, b, f_b, side])
+            brackets = unsolved
+
+        if len(brackets) > 0:
+            print(
+                f"\u001b[33m[Warning]\u001b[0m {len(brackets)} tail areas not converged after {self.root_iterations} iterations.")
+
+        print(f"[Info] Root finding: {len(self.planes)} AVL runs, "
+              f"{len(self.roots)}/{len(self.St_h_range)} tail areas solved.")
+
+    def envelope(self, curve_fit=None):
+        """Static margin of every configuration at every loading (loadings: in tail.config).
+        Neutral points don't depend on the CG or mass, so no more AVL runs are needed.
+
+        Args:
+            curve_fit (CurveFit, optional): Fit to slice for each loading's tail curve. Defaults to a fit of the analysed planes.
+
+        Returns:
+            pd.DataFrame: Tail configuration, neutral point, SM at each loading, smallest SM and
+                the CG range keeping SM within SM_ideal ± tolerance.
+        """
+        if self.calc_cg == True:
+            print("\u001b[31m[Error]\u001b[0m The CG envelope needs a CG location.")
+            exit()
+
+        table = self.table
+        Xcgs = np.array([Xcg for Xcg, mass in self.loadings])
+        # (loadings, planes)
+        self.loading_sm = table.static_margins(Xcgs)
+        aft, forward = table.cg_limits([self.sm_ideal-self.tolerance, self.sm_ideal+self.tolerance])
+
+        columns = {
+            "Plane ID": np.arange(len(table)).astype(str),
+            "Xt (Lunit)": table.Xt,
+            "Lt (Lunit)": table.Lt,
+            "Sh (Lunit^2)": table.St_h,
+            "Sv (Lunit^2)": table.St_v,
+            "Xnp (Lunit)": table.np,
+        }
+        for (Xcg, mass), sm in zip(self.loadings, self.loading_sm):
+            columns[f"SM ({Xcg:g} Lunit, {mass:g} kg)"] = sm
+        columns["Min SM"] = self.loading_sm.min(axis=0)
+        columns["Xcg fwd (Lunit)"] = forward
+        columns["Xcg aft (Lunit)"] = aft
+        self.loading_df = pd.DataFrame(columns)
+
+        # SM at another CG is the fitted SM shifted by (Xcg-self.Xcg)/mac, so each loading's
+        # SM_ideal curve is a slice of the same fit
+        if curve_fit is None:
+            curve_fit = CurveFit(table, self.sm_ideal)
+        self.loading_curves = None
+        if curve_fit.unstable == False:
+            self.loading_curves = curve_fit.slices(self.sm_ideal+(Xcgs-self.Xcg)/table.mac)
+
+        return self.loading_df
+
+    def trim(self, curve_fit=None):
+        """Trims the tail configurations on the SM_ideal curve (CurveFit.curve_fit_slice) at trim_CL.
+        Each configuration gets an 'elevator' control on its tail sections, hinged at trim_hinge
+        (0 moves the whole tail, i.e. incidence), and AVL's constraints set alpha for CL = trim_CL
+        and the elevator for Cm = 0. All configurations run as one batch on the AVL pool.
+
+        Args:
+            curve_fit (CurveFit, optional): Fit to slice. Defaults to a fit of the analysed planes.
+
+        Returns:
+            pd.DataFrame: Tail configuration, trim deflection, trimmed alpha, CL & CD and static margin.
+        """
+        if self.trim_CL is None:
+            print("\u001b[31m[Error]\u001b[0m trim_CL must be set in the config file to trim.")
+            exit()
+        if self.calc_cg == True:
+            print("\u001b[31m[Error]\u001b[0m Trim needs a CG location.")
+            exit()
+
+        if curve_fit is None:
+            curve_fit = CurveFit(self.table, self.sm_ideal)
+        Lt, St_h, St_v = curve_fit.curve_fit_slice()
+
+        keep = np.isfinite(Lt) & (Lt > 0)
+        chords, spans = self.tail_size(St_h[keep])
+        Xt = Lt[keep]-0.25*chords + self.Xw_root+0.25*self.Cw_root  # make_planes' Lt, reversed
+
+        control = Control("elevator", Xhinge=self.trim_hinge)
+        self.trim_table = PlaneTable(capacity=len(Xt),
+                                     **{name: getattr(self.table, name) for name in PlaneTable.CONSTANTS})
+        planes = self.make_planes(St_h[keep], Xt, self.trim_table, control)
+        index = self.control_index(planes[0].geom_file, control.name)
+
+        for plane in self.stream(planes, len(planes), lambda plane: self.trim_job(self.case, plane, index)):
+            pass
+
+        listings = [plane.read_results() for plane in planes]
+        st = [output.read_st(listing) for listing in listings]
+        table = self.trim_table
+        self.trimmed = pd.DataFrame({
+            "Plane ID": np.arange(len(table)).astype(str),
+            "Xt (Lunit)": table.Xt,
+            "Lt (Lunit)": table.Lt,
+            "Sh (Lunit^2)": table.St_h,
+            "Sv (Lunit^2)": table.St_v,
+            "Trim (deg)": [output.read_control(listing, control.name) for listing in listings],
+            "Alpha (deg)": [record.alpha for record in st],
+            "CL": [record.CLtot for record in st],
+            "CD": [record.CDtot for record in st],
+            "Static Margin": table.sm,
+        })
+
+        return self.trimmed
+
+    def control_index(self, geom_file, name):
+        """AVL's number of a control (d1, d2... in OPER), controls are numbered in the order their names first appear.
+
+        Args:
+            geom_file (str): Plane file.
+            name (str): Control name.
+
+        Returns:
+            int: Control number.
+        """
+        with open(geom_file, 'r') as f:
+            lines = [line for line in f if line.strip() != "" and line.lstrip()[0] not in "#!"]
+
+        names = []
+        for line, next_line in zip(lines, lines[1:]):
+            if line.split()[0].upper().startswith("CONT"):
+                control = next_line.split()[0].lower()
+                if control not in names:
+                    names.append(control)
+
+        return names.index(name.lower())+1
+
+    def trim_job(self, case, plane, index):
+        """Creates AVL input string trimming a plane at trim_CL.
+
+        Args:
+            case (Case): Stability case.
+            plane (Plane): Plane with a trim control.
+            index (int): Control number (see control_index).
+
+        Returns:
+            Job: AVL job tagged with the plane.
+        """
+        cmd_str = "load {0}\n".format(plane.geom_file)  # Load plane
+        cmd_str += "case {0}\n".format(case.case_file)  # Load case
+        cmd_str += "oper\n"
+        cmd_str += f"a c {self.trim_CL}\n"  # Alpha gives CL
+        cmd_str += f"d{index} pm 0\n"  # Control gives Cm = 0
+        cmd_str += " x\n"  # Run analysis
+        cmd_str += "st\n"  # View stability derivatives
+
+        plane.results_file = f"{self.scratch}/results/trim-"+plane.name+".txt"
+        if self.stdout == False:
+            cmd_str += plane.results_file+"\n"  # Saves results
+            st_files = [plane.results_file]
+        else:
+            cmd_str += "\n"  # Prints results to screen
+            st_files = []
+
+        return Job(cmd_str, plane.geom_file, case.case_file, st_files, tag=plane)
+
+    def stab_job(self, case, plane):
+        """Creates AVL input string.
+
+        Args:
+            case (Case): Stability case.
+            plane (Plane): Plane to analyse.
+
+        Returns:
+            Job: AVL job tagged with the plane.
+        """
         cmd_str = "load {0}\n".format(plane.geom_file)  # Load plane
-        cmd_str += "case {0}\n".format(case)  # Load case
+        cmd_str += "case {0}\n".format(case.case_file)  # Load case
         cmd_str += "oper\n x\n"  # Run analysis
         cmd_str += "st\n"  # View stability derivatives
 
-        plane.results_file = f"{self.path}/results/"+plane.name+".txt"
-        cmd_str += plane.results_file+"\n"  # Saves results
-        
-        avl_cmd(cmd_str, self.path)
+        plane.results_file = f"{self.scratch}/results/"+plane.name+".txt"
+        if self.stdout == False:
+            cmd_str += plane.results_file+"\n"  # Saves results
+            st_files = [plane.results_file]
+        else:
+            cmd_str += "\n"  # Prints results to screen
+            st_files = []
+
+        return Job(cmd_str, plane.geom_file, case.case_file, st_files, tag=plane)
+
+    def capture(self, plane, st):
+        """Hands parsed ST listing to the plane (and saves it if read from stdout and requested).
 
+        Args:
+            plane (Plane): Plane the listing belongs to.
+            st (list): ST listings from output.split/output.parse.
+        """
+        if len(st) == 0:
+            return None
+
+        plane.results = st[0]
+        if self.stdout == True and self.save_results == True:
+            output.write_st(plane.results_file, plane.results)
+
+    @PROFILER.timed("parse")
     def calc_SM(self, tasks):
         """Calculates static margin for each plane.
 
@@ -480,45 +1151,46 @@ class AutoTail():
 
         if self.calc_cg == False:
 
-            columns = ["Plane ID", "Static Margin", "Xnp (Lunit)", "Xt (Lunit)", "Lt (Lunit)",
-                       "Span (Lunit)", "Chord (Lunit)", "Angle (deg)", "Sh (Lunit^2)", "Sv (Lunit^2)", "ARh"]
-            solutions = []
-            for plane in self.planes:
-                if np.isclose(plane.sm, plane.sm_ideal, atol=self.tolerance) == True:
-                    solutions.append([
-                        plane.name.split("-")[0],
-                        plane.sm,
-                        plane.np,
-                        plane.Xt,
-                        plane.Lt,
-                        plane.b_th,
-                        plane.c_t,
-                        plane.theta,
-                        plane.St_h,
-                        plane.St_v,
-                        plane.ARh,
-                    ])
-
-            solutions_df = pd.DataFrame(solutions, columns=columns)
+            table = self.table
+            solved = np.isclose(table.sm, self.sm_ideal, atol=self.tolerance)
+            solutions_df = pd.DataFrame({
+                "Plane ID": np.flatnonzero(solved).astype(str),
+                "Static Margin": table.sm[solved],
+                "Xnp (Lunit)": table.np[solved],
+                "Xt (Lunit)": table.Xt[solved],
+                "Lt (Lunit)": table.Lt[solved],
+                "Span (Lunit)": table.b_th[solved],
+                "Chord (Lunit)": table.c_t[solved],
+                "Angle (deg)": table.theta[solved],
+                "Sh (Lunit^2)": table.St_h[solved],
+                "Sv (Lunit^2)": table.St_v[solved],
+                "ARh": table.ARh,
+            })
             solutions_df = solutions_df.round(2)
 
             if self.config == 0:
                 solutions_df = solutions_df[[
                     "Plane ID", "Static Margin", "Xnp (Lunit)", "Xt (Lunit)", "Lt (Lunit)", "Sh (Lunit^2)", "Sv (Lunit^2)", "ARh"]]
 
-            curve_fit = CurveFit(self.planes, self.sm_ideal)
+            curve_fit = CurveFit(self.table, self.sm_ideal)
             if curve_fit.unstable==False:
                 print(
                     "Consider refining limits around possible configurations.\n")
 
-            print(f"np: {self.Xcg-(self.planes[0].mac*self.sm_ideal)} Lunit")
+            print(f"np: {self.Xcg-(self.table.mac*self.sm_ideal)} Lunit")
 
             if display == True:
                 ##### Generated planes SM results (3D plot) #####
                 x2, y2, z2 = curve_fit.curve_fit_surface()
                 curve_fit.plot_surface(x2, y2, z2)
 
-                if curve_fit.unstable==False:
+                if self.sampling == "root" and len(self.roots) > 0:
+                    # Solved directly, no curve fit needed
+                    roots = sorted(self.roots, key=lambda plane: plane.St_h)
+                    curve_fit.plot_slice(np.array([plane.Lt for plane in roots]),
+                                         np.array([plane.St_h for plane in roots]),
+                                         np.array([plane.St_v for plane in roots]))
+                elif curve_fit.unstable==False:
                     Lt, St_h, St_v = curve_fit.curve_fit_slice()
                     curve_fit.plot_slice(Lt, St_h, St_v)
 
@@ -529,29 +1201,28 @@ class AutoTail():
 
         elif self.calc_cg == True:
 
-            columns = ["Plane ID", "Xcg (Lunit)",
-                       "np (Lunit)", "Static Margin"]
-            solutions = []
-            for plane in self.planes:
-                solutions.append(
-                    [plane.name.split("-")[0], plane.Xcg, plane.np, self.sm_ideal])
-
-            solutions_df = pd.DataFrame(solutions, columns=columns)
+            table = self.table
+            solutions_df = pd.DataFrame({
+                "Plane ID": np.arange(len(table)).astype(str),
+                "Xcg (Lunit)": table.Xcg,
+                "np (Lunit)": table.np,
+                "Static Margin": self.sm_ideal,
+            })
             solutions_df = solutions_df.round(2)
 
             if display == True:
                 fig = plt.figure()
                 ax = fig.add_subplot(projection='3d')
 
-                x = [plane.St_h for plane in self.planes]
-                y = [plane.Lt for plane in self.planes]
-                z = [plane.np for plane in self.planes]
+                x = table.St_h
+                y = table.Lt
+                z = table.np
 
                 ax.scatter(x, y, z)
 
                 ax.set_xlabel("St_h (Lunit^2)")
                 ax.set_ylabel("Xt")
-                ax.set_zlabel(f"Xcg for SM={self.planes[0].sm_ideal}")
+                ax.set_zlabel(f"Xcg for SM={self.sm_ideal}")
 
                 print("\n", solutions_df)
 
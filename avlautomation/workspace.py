@@ -0,0 +1,82 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+
+class Workspace():
+    """
+    Where generated planes, cases and results files are written.
+
+    "local" keeps the original layout (folders next to the config file). "shm" and
+    "temp" put them in a private scratch folder in RAM (/dev/shm) or the system temp
+    folder instead, so a config on a network drive doesn't take a round trip per
+    file. Scratch folders are deleted at exit; the folders listed in keep are copied
+    back next to the config file first.
+    """
+    def __init__(self,path:str,folders:tuple,backend:str="local",keep:str="N"):
+        """
+        Arguments:
+            path {string} -- Config file directory.
+            folders {tuple[string]} -- Folders to create (wiped if they already exist).
+            backend {string} -- local, shm or temp.
+            keep {string} -- Scratch folders copied back at exit: N, results or all.
+        """
+        self.path=path
+        self.folders=folders
+        self.backend=backend
+        self.keep=keep
+        self.closed=False
+
+        if backend=="local":
+            self.root=path
+        elif backend=="shm" or backend=="temp":
+            directory=None
+            if backend=="shm":
+                if os.path.isdir("/dev/shm")==True:
+                    directory="/dev/shm"
+                else:
+                    print("\u001b[33m[Warning]\u001b[0m /dev/shm not available, using temp folder for workspace.")
+            self.root=tempfile.mkdtemp(prefix="avlautomation-",dir=directory)
+            atexit.register(self.close)
+        else:
+            print(f"\u001b[31m[Error]\u001b[0m Unknown workspace '{backend}' (local, shm or temp).")
+            exit()
+
+        try:
+            for folder in folders:
+                if os.path.isdir(self.folder(folder))==True:
+                    shutil.rmtree(self.folder(folder))
+                os.mkdir(self.folder(folder))
+        except PermissionError:
+            raise PermissionError("Close all results, geometry, case files")
+
+        return None
+
+    def folder(self,name:str)->str:
+        return f"{self.root}/{name}"
+
+    def save(self)->None:
+        """Copies the kept folders back next to the config file."""
+        if self.root==self.path:
+            return None
+
+        folders=self.folders if self.keep=="all" else [folder for folder in self.folders if folder==self.keep]
+        for folder in folders:
+            destination=f"{self.path}/{folder}"
+            if os.path.isdir(destination)==True:
+                shutil.rmtree(destination)
+            shutil.copytree(self.folder(folder),destination)
+
+        return None
+
+    def close(self)->None:
+        """Saves kept folders and deletes the scratch folder."""
+        if self.closed==True or self.root==self.path:
+            return None
+        self.closed=True
+
+        self.save()
+        shutil.rmtree(self.root,ignore_errors=True)
+
+        return None
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Stand-in for avl.exe so the runners can be benchmarked without AVL.
+
+Understands the keystroke scripts avlautomation sends (LOAD, CASE, OPER > A A / A C /
+D<n> PM / X / ST, MODE > N / W, QUIT) and prints/writes listings in AVL's layout. Coefficients come from
+a crude lifting-line estimate of the loaded geometry so neutral points and static
+margins move with the tail like the real thing. Not a flow solver.
+
+Environment variables:
+    FAKE_AVL_LATENCY       Seconds each solve (X, MODE > N) takes.
+    FAKE_AVL_FAILURE_RATE  Chance (0-1) a solve kills the process, to exercise retries.
+    FAKE_AVL_STARTUP       Seconds taken to start.
+
+benchmarks/suite.py copies this file into its workspace as avl.exe.
+"""
+import math
+import os
+import random
+import sys
+import time
+
+LATENCY = float(os.environ.get("FAKE_AVL_LATENCY", "0"))
+FAILURE_RATE = float(os.environ.get("FAKE_AVL_FAILURE_RATE", "0"))
+STARTUP = float(os.environ.get("FAKE_AVL_STARTUP", "0"))
+
+
+def out(text=""):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def prompt(text):
+    out(text)
+    line = sys.stdin.readline()
+    if not line:
+        sys.exit(0)
+    return line.strip()
+
+
+def read_geometry(file):
+    """Reference dimensions, the sections of each surface and the control names."""
+    lines = [line for line in open(file) if line.strip() and not line.lstrip().startswith(("#", "!"))]
+    sref, cref, bref = map(float, lines[3].split()[:3])
+    xref = float(lines[4].split()[0])
+
+    surfaces = []
+    controls = []
+    for i, line in enumerate(lines):
+        words = line.split()
+        if words[0].upper().startswith("SURF"):
+            surfaces.append({"name": lines[i+1].strip(), "sections": []})
+        elif words[0].upper().startswith("SECT") and len(surfaces) > 0:
+            surfaces[-1]["sections"].append(list(map(float, lines[i+1].split()[:4])))
+        elif words[0].upper().startswith("CONT") and lines[i+1].split()[0] not in controls:
+            controls.append(lines[i+1].split()[0])
+
+    return sref, cref, bref, surfaces, xref, controls
+
+
+def solve(geometry, alpha, xcg=None, cl_target=None, trim=None):
+    """Coefficients at alpha, or at the alpha giving cl_target. trim is the number of
+    the control set for Cm = 0 (D<n> PM 0)."""
+    sref, cref, bref, surfaces, xref, controls = geometry
+
+    moment = 0
+    area_total = 0
+    dihedral = 0
+    for surface in surfaces:
+        sections = surface["sections"]
+        area = 0
+        xac = 0
+        for a, b in zip(sections, sections[1:]):
+            span = math.hypot(b[1]-a[1], b[2]-a[2])
+            strip = 0.5*(a[3]+b[3])*span
+            area += strip
+            xac += strip*(0.5*(a[0]+b[0])+0.25*0.5*(a[3]+b[3]))
+            if span > 0 and surface["name"] == "Main Wing":
+                dihedral += strip*(b[2]-a[2])/span
+        if area == 0:
+            continue
+        xac /= area
+        efficiency = 1.0 if surface["name"] == "Main Wing" else 0.55   # downwash
+        moment += xac*area*efficiency
+        area_total += area*efficiency
+
+    xnp = moment/area_total if area_total else 0
+    cla = 5.0*area_total/sref if sref else 5.0
+    if cl_target is not None:
+        alpha = math.degrees((cl_target-0.25)/cla)
+    cl = cla*math.radians(alpha)+0.25
+    cd = 0.02+cl*cl/(math.pi*0.9*bref*bref/sref)
+
+    # Pitching moment about the CG, each degree of trim control adds cmd
+    cm = 0.05-(xnp-(xref if xcg is None else xcg))/cref*cl
+    cmd = -0.02
+    deflections = [0.0]*len(controls)
+    if trim is not None and 0 < trim <= len(controls):
+        deflections[trim-1] = -cm/cmd
+        cm = 0.0
+        cd += 2e-5*deflections[trim-1]**2
+    clb = -0.02-0.8*dihedral/sref-0.0005*alpha
+    cnb = 0.06+0.0002*alpha
+    clr = 0.05+0.15*cl
+    cnr = -0.01-0.02*cl*cl
+    clp = -0.45-0.01*alpha
+
+    return dict(alpha=alpha, cl=cl, cd=cd, xnp=xnp, clb=clb, cnb=cnb, clr=clr, cnr=cnr, clp=clp,
+                cla=cla, sref=sref, cref=cref, bref=bref, spiral=(clb*cnr)/(clr*cnb), cm=cm,
+                controls=list(zip(controls, deflections)))
+
+
+def st_listing(r):
+    f = lambda value: f"{value:10.5f}"
+    lines = [
+        " ---------------------------------------------------------------",
+        " Vortex Lattice Output -- Total Forces", "",
+        " Configuration: fake",
+        "     # Surfaces =   4", "     # Strips   =  52", "     # Vortices = 520", "",
+        f"  Sref = {r['sref']:11.5E}   Cref = {r['cref']:9.4f}   Bref = {r['bref']:9.4f}",
+        "  Xref =  400.00       Yref =  0.0000      Zref =  0.0000", "",
+        " Standard axis orientation,  X fwd, Z down", "",
+        " Run case:  -unnamed-", "",
+        f"  Alpha = {f(r['alpha'])}     pb/2V =  -0.00000     p'b/2V =  -0.00000",
+        "  Beta  =   0.00000     qc/2V =   0.00000",
+        "  Mach  =     0.000     rb/2V =  -0.00000     r'b/2V =  -0.00000", "",
+        "  CXtot =   0.00000     Cltot =  -0.00000     Cl'tot =  -0.00000",
+        f"  CYtot =   0.00000     Cmtot = {f(r['cm'])}",
+        "  CZtot =   0.00000     Cntot =  -0.00000     Cn'tot =  -0.00000", "",
+        f"  CLtot = {f(r['cl'])}",
+        f"  CDtot = {f(r['cd'])}",
+        f"  CDvis =   0.00000     CDind = {f(r['cd']-0.02)}",
+        f"  CLff  = {f(r['cl'])}     CDff  = {f(r['cd']-0.02)}    | Trefftz",
+        "  CYff  =   0.00000         e =    0.9000    | Plane", "",
+        *(f"  {name:<16}= {f(value)}" for name, value in r["controls"]),
+        " ---------------------------------------------------------------", "",
+        " Stability-axis derivatives...", "", "",
+        "                             alpha                beta",
+        "                  ----------------    ----------------",
+        f" z' force CL |    CLa = {f(r['cla'])}    CLb =   0.00000",
+        " y  force CY |    CYa =   0.00000    CYb =  -0.00541",
+        f" x' mom.  Cl'|    Cla =   0.00000    Clb = {f(r['clb'])}",
+        " y  mom.  Cm |    Cma =  -1.59540    Cmb =   0.00000",
+        f" z' mom.  Cn'|    Cna =   0.00000    Cnb = {f(r['cnb'])}", "",
+        "                     roll rate  p'      pitch rate  q'        yaw rate  r'",
+        "                  ----------------    ----------------    ----------------",
+        " z' force CL |    CLp =   0.00000    CLq =   8.40000    CLr =   0.00000",
+        " y  force CY |    CYp =   0.01000    CYq =   0.00000    CYr =   0.00500",
+        f" x' mom.  Cl'|    Clp = {f(r['clp'])}    Clq =   0.00000    Clr = {f(r['clr'])}",
+        " y  mom.  Cm |    Cmp =   0.00000    Cmq = -12.00000    Cmr =   0.00000",
+        f" z' mom.  Cn'|    Cnp =  -0.01000    Cnq =   0.00000    Cnr = {f(r['cnr'])}", "",
+        f" Neutral point  Xnp = {r['xnp']:11.6f}", "",
+        f" Clb Cnr / Clr Cnb  = {r['spiral']:11.6f}    (  > 1 if spirally stable )", "",
+    ]
+    return "\n".join(lines)+"\n"
+
+
+def eigenvalues(r):
+    a = r["alpha"]
+    return [(-0.35-0.01*a, 2.8), (-0.35-0.01*a, -2.8), (-11.0+r["clp"], 0.0), (-6.0, 7.5), (-6.0, -7.5),
+            (-0.02+0.01*(r["spiral"]-1), 0.0), (-0.05, 0.6), (-0.05, -0.6)]
+
+
+def write(file, text):
+    mode = "w"
+    if os.path.exists(file):
+        choice = prompt(" File exists.  Append/Overwrite/Cancel  (A/O/C)?  C>  ").upper()[:1]
+        if choice in ("", "C"):
+            return
+        mode = "a" if choice == "A" else "w"
+    with open(file, mode) as f:
+        f.write(text)
+
+
+def slow_solve():
+    if LATENCY:
+        time.sleep(LATENCY)
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        out("\n ** Fake AVL failure\n")
+        os._exit(3)
+
+
+def oper(state):
+    while True:
+        line = prompt("\n .OPER (case 1/1)   c>  ")
+        words = line.split()
+        if len(words) == 0:
+            return
+        command = words[0].upper()
+        argument = line[len(words[0]):].strip()
+
+        if command == "O":
+            while prompt("\n .OPTI   c>  "):
+                pass
+        elif command == "A" and len(words) >= 3:
+            if words[1].upper() == "C":
+                state["cl_target"] = float(words[2])
+            else:
+                state["alpha"] = float(words[2])
+                state["cl_target"] = None
+        elif command.startswith("D") and command[1:].isdigit() and len(words) >= 3:
+            state["trim"] = int(command[1:]) if words[1].upper() == "PM" else None
+        elif command == "X":
+            if state["geometry"] is None:
+                out("\n ** No configuration available\n")
+                continue
+            slow_solve()
+            state["result"] = solve(state["geometry"], state["alpha"], state["xcg"],
+                                    state["cl_target"], state["trim"])
+            out("".join(st_listing(state["result"]).splitlines(True)[:29+len(state["result"]["controls"])]))
+        elif command == "ST":
+            if state["result"] is None:
+                out("\n ** Compute a flow solution first\n")
+                continue
+            file = argument or prompt("\n Enter filename, or <return> for screen output   s>  ")
+            if file:
+                write(file, st_listing(state["result"]))
+            else:
+                out(st_listing(state["result"]))
+        else:
+            out(f"\n {command[:4]} command not recognized.  Type a \"?\" for menu\n")
+
+
+def mode(state):
+    while True:
+        line = prompt("\n .MODE   c>  ")
+        words = line.split()
+        if len(words) == 0:
+            return
+        command = words[0].upper()
+        argument = line[len(words[0]):].strip()
+
+        if command == "N" and state["geometry"] is not None:
+            slow_solve()
+            state["result"] = state["result"] or solve(state["geometry"], state["alpha"], state["xcg"])
+            state["eig"] = eigenvalues(state["result"])
+            out("\n Run case  1:  -unnamed-\n")
+            for k, (re, im) in enumerate(state["eig"]):
+                out(f"   mode {k+1}:  {re:12.5f} {im:12.5f}\n")
+        elif command == "W":
+            file = argument or prompt("\n Enter eigenvalue filename: ")
+            if state["eig"] and file:
+                text = "# AVL eigenvalues\n#\n#   run case   Re   Im\n"
+                text += "".join(f"   1   {re:13.6E}  {im:13.6E}\n" for re, im in state["eig"])
+                write(file, text)
+
+
+def main():
+    if STARTUP:
+        time.sleep(STARTUP)
+    out("\n ===================================================\n"
+        "  Athena Vortex Lattice  Program      Version  3.36 (fake)\n"
+        " ===================================================\n\n")
+
+    state = {"geometry": None, "alpha": 0.0, "result": None, "eig": None,
+             "xcg": None, "cl_target": None, "trim": None}
+    while True:
+        line = prompt("\n AVL   c>  ")
+        words = line.split()
+        if len(words) == 0:
+            continue
+        command = words[0].upper()[:4]
+        argument = line[len(words[0]):].strip()
+
+        if command in ("QUIT", "Q"):
+            sys.exit(0)
+        elif command == "LOAD":
+            file = argument or prompt(" Enter input filename: ")
+            try:
+                state["geometry"] = read_geometry(file)
+                state["result"] = None
+                state["cl_target"] = None
+                state["trim"] = None
+                out(f"\n Reading file: {file}  ...\n")
+            except OSError:
+                out(f"\n ** Open error on file: {file}\n")
+        elif command == "CASE":
+            file = argument or prompt(" Enter run case filename: ")
+            try:
+                for case_line in open(file):
+                    if "alpha" in case_line and "->" in case_line:
+                        state["alpha"] = float(case_line.split("=")[-1])
+                    elif case_line.strip().startswith("X_cg"):
+                        state["xcg"] = float(case_line.split("=")[1].split()[0])
+            except OSError:
+                out(f"\n ** Open error on file: {file}\n")
+        elif command == "OPER":
+            oper(state)
+        elif command == "MODE":
+            mode(state)
+        else:
+            out(f"\n {command:4s} command not recognized.  Type a \"?\" for menu\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Plane generation: geometry.Template against the old copy/marker/pop/insert loop.
+
+    py benchmarks/geometry_benchmark.py example/example_plane.avl -n 100000
+"""
+import argparse
+import copy
+import os
+import tempfile
+import time
+
+from avlautomation.geometry import Plane, Section
+
+
+def marker_loop(file_str, mod_str, file):
+    """What AutoTail/Dihedral.generate_planes did before geometry.Template."""
+    mod_geom = copy.copy(file_str)
+    for index, line in enumerate(mod_geom):
+        if line == "MARKER\n":
+            mod_geom.pop(index)
+            mod_geom.insert(index, mod_str)
+    with open(file, 'w') as f:
+        f.write("".join(mod_geom))
+
+
+def bench(write, n, directory):
+    start = time.perf_counter()
+    for i in range(n):
+        mod_str = str(Section(1000+i % 500, 0, 0, 200, 10, -1, "tail.dat")) + \
+            str(Section(1000+i % 500, 400, 0, 200, 10, -2, "tail.dat"))
+        write(mod_str, os.path.join(directory, f"{i}.avl"))
+    return n/(time.perf_counter()-start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plane generation benchmark.")
+    parser.add_argument('plane', help="Reference .avl file (with an 'Elevator' surface).")
+    parser.add_argument('-n', '--planes', type=int, default=10000, help="Planes generated per method.")
+    args = parser.parse_args()
+
+    plane = Plane(name="REF")
+    plane.read(args.plane)
+    try:
+        plane.strip_section("Elevator")
+    except KeyError:
+        pass
+    template = plane.template()
+
+    with tempfile.TemporaryDirectory() as directory:
+        old = bench(lambda mod_str, file: marker_loop(plane.file_str, mod_str, file), args.planes, directory)
+        new = bench(lambda mod_str, file: template.write(file, mod_str), args.planes, directory)
+
+    print(f" marker loop: {old:10.0f} planes/s")
+    print(f"    template: {new:10.0f} planes/s")
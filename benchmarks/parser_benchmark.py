@@ -0,0 +1,98 @@
+"""
+Parser throughput: output.read_st (label based) against the old fixed line reader.
+
+    py benchmarks/parser_benchmark.py                 # built-in sample listing
+    py benchmarks/parser_benchmark.py results/*.txt   # your own ST files
+"""
+import argparse
+import time
+
+from avlautomation import output
+
+SAMPLE = """ ---------------------------------------------------------------
+ Vortex Lattice Output -- Total Forces
+
+ Configuration: fake
+     # Surfaces =   4
+     # Strips   =  52
+     # Vortices = 520
+
+  Sref = 7.80000E+05   Cref =  312.0000   Bref = 2500.0000
+  Xref =  400.00       Yref =  0.0000      Zref =  0.0000
+
+ Standard axis orientation,  X fwd, Z down
+
+ Run case:  -unnamed-
+
+  Alpha =    5.00000     pb/2V =  -0.00000     p'b/2V =  -0.00000
+  Beta  =   0.00000     qc/2V =   0.00000
+  Mach  =     0.000     rb/2V =  -0.00000     r'b/2V =  -0.00000
+
+  CXtot =   0.00000     Cltot =  -0.00000     Cl'tot =  -0.00000
+  CYtot =   0.00000     Cmtot =   0.00000
+  CZtot =   0.00000     Cntot =  -0.00000     Cn'tot =  -0.00000
+
+  CLtot =    0.50770
+  CDtot =    0.03138
+  CDvis =   0.00000     CDind =    0.01138
+  CLff  =    0.50770     CDff  =    0.01138    | Trefftz
+  CYff  =   0.00000         e =    0.9000    | Plane
+
+ ---------------------------------------------------------------
+
+ Stability-axis derivatives...
+
+
+                             alpha                beta
+                  ----------------    ----------------
+ z' force CL |    CLa =    2.95304    CLb =   0.00000
+ y  force CY |    CYa =   0.00000    CYb =  -0.00541
+ x' mom.  Cl'|    Cla =   0.00000    Clb =   -0.02250
+ y  mom.  Cm |    Cma =  -1.59540    Cmb =   0.00000
+ z' mom.  Cn'|    Cna =   0.00000    Cnb =    0.06100
+
+                     roll rate  p'      pitch rate  q'        yaw rate  r'
+                  ----------------    ----------------    ----------------
+ z' force CL |    CLp =   0.00000    CLq =   8.40000    CLr =   0.00000
+ y  force CY |    CYp =   0.01000    CYq =   0.00000    CYr =   0.00500
+ x' mom.  Cl'|    Clp =   -0.50000    Clq =   0.00000    Clr =    0.12616
+ y  mom.  Cm |    Cmp =   0.00000    Cmq = -12.00000    Cmr =   0.00000
+ z' mom.  Cn'|    Cnp =  -0.01000    Cnq =   0.00000    Cnr =   -0.01516
+
+ Neutral point  Xnp =  623.391198
+
+ Clb Cnr / Clr Cnb  =    0.044311    (  > 1 if spirally stable )
+"""
+
+
+def fixed_lines(text):
+    """What Aero.read_aero/Plane.calc_SM did before output.read_st."""
+    lines = text.splitlines()
+    return (float(lines[23].split()[2]), float(lines[24].split()[2]), float(lines[38].split()[8]),
+            float(lines[46].split()[5]), float(lines[52].split()[6]), float(lines[50].split()[-1]))
+
+
+def bench(parser, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            parser(text)
+    return repeat*len(texts)/(time.perf_counter()-start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ST parser benchmark.")
+    parser.add_argument('files', nargs='*', help="ST results files (defaults to a built-in sample).")
+    parser.add_argument('-n', '--repeat', type=int, default=5000, help="Passes over the files.")
+    args = parser.parse_args()
+
+    texts = [SAMPLE]
+    if len(args.files) > 0:
+        texts = []
+        for file in args.files:
+            with open(file, 'r') as f:
+                texts.append(f.read())
+        args.repeat = max(1, args.repeat//len(texts))
+
+    for name, function in (("read_st", output.read_st), ("fixed lines", fixed_lines)):
+        print(f"{name:>12}: {bench(function, texts, args.repeat):10.0f} listings/s")
@@ -0,0 +1,54 @@
+"""
+Compares spawn-per-case AVL (aero.avl_cmd) with the persistent session pool (pool.AVLPool).
+
+    py benchmarks/pool_benchmark.py ./example ./example/example_plane.avl -n 49 -t 8
+
+Runs the same stability job as AutoTail.stab_job n times each way.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from avlautomation.aero import avl_cmd
+from avlautomation.pool import AVLPool
+
+
+def stab_cmd(geom_file, results_file):
+    cmd_str = f"load {geom_file}\n"
+    cmd_str += "oper\n x\n"
+    cmd_str += "st\n"
+    cmd_str += results_file+"\n"
+    return cmd_str
+
+
+def bench_spawn(path, cmd_strs, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda cmd_str: avl_cmd(cmd_str, path), cmd_strs))
+    return time.perf_counter()-start
+
+
+def bench_pool(path, cmd_strs, threads):
+    start = time.perf_counter()
+    with AVLPool(path, threads) as avl_pool:
+        avl_pool.map(cmd_strs)
+    return time.perf_counter()-start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AVL pool benchmark.")
+    parser.add_argument('path', help="Directory containing avl.exe.")
+    parser.add_argument('plane', help="Plane .avl file.")
+    parser.add_argument('-n', '--cases', type=int, default=49, help="Number of cases.")
+    parser.add_argument('-t', '--threads', type=int, default=os.cpu_count(), help="Worker count.")
+    args = parser.parse_args()
+
+    for name, bench in (("spawn", bench_spawn), ("pool", bench_pool)):
+        with tempfile.TemporaryDirectory() as results:
+            cmd_strs = [stab_cmd(args.plane, f"{results}/{i}.st") for i in range(args.cases)]
+            elapsed = bench(args.path, cmd_strs, args.threads)
+            written = len(os.listdir(results))
+
+        print(f"{name:>6}: {elapsed:8.3f} s  {args.cases/elapsed:8.1f} cases/s  ({written}/{args.cases} results)")
@@ -0,0 +1,232 @@
+"""
+End to end benchmark of the aero, tail and dihedral studies against benchmarks/fake_avl.py.
+
+    py benchmarks/suite.py --workers 1 4 8 --latency 0.05 --save results.json
+    py benchmarks/suite.py --workers 1 4 8 --latency 0.05 --compare results.json
+
+Each study runs in its own process on a copy of ./example with the fake AVL installed
+as avl.exe (POSIX only, it relies on the #! line), with cache and journal turned off.
+Reports AVL cases/s, per case latency percentiles, crashed AVL processes and peak
+memory of the study process for every study and worker count. --save writes the
+results as JSON, --compare prints the change against a saved run.
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+EXAMPLE = os.path.join(ROOT, "example")
+
+STUDIES = ("aero", "tail", "dihedral")
+
+
+def prepare(directory, workers, scheduler):
+    """Example folder with the fake AVL and configs set to the given worker count."""
+    for file in os.listdir(EXAMPLE):
+        if file.endswith((".avl", ".dat", ".config")):
+            shutil.copy(os.path.join(EXAMPLE, file), directory)
+
+    avl = os.path.join(directory, "avl.exe")
+    shutil.copy(os.path.join(BENCHMARKS, "fake_avl.py"), avl)
+    os.chmod(avl, os.stat(avl).st_mode | stat.S_IXUSR)
+
+    #   Optional keys are read last one wins, so appending overrides the example values.
+    options = ["cache: N", "journal: N", f"scheduler: {scheduler}", "workspace: local"]
+    for config in ("aero.config", "tail.config", "dihedral.config"):
+        file = os.path.join(directory, config)
+        with open(file, 'r') as f:
+            text = f.read()
+        text = re.sub(r"^(threads:\s*)\S+", rf"\g<1>{workers}", text, flags=re.M)
+        if config != "dihedral.config":
+            text = text.rstrip("\n")+"\n"+"\n".join(options)+"\n"
+        with open(file, 'w') as f:
+            f.write(text)
+
+
+def instrument(latencies, failures):
+    """
+    Times every AVL job run through AVLPool or Scheduler (pool latencies include
+    retries) and counts the AVL processes that died.
+    """
+    from avlautomation.pool import AVLPool, AVLSession
+    from avlautomation.scheduler import Scheduler
+
+    pool_run = AVLPool.run
+    session_run = AVLSession.run
+    scheduler_avl = Scheduler.avl
+
+    def timed_run(self, cmd_str, timeout=None):
+        start = time.perf_counter()
+        try:
+            return pool_run(self, cmd_str, timeout)
+        finally:
+            latencies.append(time.perf_counter()-start)
+
+    def counted_run(self, cmd_str, timeout=None):
+        try:
+            return session_run(self, cmd_str, timeout)
+        except Exception:
+            failures.append(cmd_str)
+            raise
+
+    async def timed_avl(self, cmd_str, timeout):
+        start = time.perf_counter()
+        try:
+            stdout = await scheduler_avl(self, cmd_str, timeout)
+        except Exception:
+            failures.append(cmd_str)
+            raise
+        finally:
+            latencies.append(time.perf_counter()-start)
+        if "Fake AVL failure" in stdout:
+            failures.append(cmd_str)
+        return stdout
+
+    AVLPool.run = timed_run
+    AVLSession.run = counted_run
+    Scheduler.avl = timed_avl
+
+
+def run_study(study, directory):
+    """Child process: runs one study and prints its measurements as JSON."""
+    import matplotlib
+    matplotlib.use("Agg")
+    sys.path.insert(0, ROOT)
+    os.chdir(directory)
+
+    latencies = []
+    failures = []
+    instrument(latencies, failures)
+
+    from avlautomation.aero import Aero
+    from avlautomation.dihedral import Dihedral
+    from avlautomation.geometry import Plane
+    from avlautomation.tail import AutoTail
+
+    error = None
+    start = time.perf_counter()
+    try:
+        if study == "aero":
+            Aero("./aero.config").run(Plane(geom_file="example_plane.avl"))
+        elif study == "tail":
+            tail = AutoTail("./tail.config")
+            tail.generate_planes()
+            tail.run()
+        elif study == "dihedral":
+            dihedral = Dihedral("./dihedral.config", "./aero.config")
+            dihedral.generate_planes()
+            dihedral.run()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter()-start
+
+    #   ru_maxrss is KiB on Linux, bytes on macOS. Only this process: the AVL children
+    #   are forked from it, so RUSAGE_CHILDREN would just repeat its size.
+    unit = 1 if sys.platform == "darwin" else 1024
+    result = {
+        "elapsed": elapsed,
+        "cases": len(latencies),
+        "failures": len(failures),
+        "latencies": latencies,
+        "peak_memory": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*unit,
+        "error": error,
+    }
+    print("\nRESULT "+json.dumps(result))
+
+
+def bench(study, workers, args):
+    env = dict(os.environ, MPLBACKEND="Agg",
+               FAKE_AVL_LATENCY=str(args.latency),
+               FAKE_AVL_FAILURE_RATE=str(args.failure_rate),
+               FAKE_AVL_STARTUP=str(args.startup))
+
+    with tempfile.TemporaryDirectory(prefix="avlbench-") as directory:
+        prepare(directory, workers, args.scheduler)
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", study, directory],
+                                 env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+    lines = [line for line in process.stdout.splitlines() if line.startswith("RESULT ")]
+    if len(lines) == 0:
+        return {"error": process.stdout[-2000:]}
+    result = json.loads(lines[-1][len("RESULT "):])
+
+    latencies = np.array(result.pop("latencies")) if result["cases"] else np.zeros(1)
+    result["cases_per_s"] = result["cases"]/result["elapsed"]
+    for p in (50, 90, 99):
+        result[f"p{p}"] = float(np.percentile(latencies, p))
+
+    return result
+
+
+def report(results, baseline=None):
+    print(f"\n{'study':>9} {'workers':>7} {'cases':>6} {'fail':>5} {'cases/s':>9} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+    for key, r in results.items():
+        study, workers = key.split("/")
+        if r.get("error") and "cases" not in r:
+            print(f"{study:>9} {workers:>7}  failed: {r['error'].strip().splitlines()[-1]}")
+            continue
+        line = (f"{study:>9} {workers:>7} {r['cases']:>6} {r['failures']:>5} {r['cases_per_s']:>9.1f} "
+                f"{r['p50']*1e3:>8.1f} {r['p90']*1e3:>8.1f} {r['p99']*1e3:>8.1f} "
+                f"{r['peak_memory']/1e6:>8.1f}")
+        if baseline is not None and key in baseline and "cases_per_s" in baseline[key]:
+            change = r["cases_per_s"]/baseline[key]["cases_per_s"]-1
+            line += f"  {change:+7.1%} vs {baseline['label']}"
+        if r.get("error"):
+            line += f"  ({r['error']})"
+        print(line)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        run_study(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="AVL automation benchmark suite (fake AVL).")
+    parser.add_argument('-s', '--studies', nargs='+', choices=STUDIES, default=list(STUDIES), help="Studies to run.")
+    parser.add_argument('-w', '--workers', nargs='+', type=int, default=[1, os.cpu_count()], help="Worker counts.")
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds per fake AVL solve.")
+    parser.add_argument('--failure-rate', type=float, default=0, help="Chance a fake AVL solve crashes.")
+    parser.add_argument('--startup', type=float, default=0, help="Seconds for fake AVL to start.")
+    parser.add_argument('--scheduler', choices=['pool', 'async'], default='pool', help="Config scheduler option.")
+    parser.add_argument('--label', default=None, help="Name stored with saved results (default: git revision).")
+    parser.add_argument('--save', help="Write results to this JSON file.")
+    parser.add_argument('--compare', help="JSON file from an earlier --save to compare against.")
+    args = parser.parse_args()
+
+    label = args.label
+    if label is None:
+        revision = subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"],
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        label = revision.stdout.strip() or "unknown"
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            saved = json.load(f)
+        baseline = dict(saved["results"], label=saved["label"])
+
+    results = {}
+    for study in args.studies:
+        for workers in args.workers:
+            print(f"Running {study} with {workers} workers...", flush=True)
+            results[f"{study}/{workers}"] = bench(study, workers, args)
+
+    report(results, baseline)
+
+    if args.save is not None:
+        settings = {key: getattr(args, key) for key in ("latency", "failure_rate", "startup", "scheduler")}
+        with open(args.save, 'w') as f:
+            json.dump({"label": label, "settings": settings, "results": results}, f, indent=2)
+        print(f"\nSaved to {args.save}")
@@ -0,0 +1,51 @@
+import os
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+
+from avlautomation.aero import Aero
+from avlautomation.sweep import Sweep, Parameter, GeometryMutator
+
+# Tail aspect ratio and incidence sweep at constant tail area (GeometryMutator example).
+#   py tail_geometry_sweep.py ../example/aero.config ../example/example_plane.avl
+aero_config = sys.argv[1] if len(sys.argv) > 1 else "../example/aero.config"
+plane_file = sys.argv[2] if len(sys.argv) > 2 else "../example/example_plane.avl"
+
+#### sweep parameters ####
+tail_name = "Elevator"
+AR = Parameter("AR", lower=3, upper=7, steps=5)
+ainc = Parameter("ainc", values=[-2, -1, 0])
+
+#### geometry edit ####
+aero = Aero(aero_config)
+directory = os.path.join(os.path.dirname(aero_config), "generated planes")
+os.makedirs(directory, exist_ok=True)
+
+def edit(geometry, AR, ainc):
+    tail = geometry.surface(tail_name)
+    root, tip = tail.sections[0], tail.sections[-1]
+    area = 2*(tip.Yle-root.Yle)*root.chord  # both halves (YDUPLICATE), rectangular
+    span = np.sqrt(AR*area)
+    for section in tail.sections:
+        section.chord = round(area/span, 4)
+        section.ainc = ainc
+    tip.Yle = round(root.Yle+span/2, 4)
+
+def measure(plane):
+    return {"Xnp": plane.Xnp[0], "SM": plane.loading_sm[0, 0], "Cl": plane.polars["Cl"].to_numpy()}
+
+#### analysis ####
+mutator = GeometryMutator(plane_file, directory, edit)
+results = Sweep([AR, ainc], mutator).stream(aero.stream_planes, measure)
+
+df = results.to_dataframe()
+print(df.to_string(index=False))
+
+#### plots ####
+for i, value in enumerate(ainc.values):
+    plt.plot(AR.values, results["SM"][:, i], label=f"ainc = {value}°")
+plt.xlabel("Tail aspect ratio")
+plt.ylabel(f"Static margin @ {aero.alpha0}° AoA")
+plt.legend()
+plt.grid(True)
+plt.show()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import stat
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE = os.path.join(ROOT, "example")
+FAKE_AVL = os.path.join(ROOT, "benchmarks", "fake_avl.py")
+
+#   ST listing as AVL prints it (after the "Enter filename" prompt), trimmed to the labelled values.
+ST_LISTING = """ ---------------------------------------------------------------
+ Vortex Lattice Output -- Total Forces
+
+ Run case:  -unnamed-
+
+  Alpha =    5.00000     pb/2V =  -0.00000     p'b/2V =  -0.00000
+  Beta  =   0.00000     qc/2V =   0.00000
+  Mach  =     0.000     rb/2V =  -0.00000     r'b/2V =  -0.00000
+
+  CXtot =   0.01000     Cltot =  -0.00000     Cl'tot =  -0.00000
+  CYtot =   0.00000     Cmtot =   -0.12900
+  CZtot =  -0.50000     Cntot =  -0.00000     Cn'tot =  -0.00000
+
+  CLtot =    0.50000
+  CDtot =    0.03104
+  CDvis =   0.00000     CDind =    0.01104
+  CLff  =    0.50000     CDff  =    0.01104    | Trefftz
+  CYff  =   0.00000         e =    0.9000    | Plane
+
+ ---------------------------------------------------------------
+
+ Stability-axis derivatives...
+
+                             alpha                beta
+                  ----------------    ----------------
+ z' force CL |    CLa =    2.95304    CLb =   0.00000
+ y  force CY |    CYa =   0.00000    CYb =  -0.00541
+ x' mom.  Cl'|    Cla =   0.00000    Clb =   -0.02000
+ y  mom.  Cm |    Cma =  -1.59540    Cmb =   0.00000
+ z' mom.  Cn'|    Cna =   0.00000    Cnb =    0.06000
+
+                     roll rate  p'      pitch rate  q'        yaw rate  r'
+                  ----------------    ----------------    ----------------
+ z' force CL |    CLp =   0.00000    CLq =   8.40000    CLr =   0.00000
+ y  force CY |    CYp =   0.01000    CYq =   0.00000    CYr =   0.00500
+ x' mom.  Cl'|    Clp =   -0.45000    Clq =   0.00000    Clr =    0.08750
+ y  mom.  Cm |    Cmp =   0.00000    Cmq = -12.00000    Cmr =   0.00000
+ z' mom.  Cn'|    Cnp =  -0.01000    Cnq =   0.00000    Cnr =   -0.01125
+
+ Neutral point  Xnp =  623.391198
+
+ Clb Cnr / Clr Cnb  =    0.042857    (  > 1 if spirally stable )
+"""
+
+
+@pytest.fixture
+def example(tmp_path):
+    """Copy of the example plane and aerofoils next to benchmarks/fake_avl.py as avl.exe."""
+    for file in os.listdir(EXAMPLE):
+        if file.endswith((".avl", ".dat")):
+            shutil.copy(os.path.join(EXAMPLE, file), tmp_path)
+
+    avl = tmp_path / "avl.exe"
+    shutil.copy(FAKE_AVL, avl)
+    os.chmod(avl, os.stat(avl).st_mode | stat.S_IXUSR)
+
+    return tmp_path
+
+
+@pytest.fixture
+def listing():
+    return ST_LISTING
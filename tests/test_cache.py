@@ -0,0 +1,195 @@
+import os
+import shutil
+
+from avlautomation.cache import ResultCache
+from avlautomation.journal import Journal
+
+CMD = "load {geom}\ncase {case}\noper\nx\nst\n{st}\n"
+
+
+def job(directory, name="plane"):
+    """Plane, case and command string of a job writing one ST file."""
+    geom = os.path.join(directory, f"{name}.avl")
+    case = os.path.join(directory, f"{name}.run")
+    st = os.path.join(directory, f"{name}.st")
+    if not os.path.isfile(geom):
+        shutil.copy(os.path.join(directory, "example_plane.avl"), geom)
+    with open(case, 'w') as f:
+        f.write("alpha -> alpha = 2\n")
+
+    return CMD.format(geom=geom, case=case, st=st), geom, case, [st]
+
+
+def fake_avl(listing, calls):
+    """Stand-in for AVLPool.run: writes the ST file named in the command string."""
+    def run(cmd_str, **kwargs):
+        calls.append(cmd_str)
+        with open(cmd_str.splitlines()[-1], 'w') as f:
+            f.write(listing)
+        return " AVL   c>  \n"
+    return run
+
+
+def test_key_ignores_file_names(example):
+    cache = ResultCache(str(example / "cache"))
+    first = cache.key(*job(str(example), "a"))
+    second = cache.key(*job(str(example), "b"))
+
+    assert first == second
+
+
+def test_key_changes_with_inputs(example):
+    cache = ResultCache(str(example / "cache"))
+    cmd_str, geom, case, outputs = job(str(example))
+    key = cache.key(cmd_str, geom, case, outputs)
+
+    assert cache.key(cmd_str.replace("x\n", "a a 3\nx\n"), geom, case, outputs) != key
+
+    with open(case, 'a') as f:
+        f.write("beta -> beta = 1\n")
+    assert cache.key(cmd_str, geom, case, outputs) != key
+
+    #   Aerofoils referenced by the plane are part of the job too.
+    with open(example / "example_wing_aerofoil.dat", 'a') as f:
+        f.write("0.5 0.0\n")
+    changed = cache.key(cmd_str, geom, case, outputs)
+    assert changed != key
+    assert changed != cache.key(cmd_str, geom, None, outputs)
+
+
+def test_get_put_round_trip(example):
+    cache = ResultCache(str(example / "cache"))
+    entry = {"stdout": "out", "outputs": ["st text"]}
+
+    assert cache.get("ab12") is None
+    cache.put("ab12", entry)
+
+    assert cache.get("ab12") == entry
+    assert ResultCache(str(example / "cache")).get("ab12") == entry
+    assert cache.size == os.path.getsize(cache.entries()[0])
+
+
+def test_evict_removes_least_recently_used(example):
+    cache = ResultCache(str(example / "cache"))
+    for i, key in enumerate(("aa", "bb", "cc")):
+        cache.put(key, {"stdout": "x"*100, "outputs": []})
+        os.utime(cache._path(key), (i, i))
+    cache.get("aa")     #   Most recently used now.
+
+    cache.max_size = 2.6*os.path.getsize(cache._path("aa"))
+    cache.evict()
+
+    assert cache.get("aa") is not None
+    assert cache.get("bb") is None
+    assert cache.get("cc") is not None
+    assert cache.size <= 0.8*cache.max_size
+
+
+def test_put_evicts_over_max_size(example):
+    cache = ResultCache(str(example / "cache"), max_size=500)
+    for key in ("aa", "bb", "cc", "dd"):
+        cache.put(key, {"stdout": "x"*200, "outputs": []})
+
+    assert len(cache.entries()) < 4
+    assert cache.get("dd") is not None
+
+
+def test_run_replays_results_files(example, listing):
+    cache = ResultCache(str(example / "cache"))
+    cmd_str, geom, case, outputs = job(str(example))
+    calls = []
+    avl = fake_avl(listing, calls)
+
+    assert cache.run(avl, cmd_str, geom, case, outputs) == " AVL   c>  \n"
+    os.remove(outputs[0])
+    assert cache.run(avl, cmd_str, geom, case, outputs) == " AVL   c>  \n"
+
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    with open(outputs[0], 'r') as f:
+        assert f.read() == listing
+
+
+def test_failed_runs_are_not_cached(example):
+    cache = ResultCache(str(example / "cache"))
+    cmd_str, geom, case, outputs = job(str(example))
+
+    cache.run(lambda cmd_str, **kwargs: " ** Error\n", cmd_str, geom, case, outputs)
+    cache.run(lambda cmd_str, **kwargs: " ** Error\n", cmd_str, geom, case)
+
+    assert cache.entries() == []
+
+
+def test_journal_replays_jobs_on_resume(example, listing):
+    file = str(example / "run.journal")
+    cmd_str, geom, case, outputs = job(str(example))
+    calls = []
+
+    journal = Journal(file)
+    journal.run(fake_avl(listing, calls), cmd_str, geom, case, outputs)
+    journal.close()
+    os.remove(outputs[0])
+
+    journal = Journal(file, resume=True)
+    journal.run(fake_avl(listing, calls), cmd_str, geom, case, outputs)
+    journal.close()
+
+    assert len(calls) == 1
+    assert journal.hits == 1
+    with open(outputs[0], 'r') as f:
+        assert f.read() == listing
+
+
+def test_journal_resume_truncates_partial_line(example):
+    file = str(example / "run.journal")
+    journal = Journal(file)
+    journal.put("aa", {"stdout": "first", "outputs": []})
+    journal.close()
+    with open(file, 'ab') as f:
+        f.write(b'{"key": "bb", "stdout": "cut o')
+
+    journal = Journal(file, resume=True)
+    assert list(journal.offsets) == ["aa"]
+    journal.put("cc", {"stdout": "third", "outputs": []})
+    journal.close()
+
+    with open(file, 'rb') as f:
+        lines = f.readlines()
+    assert len(lines) == 2
+    assert all(line.endswith(b"\n") for line in lines)
+    journal = Journal(file, resume=True)
+    assert journal.get("cc") == {"stdout": "third", "outputs": []}
+    assert journal.get("bb") is None
+    journal.close()
+
+
+def test_journal_without_resume_starts_over(example):
+    file = str(example / "run.journal")
+    journal = Journal(file)
+    journal.put("aa", {"stdout": "first", "outputs": []})
+    journal.close()
+
+    journal = Journal(file)
+    journal.close()
+
+    assert os.path.getsize(file) == 0
+    journal = Journal(file, resume=True)
+    assert journal.get("aa") is None
+    journal.close()
+
+
+def test_journal_copies_cache_hits(example, listing):
+    cache = ResultCache(str(example / "cache"))
+    cmd_str, geom, case, outputs = job(str(example))
+    calls = []
+    cache.run(fake_avl(listing, calls), cmd_str, geom, case, outputs)
+
+    journal = Journal(str(example / "run.journal"), cache=cache)
+    journal.run(fake_avl(listing, calls), cmd_str, geom, case, outputs)
+    journal.close()
+
+    assert len(calls) == 1
+    assert journal.misses == 0
+    journal = Journal(str(example / "run.journal"), resume=True)
+    assert len(journal.offsets) == 1
+    journal.close()
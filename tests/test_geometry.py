@@ -0,0 +1,178 @@
+import os
+
+import numpy as np
+import pytest
+
+from avlautomation.avlfile import AVLFile, Section, Body
+from avlautomation.geometry import Plane, PlaneTable, Template
+
+PLANE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example", "example_plane.avl")
+
+#   Layout AVL accepts but the example plane doesn't use: comments, abbreviated
+#   keywords, a control, a body and CRLF line endings.
+ODD_PLANE = (
+    "odd plane\r\n"
+    "! Mach\r\n"
+    "0.1\r\n"
+    "0 0 0.0\r\n"
+    "10.0 1.0 10.0 | Sref Cref Bref\r\n"
+    "0.25 0.0 0.0\r\n"
+    "\r\n"
+    "SURF\r\n"
+    "Wing Left\r\n"
+    "8 1.0 12 1.0\r\n"
+    "NOWAKE\r\n"
+    "SECT\r\n"
+    "  0.0 0.0 0.0 1.0 2.0   ! root\r\n"
+    "CONTROL\r\n"
+    "flap 1.0 0.75 0 0 0 1\r\n"
+    "SECTION\r\n"
+    "  0.1 5.0 0.0 0.8 0.0\r\n"
+    "NACA\r\n"
+    "2412\r\n"
+    "BODY\r\n"
+    "Fuse\r\n"
+    "12 1.0\r\n"
+    "BFIL\r\n"
+    "fuse.dat\r\n"
+    "SURFACE\r\n"
+    "Wing Right\r\n"
+    "8 1.0\r\n"
+    "SECTION\r\n"
+    "0.0 0.0 0.0 1.0 0.0\r\n"
+)
+
+
+def test_avlfile_round_trips_byte_for_byte():
+    with open(PLANE, 'r', newline="") as f:
+        text = f.read()
+
+    assert str(AVLFile.parse(text)) == text
+    assert str(AVLFile.parse(ODD_PLANE)) == ODD_PLANE
+
+
+def test_avlfile_tree():
+    geometry = AVLFile.parse(ODD_PLANE)
+
+    assert [item.name for item in geometry.items] == ["Wing Left", "Fuse", "Wing Right"]
+    assert isinstance(geometry.items[1], Body)
+    assert geometry.reference() == [10.0, 1.0, 10.0]
+
+    wing = geometry.surface("wing  left")
+    root, tip = wing.sections
+    assert (root.Xle, root.Yle, root.chord, root.ainc) == (0.0, 0.0, 1.0, 2.0)
+    assert root.nspan is None
+    assert [control.name for control in root.controls] == ["flap"]
+    assert tip.aerofoil is None
+
+
+def test_section_values_only_rewrite_their_line():
+    geometry = AVLFile.read(PLANE)
+    before = str(geometry).splitlines(True)
+
+    tip = geometry.surface("Elevator").sections[-1]
+    tip.chord = 100
+    tip.ainc = -2
+    after = str(geometry).splitlines(True)
+
+    changed = [i for i, (a, b) in enumerate(zip(before, after)) if a != b]
+    assert len(before) == len(after)
+    assert len(changed) == 1
+    assert AVLFile.parse(after).surface("Elevator").sections[-1].chord == 100.0
+    assert AVLFile.parse(after).surface("Elevator").sections[-1].ainc == -2.0
+
+
+def test_surface_lookup_and_remove():
+    geometry = AVLFile.parse(ODD_PLANE)
+
+    with pytest.raises(KeyError):
+        geometry.surface("Tail")
+
+    geometry.remove("Wing Left")
+    assert [item.name for item in geometry.items] == ["Fuse", "Wing Right"]
+
+    geometry = AVLFile.parse(ODD_PLANE)
+    geometry.remove("wing")     #   First word matches both halves.
+    assert [item.name for item in geometry.items] == ["Fuse"]
+    assert "SURF" not in str(geometry)
+
+    with pytest.raises(KeyError):
+        geometry.remove("Wing")
+
+
+def test_new_section_matches_geometry_section():
+    section = Section.new(1.0, 2.0, 3.0, 4.0, ainc=1.5, nspan=10, sspace=1, aerofoil="tail.dat")
+    parsed = AVLFile.parse("plane\n0\n0 0 0\n1 1 1\n0 0 0\nSURFACE\nTail\n8 1\n" + str(section))
+
+    assert parsed.surface("Tail").sections[0].lines == section.lines
+    assert section.fields == ["1.0", "2.0", "3.0", "4.0", "1.5", "10", "1"]
+    assert section.aerofoil == "tail.dat"
+
+
+def test_template_render_fills_every_slot():
+    template = Template(["a\n", "MARKER\n", "b\n", "c\n", "MARKER\n"])
+
+    assert template.slots == 2
+    assert template.render("s\n") == "a\ns\nb\nc\ns\n"
+    assert Template(["a\n"]).render("s\n") == "a\n"
+
+
+def test_template_write(tmp_path):
+    plane = Plane(geom_file=PLANE)
+    plane.strip_section("Elevator")
+    template = plane.template()
+    file = str(tmp_path / "plane.avl")
+
+    section = str(Section.new(600.0, 0.0, 0.0, 150.0, aerofoil="example_tail_aerofoil.dat"))
+    template.write(file, section)
+
+    with open(file, 'r') as f:
+        text = f.read()
+    assert text == template.render(section)
+    assert template.slots == 1
+    elevator = AVLFile.parse(text).surface("Elevator")
+    assert [s.Xle for s in elevator.sections] == [600.0]
+
+
+def test_plane_strip_surface():
+    plane = Plane(geom_file=PLANE)
+    plane.strip_surface("Fin")
+
+    assert [surface.name for surface in plane.geometry.surfaces] == ["Main Wing", "Elevator"]
+    with pytest.raises(KeyError):
+        plane.strip_surface("Fin")
+
+
+def test_plane_table_rows_and_growth():
+    table = PlaneTable(capacity=2, mac=2.0, Sw=10.0)
+    first = table.append(2, geom_files=["a.avl", "b.avl"], Xt=[1.0, 2.0], St_h=5.0)
+    table.append(3, Xt=np.arange(3.0))
+
+    assert len(table) == 5
+    assert table.Xt.tolist() == [1.0, 2.0, 0.0, 1.0, 2.0]
+    assert table.St_h[:2].tolist() == [5.0, 5.0]
+    assert np.isnan(table.St_h[2:]).all()
+    assert table.geom_files == ["a.avl", "b.avl", None, None, None]
+
+    assert first[1].Xt == 2.0
+    assert first[1].geom_file == "b.avl"
+    assert first[1].mac == 2.0
+    assert table[-1].index == 4
+    with pytest.raises(IndexError):
+        table[5]
+
+    view = table[2]
+    view.np = 7.0
+    view.geom_file = "c.avl"
+    assert table.np[2] == 7.0
+    assert table.geom_files[2] == "c.avl"
+    assert [plane.index for plane in table] == [0, 1, 2, 3, 4]
+
+
+def test_plane_table_static_margins_and_cg_limits():
+    table = PlaneTable(mac=2.0)
+    table.append(2, np=[3.0, 4.0])
+
+    sm = table.static_margins([1.0, 2.0])
+    assert sm.tolist() == [[1.0, 1.5], [0.5, 1.0]]
+    assert table.cg_limits([1.0, 0.5]).tolist() == [[1.0, 2.0], [2.0, 3.0]]
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from avlautomation import output
+
+
+def test_read_st_reads_values_by_label(listing):
+    st = output.read_st(listing)
+
+    assert st.alpha == 5.0
+    assert st.CLtot == 0.5
+    assert st.Cma == -1.5954
+    assert st.Cmq == -12.0
+    assert st.Xnp == pytest.approx(623.391198)
+    assert st.spiral == pytest.approx(0.042857)
+
+
+def test_read_st_accepts_lines(listing):
+    assert output.read_st(listing.splitlines(True)) == output.read_st(listing)
+
+
+def test_read_st_calculates_missing_spiral(listing):
+    listing = listing.split(" Clb Cnr / Clr Cnb")[0]
+    st = output.read_st(listing)
+
+    assert st.spiral == pytest.approx((-0.02*-0.01125)/(0.0875*0.06))
+
+
+def test_read_st_missing_and_overflowing_values_are_nan(listing):
+    listing = listing.replace("Cmq = -12.00000", "Cmq = ********").replace("  Mach  =     0.000", "")
+    st = output.read_st(listing)
+
+    assert np.isnan(st.Cmq)
+    assert np.isnan(st.mach)
+    assert st.CLq == 8.4
+
+
+def test_read_st_fortran_exponents():
+    st = output.read_st(" CLa =  0.29530D+01\n Xnp = 6.2E2\n")
+
+    assert st.CLa == pytest.approx(2.953)
+    assert st.Xnp == 620.0
+
+
+def test_scan_finds_st_and_eigenvalue_blocks(listing):
+    stdout = (
+        " AVL   c>  \n .OPER (case 1/1)   c>  \n"
+        " Enter filename, or <return> for screen output   s>" + listing +
+        " .MODE   c>  \n Run case  1:  -unnamed-\n"
+        "   mode 1:      -0.35000      2.80000\n"
+        "   mode 2:  (  -0.35000 ,    -2.80000 )\n"
+        "\n AVL   c>  \n"
+    )
+    blocks = list(output.scan(stdout))
+
+    assert [kind for kind, _ in blocks] == ["st", "eig"]
+    assert blocks[0][1][0] == " " + listing.splitlines(True)[0].strip() + "\n"
+    assert output.read_st(blocks[0][1]) == output.read_st(listing)
+    assert blocks[1][1] == [(-0.35, 2.8), (-0.35, -2.8)]
+
+
+def test_scan_skips_forces_without_derivatives(listing):
+    forces = listing.split(" Stability-axis derivatives")[0]
+
+    assert list(output.scan(forces)) == []
+    assert output.has_listing(forces) == False
+    assert output.has_listing(forces + listing) == True
+
+
+def test_scan_ends_listing_without_spiral_at_next_listing(listing):
+    first = listing.split(" Clb Cnr / Clr Cnb")[0]
+    st, eig = output.split(first + listing)
+
+    assert len(st) == 2
+    assert eig == []
+
+
+def test_eig_array_pads_short_cases_with_nan():
+    modes = output.eig_array([[(-1.0, 2.0), (-3.0, 0.0)], [], [(-5.0, -6.0)]])
+
+    assert modes.shape == (3, 2)
+    assert modes[0].tolist() == [-1+2j, -3+0j]
+    assert np.isnan(modes[1]).all()
+    assert modes[2, 0] == -5-6j
+    assert np.isnan(modes[2, 1])
+
+
+def test_eig_array_without_modes():
+    assert output.eig_array([]).shape == (0, 0)
+    assert output.eig_array([[], []]).shape == (2, 0)
+
+
+def test_pad_modes():
+    modes = output.pad_modes(np.array([[1+1j]]), 3)
+
+    assert modes.shape == (1, 3)
+    assert np.isnan(modes[0, 1:]).all()
+    assert output.pad_modes(modes, 2) is modes
+
+
+def test_eig_files_round_trip(tmp_path):
+    file = str(tmp_path / "modes.eig")
+    output.write_eig(file, [(-0.35, 2.8), (-11.45, 0.0)])
+
+    assert output.read_eig_file(file) == [(-0.35, 2.8), (-11.45, 0.0)]
+    modes = output.read_eig_files([file, str(tmp_path / "missing.eig")])
+    assert modes[0].tolist() == [-0.35+2.8j, -11.45+0j]
+    assert np.isnan(modes[1]).all()
+
+
+def test_parse_prefers_results_files(tmp_path, listing):
+    file = str(tmp_path / "st.txt")
+    output.write_st(file, listing.splitlines(True))
+
+    st, eig = output.parse("no listing here", [file])
+
+    assert st == [listing.splitlines(True)]
+    assert eig == []
@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from avlautomation import output
+from avlautomation.cache import ResultCache
+from avlautomation.pool import AVLError, AVLPool, AVLSession, Job
+
+
+def polar(example, alpha, st_file=""):
+    return f"load {example / 'example_plane.avl'}\noper\na a {alpha}\nx\nst\n{st_file}\n"
+
+
+def test_session_runs_jobs_back_to_back(example):
+    session = AVLSession(str(example), timeout=10)
+    try:
+        first = session.run(polar(example, 1))
+        second = session.run(polar(example, 2) + "\nmode\nN\n")
+    finally:
+        session.close()
+
+    assert output.read_st(output.split(first)[0][0]).alpha == 1.0
+    st, eig = output.split(second)
+    assert output.read_st(st[0]).alpha == 2.0
+    assert len(eig) == 1
+
+    #   Nothing from one job (end marker, prompts) spills into the next.
+    assert second.startswith(f"\n Reading file: {example / 'example_plane.avl'}")
+    assert "command not recognized" not in first+second
+    assert session.jobs == 2
+    assert session.buffer == ""
+    assert session.alive() == False
+
+
+def test_session_timeout(example, monkeypatch):
+    monkeypatch.setenv("FAKE_AVL_LATENCY", "2")
+    session = AVLSession(str(example), timeout=10)
+    try:
+        with pytest.raises(AVLError, match="timed out"):
+            session.run(polar(example, 1), timeout=0.2)
+    finally:
+        session.close()
+
+
+def test_session_dies_during_job(example, monkeypatch):
+    monkeypatch.setenv("FAKE_AVL_FAILURE_RATE", "1")
+    session = AVLSession(str(example), timeout=10)
+    try:
+        with pytest.raises(AVLError, match="exited"):
+            session.run(polar(example, 1))
+        with pytest.raises(AVLError, match="exited|not running"):
+            session.run(polar(example, 1))
+    finally:
+        session.close()
+
+
+def test_pool_map_keeps_submission_order(example):
+    with AVLPool(str(example), 3, max_jobs=2, timeout=10) as pool:
+        stdouts = pool.map([polar(example, alpha) for alpha in range(7)])
+
+    alphas = [output.read_st(output.split(stdout)[0][0]).alpha for stdout in stdouts]
+    assert alphas == list(range(7))
+
+
+def test_pool_recycles_sessions(example):
+    pool = AVLPool(str(example), 1, max_jobs=2, timeout=10)
+    try:
+        pool.run(polar(example, 1))
+        session = pool.idle.queue[0]
+        pool.run(polar(example, 1))
+        assert pool.idle.queue[0] is None
+        assert session.alive() == False
+        pool.run(polar(example, 1))
+        assert pool.idle.queue[0].jobs == 1
+    finally:
+        pool.close()
+
+
+def test_pool_gives_up_after_retries(example, monkeypatch):
+    monkeypatch.setenv("FAKE_AVL_FAILURE_RATE", "1")
+    with AVLPool(str(example), 1, timeout=10, retries=2) as pool:
+        with pytest.raises(AVLError):
+            pool.run(polar(example, 1))
+        assert pool.idle.queue[0] is None
+
+
+def test_pool_results_with_files_and_cache(example):
+    cache = ResultCache(str(example / "cache"))
+    jobs = [
+        Job(polar(example, alpha, str(example / f"{alpha}.st")), str(example / "example_plane.avl"),
+            st_files=[str(example / f"{alpha}.st")], tag=alpha)
+        for alpha in range(5)
+    ]
+
+    with AVLPool(str(example), 2, timeout=10) as pool:
+        first = {job.tag: st for job, (st, eig) in pool.results(iter(jobs), cache, window=2)}
+        for job in jobs:
+            os.remove(job.st_files[0])
+        second = {job.tag: st for job, (st, eig) in pool.results(jobs, cache)}
+
+    assert sorted(first) == list(range(5))
+    assert all(output.read_st(first[alpha][0]).alpha == alpha for alpha in first)
+    assert second == first
+    assert (cache.hits, cache.misses) == (5, 5)
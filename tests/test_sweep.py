@@ -0,0 +1,149 @@
+import os
+
+import numpy as np
+import pytest
+
+from avlautomation.avlfile import AVLFile
+from avlautomation.sweep import Sweep, SweepResults, Parameter, GeometryMutator
+
+
+class Config():
+    def __init__(self, **values):
+        self.values = values
+
+
+def mutator(**columns):
+    return [Config(**dict(zip(columns, values))) for values in zip(*columns.values())]
+
+
+def measure(plane):
+    return {"total": plane.values["a"]*10+plane.values["b"], "pair": [plane.values["a"], plane.values["b"]]}
+
+
+def test_parameter_values():
+    assert Parameter("a", lower=0, upper=1, steps=3).values.tolist() == [0.0, 0.5, 1.0]
+    assert Parameter("a", values=2).values.tolist() == [2]
+    with pytest.raises(ValueError):
+        Parameter("a", lower=0, upper=1)
+
+
+def test_sweep_rejects_duplicate_names():
+    with pytest.raises(ValueError):
+        Sweep([Parameter("a", values=[1]), Parameter("a", values=[2])], mutator)
+
+
+def test_configurations_first_parameter_slowest():
+    sweep = Sweep([Parameter("a", values=[1, 2]), Parameter("b", values=[3, 4, 5])], mutator)
+
+    assert sweep.shape == (2, 3)
+    assert sweep.size == 6
+    columns = sweep.configurations(2, 5)
+    assert columns["a"].tolist() == [1, 2, 2]
+    assert columns["b"].tolist() == [5, 3, 4]
+
+
+def test_generate_batches_lazily():
+    calls = []
+
+    def counting(**columns):
+        calls.append(len(columns["a"]))
+        return mutator(**columns)
+
+    sweep = Sweep([Parameter("a", values=[1, 2, 3, 4, 5])], counting)
+    batches = sweep.generate(2)
+    assert calls == []
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert calls == [2, 2, 1]
+
+
+def test_generate_checks_mutator_output():
+    sweep = Sweep([Parameter("a", values=[1, 2])], lambda **columns: [])
+
+    with pytest.raises(ValueError):
+        list(sweep.generate())
+
+
+def test_run_and_stream_fill_results():
+    a = Parameter("a", values=[1, 2])
+    b = Parameter("b", values=[3, 4, 5])
+    sweep = Sweep([a, b], mutator, batch=4)
+
+    def out_of_order(planes):
+        return reversed(list(planes))
+
+    for results in (sweep.run(lambda planes: None, measure), sweep.stream(out_of_order, measure)):
+        assert results["total"].tolist() == [[13, 14, 15], [23, 24, 25]]
+        assert results["pair"].shape == (2, 3, 2)
+        assert results["pair"][1, 2].tolist() == [2, 5]
+
+
+def test_stream_pulls_planes_as_run_needs_them():
+    made = []
+
+    def tracking(**columns):
+        planes = mutator(**columns)
+        made.extend(planes)
+        return planes
+
+    def run(planes):
+        for plane in planes:
+            assert len(made) <= plane.values["a"]
+            yield plane
+
+    sweep = Sweep([Parameter("a", values=[1, 2, 3])], tracking)
+    results = sweep.stream(run, lambda plane: {"a": plane.values["a"]})
+
+    assert results["a"].tolist() == [1, 2, 3]
+
+
+def test_results_sel():
+    results = SweepResults([Parameter("a", values=[0.1, 0.2]), Parameter("name", values=["x", "y", "z"])])
+    for i in range(6):
+        results.set(i, {"value": i, "modes": [complex(i, 1)]})
+
+    assert "value" in results
+    assert results["modes"].dtype == complex
+    assert results.sel(a=0.2)["value"].tolist() == [3, 4, 5]
+    assert results.sel(name="y")["value"].tolist() == [1, 4]
+    assert results.sel(a=0.1+1e-12, name="z")["value"] == 2
+    assert results.sel(a=0.2, name="x")["modes"].tolist() == [3+1j]
+    with pytest.raises(KeyError):
+        results.sel(a=0.3)
+
+
+def test_results_unset_values_are_nan():
+    results = SweepResults([Parameter("a", values=[1, 2])])
+    results.set(1, {"value": 5.0})
+
+    assert np.isnan(results["value"][0])
+    frame = results.to_dataframe()
+    assert frame["a"].tolist() == [1, 2]
+    assert frame["value"].tolist()[1] == 5.0
+
+
+def test_to_dataframe_skips_array_results():
+    results = SweepResults([Parameter("a", values=[1, 2]), Parameter("b", values=[3])])
+    results.set(0, {"value": 1.0, "polar": [1.0, 2.0]})
+
+    assert list(results.to_dataframe().columns) == ["a", "b", "value"]
+
+
+def test_geometry_mutator_writes_each_configuration(example):
+    def edit(geometry, chord, ainc):
+        for section in geometry.surface("Elevator").sections:
+            section.chord = chord
+            section.ainc = ainc
+
+    directory = str(example / "planes")
+    os.makedirs(directory)
+    sweep = Sweep([Parameter("chord", values=[100, 150]), Parameter("ainc", values=[-1, 1])],
+                  GeometryMutator(str(example / "example_plane.avl"), directory, edit), batch=3)
+    planes = [plane for batch in sweep.generate() for plane in batch]
+
+    assert [plane.name for plane in planes] == ["0", "1", "2", "3"]
+    assert planes[2].sweep_values == {"chord": 150, "ainc": -1}
+    for plane in planes:
+        sections = AVLFile.read(plane.geom_file).surface("Elevator").sections
+        assert [section.chord for section in sections] == [plane.sweep_values["chord"]]*len(sections)
+        assert [section.ainc for section in sections] == [plane.sweep_values["ainc"]]*len(sections)